@@ -0,0 +1,260 @@
+# Attendance Analytics for the Smart Attendance System
+# Rollup tables maintained on every mark, so term reports never scan the raw table
+
+import argparse
+import calendar
+import sqlite3
+import time
+from datetime import date as date_cls, datetime
+
+from attendance_partitions import AttendancePartitions
+
+
+class AttendanceAnalytics:
+    """Per-student x month and per-day x hour rollups over the attendance table"""
+
+    def __init__(self, conn, partitions=None):
+        self.conn = conn
+        self.partitions = partitions
+
+    def _sources(self, start_date=None, end_date=None, include_archived=False):
+        """Raw attendance tables covering the range"""
+        if self.partitions is None:
+            yield 'attendance'
+        else:
+            yield from self.partitions.iter_sources(start_date, end_date,
+                                                    include_archived=include_archived)
+
+    def ensure_schema(self):
+        """Create rollup tables if they do not exist"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS rollup_student_month (
+                student_id TEXT NOT NULL,
+                month TEXT NOT NULL,
+                days_present INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (student_id, month)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS rollup_day_hour (
+                date TEXT NOT NULL,
+                hour INTEGER NOT NULL,
+                marks INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (date, hour)
+            ) WITHOUT ROWID
+        ''')
+        self.conn.commit()
+
+    def needs_rebuild(self):
+        """True when attendance rows exist but the rollups were never built"""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT 1 FROM rollup_day_hour LIMIT 1')
+        if cursor.fetchone():
+            return False
+        if self.partitions is not None:
+            return self.partitions.has_rows()
+        cursor.execute('SELECT 1 FROM attendance LIMIT 1')
+        return cursor.fetchone() is not None
+
+    def record_mark(self, cursor, student_id, date, time_str):
+        """Fold one new attendance row into the rollups (caller commits)"""
+        cursor.execute('''
+            INSERT INTO rollup_student_month (student_id, month, days_present)
+            VALUES (?, ?, 1)
+            ON CONFLICT (student_id, month) DO UPDATE SET days_present = days_present + 1
+        ''', (student_id, date[:7]))
+        cursor.execute('''
+            INSERT INTO rollup_day_hour (date, hour, marks)
+            VALUES (?, ?, 1)
+            ON CONFLICT (date, hour) DO UPDATE SET marks = marks + 1
+        ''', (date, int(time_str[:2])))
+
+    def forget_student(self, cursor, student_id, sources=None):
+        """Remove a student's contribution before their attendance rows are deleted
+
+        sources are the tables about to be deleted from, already attached
+        (e.g. by AttendancePartitions.writing_keys) so this can run inside the
+        deleting transaction; by default every partition is attached in turn,
+        which needs no transaction to be open.
+        """
+        decrements = []
+        for source in (self._sources(include_archived=True) if sources is None else sources):
+            cursor.execute(f'''
+                SELECT date, CAST(substr(time, 1, 2) AS INTEGER), COUNT(*)
+                FROM {source} WHERE student_id = ?
+                GROUP BY 1, 2
+            ''', (student_id,))
+            decrements.extend(cursor.fetchall())
+        cursor.executemany('''
+            UPDATE rollup_day_hour SET marks = marks - ? WHERE date = ? AND hour = ?
+        ''', [(count, date, hour) for date, hour, count in decrements])
+        cursor.execute('DELETE FROM rollup_day_hour WHERE marks <= 0')
+        cursor.execute('DELETE FROM rollup_student_month WHERE student_id = ?', (student_id,))
+
+    def rebuild(self):
+        """Recompute both rollups from the raw attendance table(s)
+
+        Partitions can only be attached outside a transaction, so each one is
+        summed into temp tables first (committing nothing but temp data), and
+        the rollups are then replaced in a single transaction. A failure at any
+        point leaves the existing rollups untouched.
+        """
+        start = time.perf_counter()
+        cursor = self.conn.cursor()
+        cursor.execute('DROP TABLE IF EXISTS temp.rebuild_student_month')
+        cursor.execute('DROP TABLE IF EXISTS temp.rebuild_day_hour')
+        cursor.execute('CREATE TEMP TABLE rebuild_student_month (student_id TEXT, month TEXT, days_present INTEGER)')
+        cursor.execute('CREATE TEMP TABLE rebuild_day_hour (date TEXT, hour INTEGER, marks INTEGER)')
+        try:
+            for source in self._sources(include_archived=True):
+                cursor.execute(f'''
+                    INSERT INTO temp.rebuild_student_month
+                    SELECT student_id, substr(date, 1, 7), COUNT(*)
+                    FROM {source} GROUP BY 1, 2
+                ''')
+                cursor.execute(f'''
+                    INSERT INTO temp.rebuild_day_hour
+                    SELECT date, CAST(substr(time, 1, 2) AS INTEGER), COUNT(*)
+                    FROM {source} GROUP BY 1, 2
+                ''')
+                self.conn.commit()  # Temp tables only, so the next partition can be attached
+
+            cursor.execute('DELETE FROM rollup_student_month')
+            cursor.execute('DELETE FROM rollup_day_hour')
+            cursor.execute('''
+                INSERT INTO rollup_student_month (student_id, month, days_present)
+                SELECT student_id, month, SUM(days_present) FROM temp.rebuild_student_month GROUP BY 1, 2
+            ''')
+            cursor.execute('''
+                INSERT INTO rollup_day_hour (date, hour, marks)
+                SELECT date, hour, SUM(marks) FROM temp.rebuild_day_hour GROUP BY 1, 2
+            ''')
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.execute('DROP TABLE IF EXISTS temp.rebuild_student_month')
+            cursor.execute('DROP TABLE IF EXISTS temp.rebuild_day_hour')
+        elapsed = time.perf_counter() - start
+        print(f"✅ Rollups rebuilt in {elapsed:.2f}s")
+        return elapsed
+
+    def _split_range(self, start_date, end_date):
+        """Split a date range into whole months (rollup) and partial edges (raw table)"""
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+
+        full_months = []
+        partial_ranges = []
+        year, month = start.year, start.month
+        while (year, month) <= (end.year, end.month):
+            month_start = date_cls(year, month, 1)
+            month_end = date_cls(year, month, calendar.monthrange(year, month)[1])
+            if start <= month_start and month_end <= end:
+                full_months.append(month_start.strftime('%Y-%m'))
+            else:
+                partial_ranges.append((max(start, month_start).isoformat(),
+                                       min(end, month_end).isoformat()))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+        return full_months, partial_ranges
+
+    def class_days(self, start_date, end_date):
+        """Number of days in the range on which attendance was taken"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT COUNT(DISTINCT date) FROM rollup_day_hour WHERE date BETWEEN ? AND ?
+        ''', (start_date, end_date))
+        return cursor.fetchone()[0]
+
+    def student_rates(self, start_date, end_date):
+        """Attendance rate per registered student over a date range"""
+        full_months, partial_ranges = self._split_range(start_date, end_date)
+        cursor = self.conn.cursor()
+        present = {}
+
+        if full_months:
+            cursor.execute('''
+                SELECT student_id, SUM(days_present) FROM rollup_student_month
+                WHERE month BETWEEN ? AND ? GROUP BY student_id
+            ''', (full_months[0], full_months[-1]))
+            for student_id, days in cursor.fetchall():
+                present[student_id] = present.get(student_id, 0) + days
+
+        # At most two partial months - served by the (date, time) index. Archived
+        # partitions count too, as they do in the rollups used for whole months
+        for range_start, range_end in partial_ranges:
+            for source in self._sources(range_start, range_end, include_archived=True):
+                cursor.execute(f'''
+                    SELECT student_id, COUNT(*) FROM {source}
+                    WHERE date BETWEEN ? AND ? GROUP BY student_id
+                ''', (range_start, range_end))
+                for student_id, days in cursor.fetchall():
+                    present[student_id] = present.get(student_id, 0) + days
+
+        total_days = self.class_days(start_date, end_date)
+
+        cursor.execute('SELECT student_id, name FROM students ORDER BY student_id')
+        rates = []
+        for student_id, name in cursor.fetchall():
+            days = present.get(student_id, 0)
+            rates.append({
+                'student_id': student_id,
+                'name': name,
+                'days_present': days,
+                'class_days': total_days,
+                'rate': (days / total_days) * 100 if total_days else 0.0,
+            })
+        return rates
+
+    def arrival_histogram(self, start_date, end_date):
+        """Marks per hour of day (24 buckets) over a date range"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT hour, SUM(marks) FROM rollup_day_hour
+            WHERE date BETWEEN ? AND ? GROUP BY hour
+        ''', (start_date, end_date))
+        histogram = [0] * 24
+        for hour, marks in cursor.fetchall():
+            histogram[hour] = marks
+        return histogram
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Attendance rollups and analytics")
+    parser.add_argument('--db', default='smart_attendance.db', help="Attendance database")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild rollups from raw attendance")
+    parser.add_argument('--from', dest='start_date', help="First date (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='end_date', help="Last date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db, uri=True)
+    try:
+        analytics = AttendanceAnalytics(conn, AttendancePartitions(conn))
+        analytics.ensure_schema()
+        if args.rebuild:
+            analytics.rebuild()
+
+        if args.start_date and args.end_date:
+            start = time.perf_counter()
+            rates = analytics.student_rates(args.start_date, args.end_date)
+            histogram = analytics.arrival_histogram(args.start_date, args.end_date)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            print(f"📈 Attendance {args.start_date} to {args.end_date}")
+            for row in rates:
+                print(f"  {row['student_id']:>10}  {row['name']:<25} "
+                      f"{row['days_present']:>4}/{row['class_days']:<4} {row['rate']:6.1f}%")
+            print("🕒 Arrivals by hour")
+            for hour, marks in enumerate(histogram):
+                if marks:
+                    print(f"  {hour:02d}:00  {marks}")
+            print(f"⏱️ Computed in {elapsed_ms:.1f} ms")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
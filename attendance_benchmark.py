@@ -0,0 +1,654 @@
+# Benchmark Suite for the Smart Attendance System
+# Headless detection/recognition runs over recorded frames, reproducible across machines and commits
+
+import argparse
+import hashlib
+import os
+import pickle
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from multiprocessing import Pool
+
+import cv2
+import numpy as np
+
+from attendance_analytics import AttendanceAnalytics
+from attendance_config import PERFORMANCE_PROFILES, load_config
+from attendance_db import DatabaseManager
+from attendance_sync import AggregationServer, SyncAgent
+from correlation_engine import ShiftCorrelator
+from face_detectors import DetectorChain
+from camera_profiles import PROFILES as CAPTURE_PROFILES
+from face_gallery import STORAGE_DTYPES, TEMPLATE_SIZES, CompactGallery, build_templates
+from face_matcher import TemplateMatcher
+from frame_replay import ReplayCapture
+from lighting import LightingNormalizer
+from recognition_workers import RecognitionWorkers
+from student_state import StudentIndex
+
+
+FACE_DATA_PATH = os.path.join('faces', 'smart_face_data.pkl')
+
+
+def load_gallery(path=FACE_DATA_PATH):
+    """Student index and gallery from the GUI's face data file"""
+    if not os.path.exists(path):
+        return StudentIndex({}, {}), []
+    with open(path, 'rb') as f:
+        data = pickle.load(f)
+    face_data = data.get('face_data', {})
+    index = StudentIndex(data.get('students', {}), face_data)
+    return index, [face_data[student_id] for student_id in index.ids]
+
+
+def synthetic_gallery(students, captures=2, seed=0, sizes=TEMPLATE_SIZES):
+    """Random smooth face-like templates laid out like registration stores them"""
+    rng = np.random.default_rng(seed)
+    gallery = []
+    for _ in range(students):
+        templates = []
+        for _ in range(captures):
+            base = cv2.GaussianBlur(rng.integers(0, 256, (100, 100), dtype=np.uint8), (9, 9), 0)
+            templates.extend(build_templates(base, sizes))
+        gallery.append(templates)
+    return gallery
+
+
+def synthetic_probes(gallery, faces, seed=1):
+    """Noisy crops of random students (plus one stranger) at detector-like sizes"""
+    rng = np.random.default_rng(seed)
+    probes, expected = [], []
+    for i in range(faces):
+        size = int(rng.integers(60, 160))
+        if i == faces - 1:
+            crop = cv2.GaussianBlur(rng.integers(0, 256, (size, size), dtype=np.uint8), (9, 9), 0)
+            expected.append(-1)
+        else:
+            position = int(rng.integers(len(gallery)))
+            crop = cv2.resize(gallery[position][-1], (size, size))
+            expected.append(position)
+        noise = rng.normal(0, 8, crop.shape)
+        probes.append(np.clip(crop + noise, 0, 255).astype(np.uint8))
+    return probes, expected
+
+
+class HeadlessPipeline:
+    """The attendance loop's analysis path (lighting, detection, matching) without the GUI"""
+
+    def __init__(self, detectors, matcher, lighting=None, min_face_size=50):
+        self.detectors = detectors
+        self.matcher = matcher
+        self.lighting = lighting or LightingNormalizer()
+        self.min_face_size = min_face_size
+
+    def process(self, frame):
+        """List of (x, y, w, h, position) for one BGR frame"""
+        frame = cv2.flip(frame, 1)
+        gray = self.lighting.normalize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        faces = self.detectors.detect(gray, self.min_face_size)
+        face_rois = [self.lighting.normalize_face(gray[y:y+h, x:x+w]) for (x, y, w, h) in faces]
+        positions = self.matcher.match_batch(face_rois)
+        return [(int(x), int(y), int(w), int(h), position) for (x, y, w, h), position in zip(faces, positions)]
+
+    def run(self, cap, max_frames=None):
+        """Process every frame of a capture; returns timing and a digest of the results"""
+        digest = hashlib.sha1()
+        frames = faces = matched = 0
+        processing = 0.0
+        start = time.perf_counter()
+
+        while max_frames is None or frames < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_start = time.perf_counter()
+            results = self.process(frame)
+            processing += time.perf_counter() - frame_start
+
+            frames += 1
+            faces += len(results)
+            matched += sum(1 for result in results if result[4] >= 0)
+            digest.update(repr(results).encode('ascii'))
+
+        elapsed = time.perf_counter() - start
+        return {
+            'frames': frames,
+            'faces': faces,
+            'matched': matched,
+            'seconds': elapsed,
+            'fps': frames / elapsed if elapsed else 0.0,
+            'ms_per_frame': processing * 1000 / frames if frames else 0.0,
+            'digest': digest.hexdigest()[:12],
+        }
+
+
+def run_pipeline(args):
+    """Replay a recording through the headless pipeline"""
+    index, gallery = load_gallery(args.gallery)
+    pipeline = HeadlessPipeline(DetectorChain(), TemplateMatcher(gallery), min_face_size=args.min_face)
+    cap = ReplayCapture(args.replay, speed=args.speed)
+    try:
+        stats = pipeline.run(cap, args.frames)
+    finally:
+        cap.release()
+
+    print(f"📼 {args.replay} against {len(index)} students")
+    print(f"Frames {stats['frames']}, faces {stats['faces']}, matched {stats['matched']}")
+    print(f"⚡ {stats['fps']:.1f} FPS, {stats['ms_per_frame']:.2f} ms analysis per frame")
+    print(f"🔍 Result digest {stats['digest']} (identical across runs of the same code and data)")
+    for backend in pipeline.detectors.stats():
+        print(f"   {backend['backend']:<14}{backend['latency_ms']:8.2f} ms  "
+              f"{backend['hits']}/{backend['calls']} hits")
+
+
+def run_matcher(args):
+    """Per-face cv2.matchTemplate loop versus one batched product per template size"""
+    gallery = synthetic_gallery(args.students)
+    matcher = TemplateMatcher(gallery)
+    probes, expected = synthetic_probes(gallery, args.faces)
+    print(f"🧮 {args.students} students x {len(gallery[0])} templates, {args.faces} faces per frame")
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        looped = [matcher.match_loop(probe) for probe in probes]
+    loop_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        batched = matcher.match_batch(probes)
+    batch_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+    print(f"Per-face loop  {loop_ms:9.2f} ms per frame")
+    print(f"Batched        {batch_ms:9.2f} ms per frame")
+    print(f"⚡ Speedup: {loop_ms / batch_ms:.1f}x")
+    if looped == batched:
+        print(f"✅ Identical results ({sum(p == e for p, e in zip(batched, expected))}/{len(expected)} as expected)")
+    else:
+        print(f"❌ Results differ: loop {looped}, batched {batched}")
+
+
+def legacy_nbytes(gallery):
+    """Lists of individually allocated uint8 arrays plus a float32 scoring row per template"""
+    total = sys.getsizeof(gallery)
+    for templates in gallery:
+        total += sys.getsizeof(templates)
+        total += sum(sys.getsizeof(template) + template.size * 4 for template in templates)
+    return total
+
+
+def run_gallery(args):
+    """Memory footprint and scoring throughput of the gallery layouts"""
+    # Every layout grows linearly with students, so a small sample gives the per-student cost
+    sample = synthetic_gallery(args.sample)
+    per_student = {'legacy': legacy_nbytes(sample) / args.sample}
+    for dtype in STORAGE_DTYPES:
+        per_student[dtype] = sum(CompactGallery(sample, dtype).nbytes().values()) / args.sample
+
+    print(f"💾 Footprint ({len(sample[0])} templates per student, MB)")
+    print(f"{'Students':>10}" + "".join(f"{layout:>12}" for layout in per_student))
+    for students in args.students:
+        print(f"{students:>10}" + "".join(f"{cost * students / 2**20:>12.1f}" for cost in per_student.values()))
+
+    gallery = synthetic_gallery(args.score_students)
+    probes, _ = synthetic_probes(gallery, args.faces)
+    print(f"⚡ Scoring {args.faces} faces against {args.score_students} students")
+    print(f"{'Layout':<10}{'ms/frame':>10}{'GB/s':>8}{'Agree':>8}{'Max err':>10}")
+    reference = None
+    for dtype in STORAGE_DTYPES:
+        compact = CompactGallery(gallery, dtype)
+        compact.best_scores(probes)  # warm-up
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            scores = compact.best_scores(probes)
+        seconds = (time.perf_counter() - start) / args.repeat
+        if reference is None:
+            reference = scores
+        agree = np.mean(scores.argmax(axis=1) == reference.argmax(axis=1))
+        streamed = compact.nbytes()['scoring'] / seconds / 1e9
+        print(f"{dtype:<10}{seconds * 1000:>10.2f}{streamed:>8.2f}{agree:>8.0%}"
+              f"{np.abs(scores - reference).max():>10.5f}")
+        del compact
+
+
+def run_shards(args):
+    """Scaling curve of sharded gallery scoring over thread counts"""
+    gallery = synthetic_gallery(args.students)
+    probes, _ = synthetic_probes(gallery, args.faces)
+    print(f"🧵 Scoring {args.faces} faces against {args.students} students on {os.cpu_count()} CPU core(s)")
+    print(f"{'Layout':<10}{'Threads':>8}{'Shards':>8}{'ms/frame':>10}{'Speedup':>9}{'Efficiency':>12}{'Same':>6}")
+    for dtype in args.dtype:
+        reference = None
+        base_ms = None
+        for threads in args.threads:
+            matcher = TemplateMatcher(gallery, dtype=dtype, threads=threads)
+            matcher.match_batch(probes)  # warm-up, also starts the pool
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                positions, scores = matcher.top_matches(probes)
+            ms = (time.perf_counter() - start) * 1000 / args.repeat
+            if reference is None:
+                reference, base_ms = (positions, scores), ms
+            same = np.array_equal(positions, reference[0]) and np.array_equal(scores, reference[1])
+            speedup = base_ms / ms
+            print(f"{dtype:<10}{threads:>8}{len(matcher.shards):>8}{ms:>10.2f}{speedup:>8.2f}x"
+                  f"{speedup / len(matcher.shards):>12.0%}{'✅' if same else '❌':>6}")
+            del matcher
+
+
+def shifted_probes(probes, offset):
+    """Probes translated by `offset` pixels right and down (edges reflected)"""
+    matrix = np.float32([[1, 0, offset], [0, 1, offset]])
+    return [cv2.warpAffine(probe, matrix, probe.shape[::-1], borderMode=cv2.BORDER_REFLECT_101)
+            for probe in probes]
+
+
+def run_correlation(args):
+    """Equal-size product and FFT shift search versus per-template cv2.matchTemplate calls"""
+    gallery = synthetic_gallery(args.students)
+    probes, expected = synthetic_probes(gallery, args.faces)
+    compact = CompactGallery(gallery)
+    engine = ShiftCorrelator(compact, args.shift)
+    print(f"🔬 {args.faces} faces against {args.students} students, shift tolerance +-{args.shift}px, "
+          f"spectra {engine.nbytes() / 2**20:.1f} MB")
+
+    def matchtemplate_loop(face_rois, shift):
+        best = np.full((len(face_rois), len(gallery)), -np.inf, dtype=np.float32)
+        for f, face_roi in enumerate(face_rois):
+            for position, templates in enumerate(gallery):
+                for template in templates:
+                    probe = cv2.copyMakeBorder(cv2.resize(face_roi, template.shape[::-1]),
+                                               shift, shift, shift, shift, cv2.BORDER_REFLECT_101)
+                    score = cv2.matchTemplate(probe, template, cv2.TM_CCOEFF_NORMED).max()
+                    best[f, position] = max(best[f, position], score)
+        return best
+
+    paths = [
+        ('matchTemplate, equal size', lambda rois: matchtemplate_loop(rois, 0)),
+        ('matrix product', compact.best_scores),
+        (f'matchTemplate, +-{args.shift}px', lambda rois: matchtemplate_loop(rois, args.shift)),
+        (f'batched FFT, +-{args.shift}px', engine.best_scores),
+    ]
+    print(f"{'Path':<28}{'ms/frame':>10}{'Max diff':>10}")
+    reference = {}
+    for label, score in paths:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            scores = score(probes)
+        ms = (time.perf_counter() - start) * 1000 / args.repeat
+        shifted = '+-' in label
+        diff = np.abs(scores - reference[shifted]).max() if shifted in reference else 0.0
+        reference.setdefault(shifted, scores)
+        print(f"{label:<28}{ms:>10.1f}{diff:>10.5f}")
+
+    known = np.array(expected) >= 0
+    print(f"🎯 Accuracy on misaligned crops (threshold 0.65, {known.sum()} known faces + strangers)")
+    print(f"{'Offset px':>10}{'Equal size':>12}{'Shifted':>10}{'Top score':>11}{'Shifted':>10}")
+    for offset in range(0, args.max_offset + 1):
+        moved = shifted_probes(probes, offset)
+        row = f"{offset:>10}"
+        tops = []
+        for scorer in (compact, engine):
+            best = scorer.best_scores(moved)
+            positions = np.where(best.max(axis=1) > 0.65, best.argmax(axis=1), -1)
+            row += f"{np.mean(positions == np.array(expected)):>11.0%} "
+            tops.append(best.max(axis=1)[known].mean())
+        print(row[:-1] + "".join(f"{top:>10.3f} " for top in tops).rstrip().rjust(21))
+
+
+def synthetic_frame(probes, shape=(1080, 1920), face_size=160):
+    """Grayscale frame with the probe faces pasted on a row, and their boxes"""
+    gray = np.random.default_rng(2).integers(0, 256, shape, dtype=np.uint8)
+    boxes = []
+    for i, probe in enumerate(probes):
+        x, y = 20 + i * (face_size + 20), 100
+        gray[y:y+face_size, x:x+face_size] = cv2.resize(probe, (face_size, face_size))
+        boxes.append((x, y, face_size, face_size))
+    return gray, boxes
+
+
+def run_workers(args):
+    """In-loop recognition versus worker processes fed through the shared-memory ring"""
+    gallery = synthetic_gallery(args.students)
+    probes, _ = synthetic_probes(gallery, args.faces)
+    gray, boxes = synthetic_frame(probes)
+    matcher = TemplateMatcher(gallery)
+    expected = tuple(matcher.match_batch([gray[y:y+h, x:x+w] for (x, y, w, h) in boxes]))
+    print(f"🧠 {args.frames} frames of {gray.shape[1]}x{gray.shape[0]}, {args.faces} faces, "
+          f"{args.students} students")
+    task_bytes = len(pickle.dumps(('frame', 0, 0, boxes)))
+    print(f"📦 Per frame: {gray.nbytes / 1024:.0f} KiB copied into shared memory, {task_bytes} bytes queued "
+          f"(a pickled frame would be {len(pickle.dumps(gray)) / 1024:.0f} KiB)")
+
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        matcher.match_batch([gray[y:y+h, x:x+w] for (x, y, w, h) in boxes])
+    base_fps = args.frames / (time.perf_counter() - start)
+    print(f"{'Workers':<10}{'FPS':>8}{'Speedup':>9}{'Same':>6}")
+    print(f"{'in-loop':<10}{base_fps:>8.1f}{1.0:>8.2f}x{'✅':>6}")
+
+    for count in args.workers:
+        workers = RecognitionWorkers(count, gray.shape)
+        try:
+            workers.set_gallery(0, gallery)
+            workers.submit(gray, boxes)
+            workers.drain(timeout=120)  # Waits for spawn and the gallery build
+            results = []
+            start = time.perf_counter()
+            for _ in range(args.frames):
+                # Block on a result when the ring is full so every frame is recognized
+                while workers.submit(gray, boxes) is None:
+                    results.extend(workers.poll(timeout=10))
+                results.extend(workers.poll())
+            results.extend(workers.drain())
+            fps = args.frames / (time.perf_counter() - start)
+            same = len(results) == args.frames and all(result[2] == expected for result in results)
+            print(f"{count:<10}{fps:>8.1f}{fps / base_fps:>8.2f}x{'✅' if same else '❌':>6}")
+        finally:
+            workers.close()
+
+
+def _stress_insert(conn, db, student_id, date, time_str):
+    """The GUI's mark path: partition insert plus rollup update in one transaction"""
+    table = db.partitions().active_table(date)
+    cursor = conn.execute(f'''
+        INSERT OR IGNORE INTO {table} (student_id, name, date, time, status)
+        VALUES (?, ?, ?, ?, 'Present')
+    ''', (student_id, student_id, date, time_str))
+    if cursor.rowcount > 0:
+        AttendanceAnalytics(conn).record_mark(cursor, student_id, date, time_str)
+        return True
+    return False
+
+
+def _stress_writer(job):
+    """One kiosk process writing its own marks; returns (metrics, unwritten marks, latencies)"""
+    worker, marks, busy_timeout, journal_mode, date = job
+    db = DatabaseManager('stress.db', busy_timeout=busy_timeout, journal_mode=journal_mode, log_retries=False)
+    latencies = []
+    unwritten = 0
+    try:
+        for i in range(marks):
+            start = time.perf_counter()
+            try:
+                db.write(_stress_insert, db, f"k{worker}-{i}", date, datetime.now().strftime('%H:%M:%S'))
+            except Exception:
+                unwritten += 1  # the GUI would queue these in pending_marks
+            latencies.append((time.perf_counter() - start) * 1000)
+        return db.stats(), unwritten, latencies
+    finally:
+        db.close()
+
+
+def run_db_stress(args):
+    """Concurrent writer processes on one database; checks that every mark lands"""
+    date = datetime.now().strftime('%Y-%m-%d')
+    previous_dir = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix='attendance_stress_'))
+    try:
+        setup = DatabaseManager('stress.db', journal_mode=args.journal_mode)
+        setup.write(lambda conn: (setup.partitions().active_table(date), AttendanceAnalytics(conn).ensure_schema()))
+        setup.close()
+
+        jobs = [(worker, args.marks, args.busy_timeout, args.journal_mode, date) for worker in range(args.processes)]
+        start = time.perf_counter()
+        with Pool(args.processes) as pool:
+            results = pool.map(_stress_writer, jobs)
+        seconds = time.perf_counter() - start
+
+        check = DatabaseManager('stress.db', journal_mode=args.journal_mode)
+        conn = check.connection()
+        table = check.partitions().active_table(date)
+        stored = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+        rolled_up = conn.execute('SELECT COALESCE(SUM(marks), 0) FROM rollup_day_hour').fetchone()[0]
+        check.close()
+    finally:
+        os.chdir(previous_dir)
+
+    expected = args.processes * args.marks
+    unwritten = sum(result[1] for result in results)
+    latencies = sorted(latency for result in results for latency in result[2])
+    totals = {key: sum(result[0][key] for result in results)
+              for key in ('writes', 'retried_writes', 'retries', 'failed_writes', 'backoff_seconds')}
+
+    print(f"🗄️ {args.processes} processes x {args.marks} marks, {args.journal_mode} journal, "
+          f"busy timeout {args.busy_timeout}s")
+    print(f"⚡ {expected / seconds:.0f} marks/s, write latency p50 {statistics.median(latencies):.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.1f} ms, max {latencies[-1]:.1f} ms")
+    print(f"🔁 {totals['retried_writes']} writes retried ({totals['retries']} retries, "
+          f"{totals['backoff_seconds']:.2f}s backing off), {totals['failed_writes']} gave up")
+    if stored == expected - unwritten and rolled_up == stored:
+        print(f"✅ {stored}/{expected} marks stored, rollups consistent, {unwritten} left for the pending queue")
+    else:
+        print(f"❌ Lost marks: stored {stored}, rollups {rolled_up}, expected {expected - unwritten}")
+
+
+def _write_kiosk_marks(db_path, partition_dir, students, dates):
+    """Fill a kiosk database with one mark per student per date"""
+    db = DatabaseManager(db_path, partition_dir=partition_dir)
+
+    def insert(conn):
+        for date in dates:
+            table = db.partitions().active_table(date)
+            conn.executemany(f'''
+                INSERT OR IGNORE INTO {table} (student_id, name, date, time, status)
+                VALUES (?, ?, ?, ?, 'Present')
+            ''', [(f"S{i:05d}", f"Student {i}", date, f"{8 + i % 3:02d}:{i % 60:02d}:00") for i in range(students)])
+            conn.commit()  # the next date may need another partition attached
+
+    db.write(insert)
+    db.close()
+
+
+def run_sync(args):
+    """Two kiosks with overlapping days pushing to a local aggregation server"""
+    previous_dir = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix='attendance_sync_'))
+    try:
+        server = AggregationServer('server.db', 'server_partitions')
+        httpd = server.make_http_server('127.0.0.1', 0)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{httpd.server_address[1]}"
+
+        # Kiosk B shares one day with kiosk A, so those marks must be deduplicated
+        kiosks = {'kiosk-a': ['2026-09-29', '2026-09-30', '2026-10-01'], 'kiosk-b': ['2026-10-01', '2026-10-02']}
+        for kiosk_id, dates in kiosks.items():
+            _write_kiosk_marks(f"{kiosk_id}.db", f"{kiosk_id}_partitions", args.students, dates)
+        expected = args.students * len({date for dates in kiosks.values() for date in dates})
+
+        print(f"🔄 Syncing {args.students} students x {sum(map(len, kiosks.values()))} kiosk-days, "
+              f"batches of {args.batch_size}")
+        for kiosk_id in kiosks:
+            agent = SyncAgent(url, kiosk_id, f"{kiosk_id}.db", f"{kiosk_id}_state.json",
+                              args.batch_size, partition_dir=f"{kiosk_id}_partitions")
+            stats = agent.sync_once()
+            print(f"  {kiosk_id}: {stats['marks']} marks ({stats['accepted']} new) in {stats['batches']} batches, "
+                  f"{stats['marks'] / stats['seconds']:.0f} marks/s, {stats['bytes'] / 1024:.0f} KiB sent "
+                  f"({stats['raw_bytes'] / max(stats['bytes'], 1):.1f}x compression)")
+
+        # Lost local state: the agent resumes from the server's high-water mark
+        os.remove('kiosk-a_state.json')
+        resumed = SyncAgent(url, 'kiosk-a', 'kiosk-a.db', 'kiosk-a_state.json',
+                            args.batch_size, partition_dir='kiosk-a_partitions').sync_once()
+        # A batch re-sent after a lost acknowledgement is answered from the batch log
+        agent = SyncAgent(url, 'kiosk-b', 'kiosk-b.db', 'kiosk-b_replay.json',
+                          args.batch_size, partition_dir='kiosk-b_partitions')
+        agent.state = {'partitions': {}}
+        conn = sqlite3.connect('kiosk-b.db', uri=True)
+        key, rows = next(agent.pending_batches(conn))
+        replay, _, _ = agent.push(key, rows)
+        conn.close()
+
+        status = server.status()
+        httpd.shutdown()
+        server.db.close()
+    finally:
+        os.chdir(previous_dir)
+
+    print(f"  resume after lost state: {resumed['marks']} marks re-sent; replayed batch: {replay}")
+    if status['marks_accepted'] == expected and resumed['marks'] == 0 and replay['replayed']:
+        print(f"✅ Server holds {status['marks_accepted']} unique marks from {status['marks_received']} received")
+    else:
+        print(f"❌ Server accepted {status['marks_accepted']}, expected {expected}")
+
+
+def run_profiles(args):
+    """Throughput and accuracy of each performance profile (with the config file's overrides)"""
+    print(f"⚙️ Performance profiles: {args.students} students, {args.frames} frames of {args.faces} faces, "
+          f"crops misaligned by up to {args.max_offset}px")
+    rows, replays = [], []
+    for name in args.profiles:
+        config = load_config(args.config, name)
+        captures = max(1, config.templates_per_student // len(config.template_sizes))
+        gallery = synthetic_gallery(args.students, captures, sizes=config.template_sizes)
+        matcher = TemplateMatcher(gallery, config.match_threshold, config.gallery_dtype,
+                                  config.scoring_threads, config.shift_tolerance)
+        detectors = DetectorChain(list(config.detectors) or None, scale_factor=config.scale_factor,
+                                  min_neighbors=config.min_neighbors)
+
+        capture = CAPTURE_PROFILES.get(config.capture_profile)
+        shape = (capture.height, capture.width) if capture and capture.width else (480, 640)
+        empty = np.random.default_rng(3).integers(0, 256, shape, dtype=np.uint8)
+        detectors.calibrate(empty, config.min_face_size)
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            detectors.detect(empty, config.min_face_size)
+        scan_ms = (time.perf_counter() - start) * 1000 / args.frames
+
+        match_seconds = 0.0
+        correct = {0: 0, args.max_offset: 0}
+        strangers = false_accepts = total = 0
+        for frame in range(args.frames):
+            probes, expected = synthetic_probes(gallery, args.faces, seed=frame + 1)
+            for offset in correct:
+                moved = shifted_probes(probes, offset)
+                start = time.perf_counter()
+                positions = matcher.match_batch(moved)
+                if offset == 0:
+                    match_seconds += time.perf_counter() - start
+                correct[offset] += sum(position == wanted for position, wanted in zip(positions, expected))
+                strangers += expected.count(-1)
+                false_accepts += sum(wanted == -1 and position != -1
+                                     for position, wanted in zip(positions, expected))
+            total += len(expected)
+        match_ms = match_seconds * 1000 / args.frames
+        fits = (scan_ms + match_ms) / 1000 <= 1 / config.target_fps
+        megabytes = sum(matcher.compact.nbytes().values()) / 2**20
+        if matcher.correlator is not matcher.compact:
+            megabytes += matcher.correlator.nbytes() / 2**20  # FFT template spectra
+        rows.append(f"{name:<20}{scan_ms:>9.1f}{match_ms:>10.2f}{'✅' if fits else '❌':>8}"
+                    f"{correct[0] / total:>9.0%}{correct[args.max_offset] / total:>8.0%}"
+                    f"{false_accepts / strangers:>11.0%}{megabytes:>12.1f}")
+
+        if args.replay:
+            _, faces = load_gallery(args.gallery)
+            pipeline = HeadlessPipeline(detectors, TemplateMatcher(faces, config.match_threshold, config.gallery_dtype,
+                                                                   config.scoring_threads, config.shift_tolerance),
+                                        min_face_size=config.min_face_size)
+            cap = ReplayCapture(args.replay, speed='max')
+            try:
+                replays.append((name, pipeline.run(cap, args.replay_frames)))
+            finally:
+                cap.release()
+    print(f"{'Profile':<20}{'Scan ms':>9}{'Match ms':>10}{'Budget':>8}{'Aligned':>9}"
+          f"{f'+-{args.max_offset}px':>8}{'False acc':>11}{'Gallery MB':>12}")
+    for row in rows:
+        print(row)
+    print("   Scan: detection of an empty frame at the profile's capture size (fallbacks every few frames)")
+    print("   Budget: scan + match within one frame at the profile's target FPS")
+    print("   Accuracy: synthetic faces, strangers count as correct when rejected; detection recall needs --replay")
+
+    if replays:
+        print(f"📼 {args.replay}")
+        print(f"{'Profile':<20}{'FPS':>8}{'ms/frame':>10}{'Faces':>8}{'Matched':>9}")
+        for name, stats in replays:
+            print(f"{name:<20}{stats['fps']:>8.1f}{stats['ms_per_frame']:>10.2f}{stats['faces']:>8}"
+                  f"{stats['matched']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Smart Attendance System benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    pipeline_parser = subparsers.add_parser('pipeline', help="Detection and recognition over a recording")
+    pipeline_parser.add_argument('--replay', required=True, metavar='FILE', help="Frame recording")
+    pipeline_parser.add_argument('--speed', choices=['recorded', 'max'], default='max')
+    pipeline_parser.add_argument('--frames', type=int, help="Stop after this many frames")
+    pipeline_parser.add_argument('--gallery', default=FACE_DATA_PATH, help="Face data file")
+    pipeline_parser.add_argument('--min-face', type=int, default=50, help="Detector minimum face size (px)")
+    pipeline_parser.set_defaults(func=run_pipeline)
+
+    matcher_parser = subparsers.add_parser('matcher', help="Per-face versus batched gallery scoring")
+    matcher_parser.add_argument('--students', type=int, default=200)
+    matcher_parser.add_argument('--faces', type=int, default=6, help="Faces per frame")
+    matcher_parser.add_argument('--repeat', type=int, default=3)
+    matcher_parser.set_defaults(func=run_matcher)
+
+    gallery_parser = subparsers.add_parser('gallery', help="Gallery memory footprint and scoring throughput")
+    gallery_parser.add_argument('--students', type=int, nargs='+', default=[10000, 100000],
+                                help="Gallery sizes to report the footprint for")
+    gallery_parser.add_argument('--sample', type=int, default=100, help="Students measured for the footprint")
+    gallery_parser.add_argument('--score-students', type=int, default=2000, help="Students in the timed gallery")
+    gallery_parser.add_argument('--faces', type=int, default=6, help="Faces per frame")
+    gallery_parser.add_argument('--repeat', type=int, default=5)
+    gallery_parser.set_defaults(func=run_gallery)
+
+    shards_parser = subparsers.add_parser('shards', help="Sharded gallery scoring across thread counts")
+    shards_parser.add_argument('--students', type=int, default=20000)
+    shards_parser.add_argument('--faces', type=int, default=6, help="Faces per frame")
+    shards_parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    shards_parser.add_argument('--dtype', nargs='+', default=['float32'], choices=list(STORAGE_DTYPES))
+    shards_parser.add_argument('--repeat', type=int, default=5)
+    shards_parser.set_defaults(func=run_shards)
+
+    correlation_parser = subparsers.add_parser('correlation', help="Equal-size and shift-tolerant scoring paths")
+    correlation_parser.add_argument('--students', type=int, default=100)
+    correlation_parser.add_argument('--faces', type=int, default=6, help="Faces per frame")
+    correlation_parser.add_argument('--shift', type=int, default=3, help="Shift tolerance (px)")
+    correlation_parser.add_argument('--max-offset', type=int, default=6, help="Largest crop misalignment tested")
+    correlation_parser.add_argument('--repeat', type=int, default=2)
+    correlation_parser.set_defaults(func=run_correlation)
+
+    workers_parser = subparsers.add_parser('workers', help="Recognition in worker processes via shared memory")
+    workers_parser.add_argument('--students', type=int, default=2000)
+    workers_parser.add_argument('--faces', type=int, default=4, help="Faces per frame")
+    workers_parser.add_argument('--frames', type=int, default=50)
+    workers_parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    workers_parser.set_defaults(func=run_workers)
+
+    profiles_parser = subparsers.add_parser('profiles', help="Throughput and accuracy of each performance profile")
+    profiles_parser.add_argument('--profiles', nargs='+', default=list(PERFORMANCE_PROFILES),
+                                 choices=list(PERFORMANCE_PROFILES))
+    profiles_parser.add_argument('--config', metavar='FILE', help="Settings file whose overrides apply to every profile")
+    profiles_parser.add_argument('--students', type=int, default=500)
+    profiles_parser.add_argument('--faces', type=int, default=4, help="Faces per frame")
+    profiles_parser.add_argument('--frames', type=int, default=20)
+    profiles_parser.add_argument('--max-offset', type=int, default=3, help="Crop misalignment tested (px)")
+    profiles_parser.add_argument('--replay', metavar='FILE', help="Also run each profile over a frame recording")
+    profiles_parser.add_argument('--replay-frames', type=int, help="Stop each replay after this many frames")
+    profiles_parser.add_argument('--gallery', default=FACE_DATA_PATH, help="Face data file for --replay")
+    profiles_parser.set_defaults(func=run_profiles)
+
+    stress_parser = subparsers.add_parser('db-stress', help="Concurrent writer processes on one database")
+    stress_parser.add_argument('--processes', type=int, default=8)
+    stress_parser.add_argument('--marks', type=int, default=200, help="Marks written per process")
+    stress_parser.add_argument('--busy-timeout', type=float, default=5.0,
+                               help="SQLite busy timeout (lower it to force retries)")
+    stress_parser.add_argument('--journal-mode', default='WAL', choices=['WAL', 'DELETE'])
+    stress_parser.set_defaults(func=run_db_stress)
+
+    sync_parser = subparsers.add_parser('sync', help="Kiosk sync agents against a local aggregation server")
+    sync_parser.add_argument('--students', type=int, default=2000)
+    sync_parser.add_argument('--batch-size', type=int, default=500)
+    sync_parser.set_defaults(func=run_sync)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+# Configuration for the Smart Attendance System
+# Named performance profiles, overridden by a TOML/INI file and ATTENDANCE_* environment variables
+
+import argparse
+import configparser
+import os
+import sys
+
+# tomllib is in the standard library from Python 3.11; INI files work everywhere
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+from camera_profiles import PROFILES as CAPTURE_PROFILES
+from face_detectors import DETECTOR_BACKENDS
+from face_gallery import STORAGE_DTYPES
+
+
+CONFIG_PATHS = ('attendance.toml', 'attendance.ini')  # Looked up in the working directory
+CONFIG_SECTION = 'attendance'
+ENV_PREFIX = 'ATTENDANCE_'
+DEFAULT_PROFILE = 'balanced'
+
+
+class ConfigError(ValueError):
+    """Invalid configuration; the message lists every problem found"""
+
+
+class Setting:
+    """One tunable: its type, the values it accepts and what it controls"""
+
+    def __init__(self, kind, help, minimum=None, maximum=None, choices=None):
+        self.kind = kind  # int, float, str, 'sizes' (tuple of ints) or 'names' (tuple of strings)
+        self.help = help
+        self.minimum = minimum
+        self.maximum = maximum
+        self.choices = choices
+
+    def parse(self, value):
+        """Typed value from a TOML value or an INI/environment string"""
+        if self.kind in (int, float):
+            expected = 'an integer' if self.kind is int else 'a number'
+            if isinstance(value, bool) or (self.kind is int and isinstance(value, float)):
+                raise ValueError(f"expected {expected}, got {value!r}")
+            try:
+                return self.kind(value)
+            except ValueError:
+                raise ValueError(f"expected {expected}, got {value!r}") from None
+        if self.kind is str:
+            return str(value).strip()
+        if isinstance(value, str):
+            value = [item.strip() for item in value.split(',') if item.strip()]
+        if not isinstance(value, (list, tuple)):
+            raise ValueError(f"expected a list, got {value!r}")
+        if self.kind == 'sizes':
+            return tuple(self._integer(item) for item in value)
+        return tuple(str(item) for item in value)
+
+    @staticmethod
+    def _integer(item):
+        if isinstance(item, (bool, float)):
+            raise ValueError(f"expected integers, got {item!r}")
+        try:
+            return int(item)
+        except ValueError:
+            raise ValueError(f"expected integers, got {item!r}") from None
+
+    def check(self, value):
+        """Problem with a parsed value, or None"""
+        if self.kind == 'sizes' and not value:
+            return "needs at least one size"
+        for item in value if isinstance(value, tuple) else (value,):
+            if self.choices is not None and item not in self.choices:
+                return f"'{item}' is not one of {', '.join(self.choices)}"
+            if self.minimum is not None and item < self.minimum or self.maximum is not None and item > self.maximum:
+                return f"{item} is outside {self.minimum}..{self.maximum}"
+        return None
+
+
+SETTINGS = {
+    'scale_factor': Setting(float, "Cascade pyramid step; larger scans fewer scales (faster, more misses)",
+                            1.05, 2.0),
+    'min_neighbors': Setting(int, "Overlapping cascade hits needed to accept a face", 1, 20),
+    'min_face_size': Setting(int, "Smallest face the detectors look for (px)", 20, 400),
+    'detectors': Setting('names', "Detector backends to load, cheapest first (empty = haar_default)",
+                         choices=list(DETECTOR_BACKENDS)),
+    'match_threshold': Setting(float, "Correlation a face must exceed to match a student", 0.0, 1.0),
+    'template_sizes': Setting('sizes', "Template sizes stored per captured face (px)", 16, 256),
+    'templates_per_student': Setting(int, "Templates collected before registration stops", 1, 60),
+    'recognition_cooldown': Setting(float, "Seconds before the same student is recognized again", 0, 3600),
+    'target_fps': Setting(float, "Display rate the frame scheduler protects", 1, 120),
+    'max_latency': Setting(float, "Seconds from capture to on-screen result", 0.01, 5.0),
+    'gallery_dtype': Setting(str, "Gallery scoring copy: float32, float16 (half memory) or int8 (quarter)",
+                             choices=list(STORAGE_DTYPES)),
+    'scoring_threads': Setting(int, "Threads scoring gallery shards (0 = one per CPU core)", 0, 256),
+    'shift_tolerance': Setting(int, "Crop misalignment tolerated (px); FFT scoring when > 0", 0, 10),
+    'recognition_workers': Setting(int, "Recognition processes (0 = score in the video loop)", 0, 64),
+    'capture_profile': Setting(str, "Camera capture profile, or 'auto' to probe at startup",
+                               choices=['auto'] + list(CAPTURE_PROFILES)),
+}
+
+# Every profile sets every setting; 'balanced' keeps the system's long-standing detection and capture
+# (frontal Haar cascade, 1.3 / 5 / 50 px, the camera driver's own mode)
+PERFORMANCE_PROFILES = {
+    'low-power-kiosk': {
+        'scale_factor': 1.4,
+        'min_neighbors': 4,
+        'min_face_size': 60,
+        'detectors': ('haar_default',),
+        'match_threshold': 0.65,
+        'template_sizes': (50, 75),
+        'templates_per_student': 4,
+        'recognition_cooldown': 10.0,
+        'target_fps': 10.0,
+        'max_latency': 0.4,
+        'gallery_dtype': 'int8',
+        'scoring_threads': 1,
+        'shift_tolerance': 0,
+        'recognition_workers': 0,
+        'capture_profile': 'low-power',
+    },
+    'balanced': {
+        'scale_factor': 1.3,
+        'min_neighbors': 5,
+        'min_face_size': 50,
+        'detectors': ('haar_default',),
+        'match_threshold': 0.65,
+        'template_sizes': (50, 75, 100),
+        'templates_per_student': 6,
+        'recognition_cooldown': 10.0,
+        'target_fps': 15.0,
+        'max_latency': 0.25,
+        'gallery_dtype': 'float32',
+        'scoring_threads': 1,
+        'shift_tolerance': 0,
+        'recognition_workers': 0,
+        'capture_profile': 'default',
+    },
+    'high-accuracy-desk': {
+        'scale_factor': 1.1,
+        'min_neighbors': 6,
+        'min_face_size': 40,
+        'detectors': ('haar_default', 'haar_alt', 'haar_alt2', 'haar_profile', 'dlib_hog'),
+        'match_threshold': 0.7,
+        'template_sizes': (50, 75, 100),
+        'templates_per_student': 12,
+        'recognition_cooldown': 10.0,
+        'target_fps': 15.0,
+        'max_latency': 0.5,
+        'gallery_dtype': 'float32',
+        'scoring_threads': 0,
+        'shift_tolerance': 2,
+        'recognition_workers': 0,
+        'capture_profile': 'auto',
+    },
+}
+
+PROFILE_SUMMARIES = {
+    'low-power-kiosk': "Single-board kiosk: QVGA capture, coarse detection, int8 gallery",
+    'balanced': "Default desktop settings",
+    'high-accuracy-desk': "Staffed desk with a fast PC: fine detection, more templates, shift-tolerant matching",
+}
+
+
+def validate(values):
+    """List of problems with a complete set of setting values (empty when valid)"""
+    problems = []
+    for name, setting in SETTINGS.items():
+        if name not in values:
+            problems.append(f"{name}: missing")
+            continue
+        problem = setting.check(values[name])
+        if problem:
+            problems.append(f"{name}: {problem}")
+    if problems:
+        return problems
+
+    if values['templates_per_student'] < len(values['template_sizes']):
+        problems.append("templates_per_student: fewer than one capture's worth of template_sizes")
+    if 2 * values['shift_tolerance'] >= min(values['template_sizes']):
+        problems.append("shift_tolerance: must be under half the smallest template size")
+    if values['min_face_size'] < min(values['template_sizes']) // 2:
+        problems.append("min_face_size: faces this small would be upscaled over 2x into the templates")
+    return problems
+
+
+class AttendanceConfig:
+    """Resolved settings: a performance profile plus file, environment and command-line overrides
+
+    Settings are attributes (config.match_threshold); `sources` says where
+    each value came from. Overrides survive a profile switch, so a site's
+    file keeps applying whichever profile is picked in the GUI.
+    """
+
+    def __init__(self, profile=DEFAULT_PROFILE, overrides=None, origins=None, path=None):
+        if profile not in PERFORMANCE_PROFILES:
+            raise ConfigError(f"Unknown performance profile '{profile}' "
+                              f"(use {', '.join(PERFORMANCE_PROFILES)})")
+        self.profile = profile
+        self.overrides = dict(overrides or {})
+        self.origins = dict(origins or {})  # Setting -> 'file', 'env' or 'command line'
+        self.path = path  # Config file the overrides were read from, if any
+
+        values = dict(PERFORMANCE_PROFILES[profile])
+        values.update(self.overrides)
+        problems = validate(values)
+        if problems:
+            raise ConfigError(f"Invalid configuration (profile '{profile}'"
+                              f"{f', {path}' if path else ''}):\n  " + "\n  ".join(problems))
+        self.values = values
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    @property
+    def sources(self):
+        return {name: self.origins.get(name, f"profile {self.profile}") for name in SETTINGS}
+
+    def with_profile(self, profile):
+        """The same overrides on top of another profile (validated)"""
+        return AttendanceConfig(profile, self.overrides, self.origins, self.path)
+
+    def describe(self):
+        """One line per setting: name, value and where it came from"""
+        sources = self.sources
+        lines = [f"profile = {self.profile}"]
+        for name in SETTINGS:
+            value = self.values[name]
+            if isinstance(value, tuple):
+                value = ', '.join(str(item) for item in value) or '(default)'
+            lines.append(f"{name} = {value}  [{sources[name]}]")
+        return lines
+
+
+def _parse_values(raw, origin):
+    """Typed settings and the requested profile from one source's raw key/values"""
+    values, problems = {}, []
+    profile = raw.pop('profile', None)
+    for key, value in raw.items():
+        setting = SETTINGS.get(key)
+        if setting is None:
+            problems.append(f"{key}: unknown setting ({origin})")
+            continue
+        try:
+            values[key] = setting.parse(value)
+        except (TypeError, ValueError) as e:
+            problems.append(f"{key}: {e} ({origin})")
+    if problems:
+        raise ConfigError("Invalid configuration:\n  " + "\n  ".join(problems))
+    return values, profile
+
+
+def read_config_file(path):
+    """Raw key/values of the [attendance] section of a .toml or .ini file"""
+    if path.endswith('.toml'):
+        if tomllib is None:
+            raise ConfigError(f"Reading {path} needs Python 3.11+ (or use an .ini file)")
+        try:
+            with open(path, 'rb') as f:
+                data = tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            raise ConfigError(f"{path}: {e}") from None
+        section = data.get(CONFIG_SECTION, {})
+        if not isinstance(section, dict):
+            raise ConfigError(f"{path}: [{CONFIG_SECTION}] must be a table")
+        return dict(section)
+
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        with open(path, encoding='utf-8') as f:
+            parser.read_file(f)
+    except configparser.Error as e:
+        raise ConfigError(f"{path}: {e}") from None
+    return dict(parser[CONFIG_SECTION]) if parser.has_section(CONFIG_SECTION) else {}
+
+
+def find_config_file():
+    for path in CONFIG_PATHS:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_config(path=None, profile=None, overrides=None, environ=None):
+    """Validated settings: profile, then the config file, then ATTENDANCE_* variables, then `overrides`
+
+    The profile comes from the `profile` argument, ATTENDANCE_PROFILE or the
+    file's `profile` key, in that order. Without `path`, attendance.toml or
+    attendance.ini in the working directory is used if present. Unknown
+    settings in the file are errors; unknown ATTENDANCE_* variables are
+    reported and ignored.
+    """
+    environ = os.environ if environ is None else environ
+    if path is not None and not os.path.exists(path):
+        raise ConfigError(f"Config file not found: {path}")
+    path = path or find_config_file()
+
+    file_values, file_profile = _parse_values(read_config_file(path), path) if path else ({}, None)
+    env_raw = {}
+    for key, value in environ.items():
+        if not key.startswith(ENV_PREFIX):
+            continue
+        name = key[len(ENV_PREFIX):].lower()
+        if name != 'profile' and name not in SETTINGS:
+            # Other tools may share the prefix; only a bad value for a real setting stops startup
+            print(f"⚠️ Ignoring {key}: not an attendance setting")
+            continue
+        env_raw[name] = value
+    env_values, env_profile = _parse_values(env_raw, 'environment')
+
+    merged, origins = {}, {}
+    for values, origin in ((file_values, 'file'), (env_values, 'env'), (overrides or {}, 'command line')):
+        merged.update(values)
+        origins.update(dict.fromkeys(values, origin))
+    return AttendanceConfig(profile or env_profile or file_profile or DEFAULT_PROFILE, merged, origins, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show and validate the attendance configuration")
+    parser.add_argument('--config', metavar='FILE', help="TOML or INI file (default: attendance.toml/.ini)")
+    parser.add_argument('--performance-profile', choices=list(PERFORMANCE_PROFILES),
+                        help="Profile to resolve instead of the configured one")
+    parser.add_argument('--list', action='store_true', help="List the performance profiles and settings")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, summary in PROFILE_SUMMARIES.items():
+            print(f"⚙️ {name:<20}{summary}")
+        print()
+        for name, setting in SETTINGS.items():
+            print(f"   {name:<24}{setting.help}")
+        return
+
+    try:
+        config = load_config(args.config, args.performance_profile)
+    except ConfigError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ Configuration valid ({config.path or 'no config file'})")
+    for line in config.describe():
+        print(f"   {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Buffered CSV Attendance Writer
+# One row per real sighting, written in batches to a file per day
+
+import atexit
+import os
+import time
+from datetime import datetime
+
+
+class BufferedAttendanceWriter:
+    """Deduplicates recognitions per name and appends them to daily CSV files
+
+    A name is written again only after it has been out of view for `cooldown`
+    seconds. Rows are buffered and flushed every `flush_interval` seconds or
+    `max_buffer` rows, and on close/exit. Call tick() once per frame so the
+    interval also applies when nobody new is being recognized.
+    """
+
+    def __init__(self, base_path="attendance.csv", cooldown=30.0, flush_interval=5.0, max_buffer=50):
+        root, ext = os.path.splitext(base_path)
+        self.path_pattern = f"{root}_{{date}}{ext or '.csv'}"
+        self.cooldown = cooldown
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+
+        self.buffer = []
+        self.last_seen = {}
+        self.last_flush = time.monotonic()
+        self.rows_written = 0
+        self.flushes = 0
+        self.closed = False
+
+        atexit.register(self.close)
+
+    def path_for(self, date):
+        """Daily file for a YYYY-MM-DD date"""
+        return self.path_pattern.format(date=date)
+
+    def mark(self, name, when=None):
+        """Record a recognition; returns True if it started a new attendance event"""
+        now = time.monotonic()
+        previous = self.last_seen.get(name)
+        self.last_seen[name] = now
+
+        is_new = previous is None or now - previous >= self.cooldown
+        if is_new:
+            when = when or datetime.now()
+            self.buffer.append((name, when))
+
+        if len(self.buffer) >= self.max_buffer or now - self.last_flush >= self.flush_interval:
+            self.flush()
+        return is_new
+
+    def tick(self):
+        """Flush buffered rows once they are `flush_interval` old (cheap when nothing is due)"""
+        if self.buffer and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows, one open per daily file"""
+        self.last_flush = time.monotonic()
+        if not self.buffer:
+            return
+
+        rows_by_date = {}
+        for name, when in self.buffer:
+            rows_by_date.setdefault(when.strftime("%Y-%m-%d"), []).append(
+                f"{name},{when.strftime('%Y-%m-%d %H:%M:%S')}\n"
+            )
+
+        for date, lines in rows_by_date.items():
+            path = self.path_for(date)
+            new_file = not os.path.exists(path)
+            with open(path, "a") as f:
+                if new_file:
+                    f.write("Name,DateTime\n")
+                f.writelines(lines)
+
+        self.rows_written += len(self.buffer)
+        self.flushes += 1
+        self.buffer = []
+
+        # Forget names long gone so the map does not grow all day
+        cutoff = self.last_flush - self.cooldown
+        self.last_seen = {name: seen for name, seen in self.last_seen.items() if seen >= cutoff}
+
+    def close(self):
+        """Flush everything that is still buffered"""
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,186 @@
+# Database Access Layer for the Smart Attendance System
+# Per-thread WAL read connections plus a single writer thread fed by a request queue
+
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from attendance_partitions import PARTITION_DIR, AttendancePartitions
+
+
+DB_PATH = 'smart_attendance.db'
+BUSY_TIMEOUT = 5.0       # seconds SQLite waits on a lock before raising
+WRITE_RETRIES = 8        # extra attempts for writes that still hit a lock
+RETRY_DELAY = 0.05       # seconds before the first retry, doubled per attempt
+RETRY_MAX_DELAY = 2.0    # cap on a single backoff
+STATEMENT_CACHE = 256    # prepared statements kept per connection
+
+
+def is_lock_error(error):
+    """True for transient 'database is locked/busy' errors"""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
+
+class DatabaseManager:
+    """Thread-safe access to the attendance database
+
+    Each thread gets its own long-lived connection, so its prepared statements
+    stay cached and WAL lets it read while a write is in progress. All writes
+    run on one writer thread, in submission order. Writes that still hit a
+    lock held by another process after the busy timeout are retried with
+    jittered exponential backoff; `stats()` reports the contention seen.
+
+    WAL needs every process on the same host. For a database on a network
+    share pass journal_mode='DELETE'.
+    """
+
+    def __init__(self, path=DB_PATH, busy_timeout=BUSY_TIMEOUT, retries=WRITE_RETRIES, journal_mode='WAL',
+                 log_retries=True, partition_dir=PARTITION_DIR):
+        self.path = path
+        self.partition_dir = partition_dir
+        self.busy_timeout = busy_timeout
+        self.retries = retries
+        self.journal_mode = journal_mode
+        self.log_retries = log_retries
+        self.metrics = {
+            'writes': 0,          # completed write requests
+            'retried_writes': 0,  # writes that needed at least one retry
+            'retries': 0,         # total retry attempts
+            'failed_writes': 0,   # writes that gave up on a lock
+            'backoff_seconds': 0.0,
+            'max_write_ms': 0.0,  # slowest write including waits
+        }
+
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._requests = queue.Queue()
+
+        self._writer = threading.Thread(target=self._writer_loop, name="attendance-db-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            uri=True,  # partitions are attached via file: URIs
+            check_same_thread=False,  # only so close() can run from any thread
+            cached_statements=STATEMENT_CACHE,
+        )
+        try:
+            # Switching journal mode needs a brief lock, so this can hit a busy database too
+            conn.execute(f'PRAGMA journal_mode={self.journal_mode}')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        except sqlite3.Error:
+            conn.close()
+            raise
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def connection(self):
+        """The calling thread's connection (created on first use)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            self._local.partitions = AttendancePartitions(conn, self.partition_dir)
+        return conn
+
+    def partitions(self):
+        """Partition router bound to the calling thread's connection"""
+        self.connection()
+        return self._local.partitions
+
+    def release(self):
+        """Close the calling thread's connection (for short-lived worker threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        with self._lock:
+            self._connections.remove(conn)
+        conn.close()
+        self._local.conn = None
+        self._local.partitions = None
+
+    def submit(self, fn, *args):
+        """Queue fn(conn, *args) on the writer thread and return a Future"""
+        future = Future()
+        self._requests.put((future, fn, args))
+        return future
+
+    def write(self, fn, *args):
+        """Run fn(conn, *args) on the writer thread and wait for its result"""
+        return self.submit(fn, *args).result()
+
+    def _writer_loop(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                break
+
+            future, fn, args = request
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._run_write(fn, args))
+            except BaseException as e:
+                future.set_exception(e)
+
+        self.release()
+
+    def _run_write(self, fn, args):
+        """Run one write request in a transaction, retrying transient lock errors"""
+        metrics = self.metrics
+        start = time.perf_counter()
+        attempt = 0
+        conn = None
+        while True:
+            try:
+                conn = self.connection()
+                result = fn(conn, *args)
+                if conn.in_transaction:
+                    conn.commit()
+                break
+            except Exception as e:
+                if conn is not None and conn.in_transaction:
+                    conn.rollback()
+                if not is_lock_error(e):
+                    raise
+                if attempt >= self.retries:
+                    metrics['failed_writes'] += 1
+                    raise
+                attempt += 1
+                metrics['retries'] += 1
+                if attempt == 1:
+                    metrics['retried_writes'] += 1
+                # Bounded exponential backoff; jitter keeps competing kiosks from retrying in lockstep
+                delay = min(RETRY_MAX_DELAY, RETRY_DELAY * 2 ** (attempt - 1))
+                delay = random.uniform(delay / 2, delay)
+                metrics['backoff_seconds'] += delay
+                if self.log_retries:
+                    print(f"⚠️ Database busy, retrying write in {delay * 1000:.0f} ms ({attempt}/{self.retries})")
+                time.sleep(delay)
+
+        metrics['writes'] += 1
+        metrics['max_write_ms'] = max(metrics['max_write_ms'], (time.perf_counter() - start) * 1000)
+        return result
+
+    def stats(self):
+        """Contention metrics of this manager's writer"""
+        return dict(self.metrics, queued=self._requests.qsize())
+
+    def close(self):
+        """Finish queued writes and close every connection"""
+        self._requests.put(None)
+        self._writer.join(timeout=self.busy_timeout * (self.retries + 1))
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
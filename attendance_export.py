@@ -0,0 +1,202 @@
+# Attendance Export for the Smart Attendance System
+# Streams the attendance table to CSV / Parquet / Feather files in bounded memory
+
+import argparse
+import csv
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from attendance_partitions import AttendancePartitions
+
+# Columnar formats are optional - they need pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+EXPORT_DIR = 'attendance_records'
+EXPORT_COLUMNS = ("student_id", "name", "date", "time", "status")
+CHUNK_SIZE = 10000
+
+
+def available_formats():
+    """Export formats supported by the installed libraries"""
+    formats = ['csv']
+    if pa is not None:
+        formats += ['parquet', 'feather']
+    return formats
+
+
+class AttendanceExporter:
+    """Streams attendance rows through a chunked cursor into export files"""
+
+    def __init__(self, conn, output_dir=EXPORT_DIR, chunk_size=CHUNK_SIZE, partitions=None):
+        self.conn = conn
+        self.output_dir = output_dir
+        self.chunk_size = chunk_size
+        self.partitions = partitions
+
+    def _sources(self, start_date=None, end_date=None):
+        """Attendance tables to read, oldest partition first"""
+        if self.partitions is None:
+            yield 'attendance'
+        else:
+            yield from self.partitions.iter_sources(start_date, end_date)
+
+    def build_query(self, source, start_date=None, end_date=None, student_ids=None):
+        """Build the filtered SELECT over one attendance table"""
+        conditions = []
+        params = []
+
+        if start_date:
+            conditions.append("date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("date <= ?")
+            params.append(end_date)
+        if student_ids:
+            placeholders = ", ".join("?" for _ in student_ids)
+            conditions.append(f"student_id IN ({placeholders})")
+            params.extend(student_ids)
+
+        sql = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM {source}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY date, time"
+        return sql, params
+
+    def iter_chunks(self, start_date=None, end_date=None, student_ids=None):
+        """Yield lists of at most chunk_size rows"""
+        for source in self._sources(start_date, end_date):
+            sql, params = self.build_query(source, start_date, end_date, student_ids)
+
+            # Own cursor so the export never disturbs the app's shared cursor
+            cursor = self.conn.cursor()
+            cursor.arraysize = self.chunk_size
+            try:
+                cursor.execute(sql, params)
+                while True:
+                    rows = cursor.fetchmany()
+                    if not rows:
+                        break
+                    yield rows
+            finally:
+                cursor.close()
+
+    def default_path(self, fmt, start_date=None, end_date=None):
+        """Build an export file name inside attendance_records/"""
+        span = f"{start_date or 'start'}_to_{end_date or 'end'}"
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return os.path.join(self.output_dir, f"attendance_{span}_{stamp}.{fmt}")
+
+    def export(self, fmt='csv', start_date=None, end_date=None, student_ids=None, path=None):
+        """Export matching rows and return throughput stats"""
+        if fmt not in available_formats():
+            raise ValueError(f"Unsupported export format '{fmt}' (available: {', '.join(available_formats())})")
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = path or self.default_path(fmt, start_date, end_date)
+        temp_path = path + '.part'
+
+        writer = {
+            'csv': self._write_csv,
+            'parquet': self._write_parquet,
+            'feather': self._write_feather,
+        }[fmt]
+
+        start = time.perf_counter()
+        chunks = self.iter_chunks(start_date, end_date, student_ids)
+        try:
+            rows = writer(temp_path, chunks)
+            # Only expose complete files
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        elapsed = time.perf_counter() - start
+
+        stats = {
+            'path': path,
+            'format': fmt,
+            'rows': rows,
+            'bytes': os.path.getsize(path),
+            'seconds': elapsed,
+            'rows_per_sec': rows / elapsed if elapsed > 0 else 0.0,
+        }
+        print(f"✅ Exported {rows} rows to {path} "
+              f"in {elapsed:.2f}s ({stats['rows_per_sec']:.0f} rows/s)")
+        return stats
+
+    def _write_csv(self, path, chunks):
+        """Write chunks to a CSV file"""
+        rows = 0
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_COLUMNS)
+            for chunk in chunks:
+                writer.writerows(chunk)
+                rows += len(chunk)
+        return rows
+
+    def _arrow_schema(self):
+        return pa.schema([(column, pa.string()) for column in EXPORT_COLUMNS])
+
+    def _to_batch(self, schema, chunk):
+        """Transpose a chunk of row tuples into an Arrow record batch"""
+        columns = list(zip(*chunk))
+        return pa.RecordBatch.from_arrays(
+            [pa.array(column, type=pa.string()) for column in columns], schema=schema
+        )
+
+    def _write_parquet(self, path, chunks):
+        """Write chunks to Parquet, one row group per chunk"""
+        schema = self._arrow_schema()
+        rows = 0
+        with pq.ParquetWriter(path, schema, compression='snappy') as writer:
+            for chunk in chunks:
+                writer.write_batch(self._to_batch(schema, chunk))
+                rows += len(chunk)
+        return rows
+
+    def _write_feather(self, path, chunks):
+        """Write chunks to Feather (Arrow IPC file), one batch per chunk"""
+        schema = self._arrow_schema()
+        rows = 0
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                for chunk in chunks:
+                    writer.write_batch(self._to_batch(schema, chunk))
+                    rows += len(chunk)
+        return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export attendance records")
+    parser.add_argument('--db', default='smart_attendance.db', help="Attendance database")
+    parser.add_argument('--format', default='csv', choices=available_formats(),
+                        help="Output format" + ("" if pa is not None else " (parquet and feather need pyarrow)"))
+    parser.add_argument('--from', dest='start_date', help="First date (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='end_date', help="Last date (YYYY-MM-DD)")
+    parser.add_argument('--student', action='append', dest='student_ids',
+                        help="Only export this student ID (repeatable)")
+    parser.add_argument('--output', help="Output file path")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db, uri=True)
+    try:
+        exporter = AttendanceExporter(conn, chunk_size=args.chunk_size,
+                                      partitions=AttendancePartitions(conn))
+        exporter.export(args.format, args.start_date, args.end_date, args.student_ids, args.output)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
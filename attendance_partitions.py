@@ -0,0 +1,326 @@
+# Time-Partitioned Attendance Storage for the Smart Attendance System
+# Each month (or term) of marks lives in its own SQLite file, attached on demand
+
+import argparse
+import calendar
+import os
+import re
+import shutil
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.request import pathname2url
+
+
+PARTITION_DIR = 'attendance_partitions'
+ARCHIVE_DIR = 'attendance_archive'
+PARTITION_PATTERN = re.compile(r'^attendance_(\d{4}-(?:\d{2}|T[123]))\.db$')
+
+# Terms used by the 'term' granularity: (first month, last month)
+TERMS = {'T1': (1, 4), 'T2': (5, 8), 'T3': (9, 12)}
+
+# SQLite allows 10 attached databases by default; 'active' and 'part' may hold two
+MAX_WRITE_PARTITIONS = 8
+
+
+def partition_key(date, granularity='month'):
+    """Partition key for a YYYY-MM-DD date"""
+    if granularity == 'month':
+        return date[:7]
+    if granularity == 'term':
+        month = int(date[5:7])
+        for term, (first, last) in TERMS.items():
+            if first <= month <= last:
+                return f"{date[:4]}-{term}"
+    raise ValueError(f"Unknown partition granularity '{granularity}'")
+
+
+def key_range(key):
+    """First and last date (YYYY-MM-DD) covered by a partition key"""
+    year, part = key.split('-')
+    if part.startswith('T'):
+        first_month, last_month = TERMS[part]
+    else:
+        first_month = last_month = int(part)
+    last_day = calendar.monthrange(int(year), last_month)[1]
+    return f"{year}-{first_month:02d}-01", f"{year}-{last_month:02d}-{last_day:02d}"
+
+
+class AttendancePartitions:
+    """Routes attendance writes to the active partition and spans reads across all of them
+
+    ATTACH and DETACH are impossible inside a transaction, and committing on
+    the caller's behalf would split its transaction, so every method that
+    attaches raises RuntimeError when the connection has one open. Attach
+    first, then write: active_table() before the INSERT, or writing() for a
+    write that spans several partitions.
+    """
+
+    def __init__(self, conn, partition_dir=PARTITION_DIR, archive_dir=ARCHIVE_DIR, granularity='month'):
+        # conn must be opened with uri=True so partitions can be attached read-only
+        self.conn = conn
+        self.partition_dir = partition_dir
+        self.archive_dir = archive_dir
+        self.granularity = granularity
+        self.active_key = None
+        os.makedirs(self.partition_dir, exist_ok=True)
+
+    def partition_path(self, key, archived=False):
+        directory = self.archive_dir if archived else self.partition_dir
+        return os.path.join(directory, f"attendance_{key}.db")
+
+    def keys(self, include_archived=False):
+        """Existing partition keys in chronological order"""
+        directories = [(self.partition_dir, False)]
+        if include_archived:
+            directories.append((self.archive_dir, True))
+
+        found = {}
+        for directory, archived in directories:
+            if not os.path.isdir(directory):
+                continue
+            for filename in os.listdir(directory):
+                match = PARTITION_PATTERN.match(filename)
+                if match:
+                    found.setdefault(match.group(1), archived)
+
+        # Make sure the active partition is listed even before its first write
+        if self.active_key:
+            found.setdefault(self.active_key, False)
+
+        return sorted(found.items(), key=lambda item: key_range(item[0]))
+
+    def _uri(self, path, mode):
+        return f"file:{pathname2url(os.path.abspath(path))}?mode={mode}"
+
+    def _require_no_transaction(self):
+        if self.conn.in_transaction:
+            raise RuntimeError("Attendance partitions must be attached before a transaction starts; "
+                               "commit or roll back first")
+
+    def _create_schema(self, schema):
+        self.conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {schema}.attendance (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                student_id TEXT,
+                name TEXT,
+                date TEXT,
+                time TEXT,
+                status TEXT DEFAULT 'Present',
+                UNIQUE(student_id, date)
+            )
+        ''')
+        self.conn.execute(f'''
+            CREATE INDEX IF NOT EXISTS {schema}.idx_attendance_date
+            ON attendance (date, time)
+        ''')
+
+    def active_table(self, date=None):
+        """Attach the partition for date (default today) as 'active' and return its table"""
+        date = date or datetime.now().strftime('%Y-%m-%d')
+        key = partition_key(date, self.granularity)
+        if key != self.active_key:
+            self._require_no_transaction()
+            if self.active_key is not None:
+                self.conn.execute('DETACH DATABASE active')
+            self.conn.execute('ATTACH DATABASE ? AS active',
+                              (self._uri(self.partition_path(key), 'rwc'),))
+            # Live partition takes concurrent readers alongside the writer
+            self.conn.execute('PRAGMA active.journal_mode=WAL')
+            self._create_schema('active')
+            self.conn.commit()
+            self.active_key = key
+        return 'active.attendance'
+
+    def iter_sources(self, start_date=None, end_date=None, newest_first=False,
+                     writable=False, include_archived=False):
+        """Yield a qualified attendance table for each partition overlapping the range
+
+        Partitions are attached one at a time as 'part' (read-only unless
+        writable), so no transaction may be open while iterating; writes made
+        to a writable source are committed before it is detached.
+        """
+        for _, source in self.iter_keyed_sources(start_date, end_date, newest_first,
+                                                 writable, include_archived):
+            yield source
+
+    def iter_keyed_sources(self, start_date=None, end_date=None, newest_first=False,
+                           writable=False, include_archived=False):
+        """Like iter_sources, yielding (partition key, table) pairs"""
+        keys = self.keys(include_archived)
+        if newest_first:
+            keys.reverse()
+
+        for key, archived in keys:
+            first, last = key_range(key)
+            if (start_date and last < start_date) or (end_date and first > end_date):
+                continue
+
+            if key == self.active_key and not archived:
+                yield key, 'active.attendance'
+                continue
+
+            path = self.partition_path(key, archived)
+            if not os.path.exists(path):
+                continue
+            self._require_no_transaction()
+            self.conn.execute('ATTACH DATABASE ? AS part',
+                              (self._uri(path, 'rw' if writable else 'ro'),))
+            try:
+                yield key, 'part.attendance'
+            finally:
+                if writable and self.conn.in_transaction:
+                    self.conn.commit()
+                self.conn.execute('DETACH DATABASE part')
+
+    @contextmanager
+    def writing(self, dates):
+        """Attach the partitions of `dates` and run the block as one transaction
+
+        Yields {partition key: table}. Everything is attached up front, so the
+        block's writes (to partitions and to main) commit together on success
+        and roll back together on error.
+        """
+        keys = sorted({partition_key(date, self.granularity) for date in dates}, key=key_range)
+        with self.writing_keys([(key, False) for key in keys]) as tables:
+            yield tables
+
+    @contextmanager
+    def writing_keys(self, keys):
+        """Like writing(), for (partition key, archived) pairs as returned by keys()"""
+        self._require_no_transaction()
+        if len(keys) > MAX_WRITE_PARTITIONS:
+            raise ValueError(f"A write may span at most {MAX_WRITE_PARTITIONS} partitions, got {len(keys)}")
+
+        tables = {}
+        attached = []
+        try:
+            for key, archived in keys:
+                if key == self.active_key and not archived:
+                    tables[key] = 'active.attendance'
+                    continue
+                schema = f"write{len(attached)}"
+                self.conn.execute(f'ATTACH DATABASE ? AS {schema}',
+                                  (self._uri(self.partition_path(key, archived), 'rwc'),))
+                attached.append(schema)
+                self.conn.execute(f'PRAGMA {schema}.journal_mode=WAL')
+                self._create_schema(schema)
+                tables[key] = f"{schema}.attendance"
+            try:
+                yield tables
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+        finally:
+            for schema in attached:
+                self.conn.execute(f'DETACH DATABASE {schema}')
+
+    def student_keys(self, student_id, include_archived=False):
+        """(partition key, archived) pairs of the partitions holding a student's rows"""
+        keys = []
+        archived = dict(self.keys(include_archived))
+        for key, source in self.iter_keyed_sources(include_archived=include_archived):
+            cursor = self.conn.execute(f'SELECT 1 FROM {source} WHERE student_id = ? LIMIT 1', (student_id,))
+            if cursor.fetchone() is not None:
+                keys.append((key, archived[key]))
+            cursor.close()
+        return keys
+
+    def recent(self, limit, columns="student_id, name, date, time, status"):
+        """Newest attendance rows across partitions"""
+        records = []
+        for source in self.iter_sources(newest_first=True):
+            cursor = self.conn.execute(f'''
+                SELECT {columns} FROM {source}
+                ORDER BY date DESC, time DESC LIMIT ?
+            ''', (limit - len(records),))
+            records.extend(cursor.fetchall())
+            cursor.close()
+            if len(records) >= limit:
+                break
+        return records
+
+    def has_rows(self):
+        """True if any partition holds attendance rows"""
+        for source in self.iter_sources(include_archived=True):
+            cursor = self.conn.execute(f'SELECT 1 FROM {source} LIMIT 1')
+            found = cursor.fetchone() is not None
+            cursor.close()
+            if found:
+                return True
+        return False
+
+    def migrate_legacy(self):
+        """Move rows from the single main.attendance table into partitions"""
+        cursor = self.conn.execute('SELECT DISTINCT substr(date, 1, 7) FROM main.attendance')
+        months = [row[0] for row in cursor.fetchall()]
+        if not months:
+            return 0
+
+        moved = 0
+        keys = sorted({partition_key(f"{month}-01", self.granularity) for month in months})
+        for key in keys:
+            first, last = key_range(key)
+            self._require_no_transaction()
+            self.conn.execute('ATTACH DATABASE ? AS part',
+                              (self._uri(self.partition_path(key), 'rwc'),))
+            try:
+                self._create_schema('part')
+                cursor = self.conn.execute('''
+                    INSERT OR IGNORE INTO part.attendance (student_id, name, date, time, status)
+                    SELECT student_id, name, date, time, status FROM main.attendance
+                    WHERE date BETWEEN ? AND ? ORDER BY date, time
+                ''', (first, last))
+                moved += cursor.rowcount
+                self.conn.execute('DELETE FROM main.attendance WHERE date BETWEEN ? AND ?', (first, last))
+                self.conn.commit()
+            finally:
+                self.conn.execute('DETACH DATABASE part')
+
+        print(f"✅ Moved {moved} legacy attendance rows into {len(keys)} partition(s)")
+        return moved
+
+    def archive(self, key):
+        """Archive a finished partition by moving its file out of the live set"""
+        if key == self.active_key:
+            raise ValueError(f"Partition {key} is active and cannot be archived")
+
+        path = self.partition_path(key)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No partition file for {key}")
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        destination = self.partition_path(key, archived=True)
+        shutil.move(path, destination)
+        print(f"📦 Archived partition {key} to {destination}")
+        return destination
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage attendance partitions")
+    parser.add_argument('--db', default='smart_attendance.db', help="Attendance database")
+    parser.add_argument('--granularity', default='month', choices=['month', 'term'])
+    parser.add_argument('--migrate', action='store_true', help="Move legacy rows into partitions")
+    parser.add_argument('--archive', metavar='KEY', help="Archive a partition, e.g. 2025-03 or 2025-T1")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db, uri=True)
+    try:
+        partitions = AttendancePartitions(conn, granularity=args.granularity)
+        if args.migrate:
+            partitions.migrate_legacy()
+        if args.archive:
+            partitions.archive(args.archive)
+
+        for key, archived in partitions.keys(include_archived=True):
+            path = partitions.partition_path(key, archived)
+            size = os.path.getsize(path) / 1024 if os.path.exists(path) else 0
+            state = "archived" if archived else "live"
+            print(f"  {key:<8} {state:<9} {size:10.1f} KB  {path}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+# Attendance Aggregation Server and Kiosk Sync Agent
+# Kiosks push new marks in compressed, idempotent batches; the server stores them with the same dedupe rules
+
+import argparse
+import json
+import os
+import random
+import socket
+import sqlite3
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import URLError
+from urllib.parse import parse_qs, urlparse
+from urllib.request import Request, urlopen
+
+from attendance_db import DatabaseManager
+from attendance_partitions import PARTITION_DIR, AttendancePartitions, partition_key
+
+
+SERVER_DB_PATH = 'aggregate_attendance.db'
+SERVER_PARTITION_DIR = 'aggregate_partitions'
+SYNC_STATE_PATH = 'sync_state.json'
+DEFAULT_PORT = 8765
+BATCH_SIZE = 500
+MAX_BACKOFF = 300  # seconds between attempts while the server is unreachable
+
+
+def encode_payload(payload):
+    """zlib-compressed compact JSON and its uncompressed size"""
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return zlib.compress(raw), len(raw)
+
+
+def decode_payload(body):
+    return json.loads(zlib.decompress(body).decode('utf-8'))
+
+
+class AggregationServer:
+    """Institution-wide mark store fed by kiosk batches
+
+    Marks land in date partitions with UNIQUE(student_id, date), exactly like a
+    kiosk, so a student seen at two kiosks on one day is stored once. Every
+    batch ID is remembered; a re-sent batch is answered from that record. A
+    batch's marks, its batch record and the kiosk's high-water mark commit in
+    one transaction, however many partitions the batch touches.
+    """
+
+    def __init__(self, db_path=SERVER_DB_PATH, partition_dir=SERVER_PARTITION_DIR):
+        self.db = DatabaseManager(db_path, partition_dir=partition_dir)
+        self.db.write(self.prepare_storage)
+
+    def prepare_storage(self, conn):
+        """Batch log and per-kiosk, per-partition high-water marks (writer thread)"""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sync_batches (
+                batch_id TEXT PRIMARY KEY,
+                kiosk_id TEXT NOT NULL,
+                received_at TEXT NOT NULL,
+                marks INTEGER NOT NULL,
+                accepted INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sync_high_water (
+                kiosk_id TEXT NOT NULL,
+                partition_key TEXT NOT NULL,
+                last_id INTEGER NOT NULL,
+                last_sync TEXT NOT NULL,
+                PRIMARY KEY (kiosk_id, partition_key)
+            )
+        ''')
+
+    def ingest(self, conn, kiosk_id, batch_id, batch_key, marks):
+        """Store one batch of [id, student_id, name, date, time, status] rows (writer thread)"""
+        previous = conn.execute('SELECT marks, accepted FROM sync_batches WHERE batch_id = ?',
+                                (batch_id,)).fetchone()
+        if previous:
+            return {'marks': previous[0], 'accepted': previous[1], 'replayed': True}
+
+        # Kiosk partitions are monthly; split anyway in case the server uses another granularity
+        by_table = {}
+        partitions = self.db.partitions()
+        for _, student_id, name, date, time_str, status in marks:
+            by_table.setdefault(partition_key(date, partitions.granularity), []).append(
+                (student_id, name, date, time_str, status))
+
+        accepted = 0
+        now = time.strftime('%Y-%m-%d %H:%M:%S')
+        # Partitions are attached before the transaction starts, so nothing commits halfway
+        with partitions.writing([rows[0][2] for rows in by_table.values()]) as tables:
+            for key, rows in by_table.items():
+                before = conn.total_changes
+                conn.executemany(f'''
+                    INSERT OR IGNORE INTO {tables[key]} (student_id, name, date, time, status)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', rows)
+                accepted += conn.total_changes - before
+
+            conn.execute('INSERT INTO sync_batches VALUES (?, ?, ?, ?, ?)',
+                         (batch_id, kiosk_id, now, len(marks), accepted))
+            if marks:
+                conn.execute('''
+                    INSERT INTO sync_high_water (kiosk_id, partition_key, last_id, last_sync)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (kiosk_id, partition_key) DO UPDATE SET
+                        last_id = MAX(last_id, excluded.last_id),
+                        last_sync = excluded.last_sync
+                ''', (kiosk_id, batch_key, max(mark[0] for mark in marks), now))
+        return {'marks': len(marks), 'accepted': accepted, 'replayed': False}
+
+    def high_water(self, kiosk_id):
+        """{'partitions': {kiosk partition key: last id}} the server holds from a kiosk, or None
+
+        Runs on a short-lived request thread, so its connection is released after use.
+        """
+        try:
+            rows = self.db.connection().execute(
+                'SELECT partition_key, last_id FROM sync_high_water WHERE kiosk_id = ?', (kiosk_id,)).fetchall()
+        finally:
+            self.db.release()
+        return {'partitions': dict(rows)} if rows else None
+
+    def status(self):
+        try:
+            conn = self.db.connection()
+            rows = conn.execute('''
+                SELECT kiosk_id, partition_key, last_id, last_sync FROM sync_high_water
+                ORDER BY kiosk_id, partition_key
+            ''').fetchall()
+            batches, received, accepted = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(marks), 0), COALESCE(SUM(accepted), 0) FROM sync_batches').fetchone()
+        finally:
+            self.db.release()
+
+        kiosks = {}
+        for kiosk_id, key, last_id, last_sync in rows:
+            kiosk = kiosks.setdefault(kiosk_id, {'kiosk_id': kiosk_id, 'partitions': {}, 'last_sync': last_sync})
+            kiosk['partitions'][key] = last_id
+            kiosk['last_sync'] = max(kiosk['last_sync'], last_sync)
+        return {
+            'batches': batches,
+            'marks_received': received,
+            'marks_accepted': accepted,
+            'kiosks': list(kiosks.values()),
+        }
+
+    def serve(self, host='0.0.0.0', port=DEFAULT_PORT):
+        """Blocking HTTP server loop"""
+        httpd = self.make_http_server(host, port)
+        print(f"🌐 Aggregation server on http://{host}:{httpd.server_address[1]}")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+            self.db.close()
+
+    def make_http_server(self, host='0.0.0.0', port=DEFAULT_PORT):
+        httpd = ThreadingHTTPServer((host, port), SyncRequestHandler)
+        httpd.aggregator = self
+        return httpd
+
+
+class SyncRequestHandler(BaseHTTPRequestHandler):
+    """POST /marks (zlib-compressed JSON batch), GET /high-water?kiosk=ID, GET /status"""
+
+    server_version = 'AttendanceSync/1.0'
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != '/marks':
+            self._send_json(404, {'error': 'not found'})
+            return
+        batch_id = self.headers.get('Idempotency-Key')
+        if not batch_id:
+            self._send_json(400, {'error': 'missing Idempotency-Key'})
+            return
+        try:
+            payload = decode_payload(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            result = self.server.aggregator.db.write(
+                self.server.aggregator.ingest, payload['kiosk_id'], batch_id,
+                payload['partition_key'], payload['marks'])
+        except (ValueError, KeyError, zlib.error) as e:
+            self._send_json(400, {'error': f'bad batch: {e}'})
+            return
+        except sqlite3.Error as e:
+            self._send_json(503, {'error': f'database: {e}'})
+            return
+        self._send_json(200, result)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/status':
+            self._send_json(200, self.server.aggregator.status())
+        elif url.path == '/high-water':
+            kiosk_id = parse_qs(url.query).get('kiosk', [''])[0]
+            self._send_json(200, {'high_water': self.server.aggregator.high_water(kiosk_id)})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def log_message(self, format, *args):
+        pass  # one line per batch would drown the console
+
+
+class SyncAgent:
+    """Pushes a kiosk's new marks to the aggregation server
+
+    Progress is a row id high-water mark per partition, saved after every
+    acknowledged batch; every partition is scanned for rows above its own mark,
+    so a late write to an older month is still sent. Batch IDs derive from the
+    rows they carry, so a batch re-sent after a crash is recognized by the
+    server instead of counted twice.
+    """
+
+    def __init__(self, server_url, kiosk_id=None, db_path='smart_attendance.db',
+                 state_path=SYNC_STATE_PATH, batch_size=BATCH_SIZE, timeout=10.0, partition_dir=PARTITION_DIR):
+        self.server_url = server_url.rstrip('/')
+        self.kiosk_id = kiosk_id or socket.gethostname()
+        self.db_path = db_path
+        self.partition_dir = partition_dir
+        self.state_path = state_path
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.state = self.load_state()
+
+    def load_state(self):
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                return json.load(f)
+        return None
+
+    def save_state(self):
+        temp_path = self.state_path + '.part'
+        with open(temp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(temp_path, self.state_path)
+
+    def _request(self, path, body=None, headers=None):
+        request = Request(self.server_url + path, data=body, headers=headers or {},
+                          method='POST' if body is not None else 'GET')
+        with urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def resume_point(self):
+        """{partition key: last id} sent, or the server's record of this kiosk if local state was lost"""
+        if self.state is None:
+            self.state = self._request(f'/high-water?kiosk={self.kiosk_id}')['high_water'] \
+                or {'partitions': {}}
+            self.save_state()
+        return self.state['partitions']
+
+    def pending_batches(self, conn):
+        """(partition key, rows) batches above each partition's high-water mark"""
+        high_water = self.resume_point()
+        partitions = AttendancePartitions(conn, self.partition_dir)
+        for key, source in partitions.iter_keyed_sources(include_archived=True):
+            last_id = high_water.get(key, 0)
+            while True:
+                rows = conn.execute(f'''
+                    SELECT id, student_id, name, date, time, status FROM {source}
+                    WHERE id > ? ORDER BY id LIMIT ?
+                ''', (last_id, self.batch_size)).fetchall()
+                if not rows:
+                    break
+                yield key, rows
+                last_id = rows[-1][0]
+
+    def push(self, key, rows):
+        """Send one batch; returns (server result, compressed bytes, uncompressed bytes)"""
+        body, raw_size = encode_payload({'kiosk_id': self.kiosk_id, 'partition_key': key, 'marks': rows})
+        batch_id = f"{self.kiosk_id}:{key}:{rows[0][0]}-{rows[-1][0]}"
+        result = self._request('/marks', body, {
+            'Content-Type': 'application/json',
+            'Content-Encoding': 'deflate',
+            'Idempotency-Key': batch_id,
+        })
+        return result, len(body), raw_size
+
+    def sync_once(self):
+        """Push everything new; returns transfer statistics"""
+        stats = {'batches': 0, 'marks': 0, 'accepted': 0, 'bytes': 0, 'raw_bytes': 0, 'seconds': 0.0}
+        start = time.perf_counter()
+        conn = sqlite3.connect(self.db_path, uri=True, timeout=5.0)
+        try:
+            for key, rows in self.pending_batches(conn):
+                result, sent, raw_size = self.push(key, rows)
+                self.state['partitions'][key] = rows[-1][0]
+                self.save_state()
+                stats['batches'] += 1
+                stats['marks'] += len(rows)
+                stats['accepted'] += result['accepted']
+                stats['bytes'] += sent
+                stats['raw_bytes'] += raw_size
+        finally:
+            conn.close()
+        stats['seconds'] = time.perf_counter() - start
+        return stats
+
+    def run(self, interval=30.0):
+        """Sync forever, backing off while the server is unreachable or the kiosk database is busy"""
+        delay = interval
+        while True:
+            try:
+                stats = self.sync_once()
+                if stats['marks']:
+                    print(f"🔄 Synced {stats['marks']} marks ({stats['accepted']} new on server) in "
+                          f"{stats['batches']} batch(es), {stats['bytes']} bytes, {stats['seconds']:.2f}s")
+                delay = interval
+            except (URLError, OSError, sqlite3.Error) as e:
+                delay = min(MAX_BACKOFF, delay * 2)
+                print(f"⚠️ Sync failed ({e}), retrying in {delay:.0f}s")
+            time.sleep(random.uniform(delay / 2, delay))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Attendance aggregation server and kiosk sync agent")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    server_parser = subparsers.add_parser('server', help="Run the aggregation server")
+    server_parser.add_argument('--host', default='0.0.0.0')
+    server_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    server_parser.add_argument('--db', default=SERVER_DB_PATH)
+    server_parser.add_argument('--partition-dir', default=SERVER_PARTITION_DIR)
+
+    agent_parser = subparsers.add_parser('agent', help="Push this kiosk's marks to a server")
+    agent_parser.add_argument('server_url', help="e.g. http://registrar:8765")
+    agent_parser.add_argument('--kiosk-id', help="Defaults to the host name")
+    agent_parser.add_argument('--db', default='smart_attendance.db')
+    agent_parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    agent_parser.add_argument('--interval', type=float, default=30.0, help="Seconds between syncs")
+    agent_parser.add_argument('--once', action='store_true', help="Sync once and exit")
+
+    args = parser.parse_args()
+    if args.command == 'server':
+        AggregationServer(args.db, args.partition_dir).serve(args.host, args.port)
+    else:
+        agent = SyncAgent(args.server_url, args.kiosk_id, args.db, batch_size=args.batch_size)
+        if args.once:
+            stats = agent.sync_once()
+            print(f"🔄 Synced {stats['marks']} marks ({stats['accepted']} new on server) in "
+                  f"{stats['batches']} batch(es), {stats['bytes']} bytes, {stats['seconds']:.2f}s")
+        else:
+            agent.run(args.interval)
+
+
+if __name__ == "__main__":
+    main()
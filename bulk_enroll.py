@@ -0,0 +1,222 @@
+# Bulk Enrollment for the Smart Attendance System
+# Registers students from a CSV manifest of ID photos, detecting faces in a process pool
+
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import cv2
+
+from attendance_config import PERFORMANCE_PROFILES, ConfigError, load_config
+from attendance_db import DatabaseManager
+from face_data_file import FACE_DATA_PATH, load_face_data, update_face_data
+from face_detectors import DetectorChain
+from face_gallery import build_templates
+from lighting import LightingNormalizer
+
+
+MAX_DETECT_WIDTH = 640  # ID photos are downscaled to this width for detection only
+
+# Per-process detector state, created by the pool initializer
+_worker = {}
+
+
+def read_manifest(path):
+    """Rows of (student_id, name, [image paths]) from a CSV manifest
+
+    Columns: student_id, name, images - several images separated by ';'.
+    Relative image paths are resolved against the manifest's folder.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    rows = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for record in csv.DictReader(f):
+            images = [os.path.join(base, image.strip())
+                      for image in (record.get('images') or '').split(';') if image.strip()]
+            rows.append(((record.get('student_id') or '').strip(), (record.get('name') or '').strip(), images))
+    return rows
+
+
+def _init_worker(config, min_face_size):
+    _worker['detectors'] = DetectorChain(list(config.detectors) or None, scale_factor=config.scale_factor,
+                                         min_neighbors=config.min_neighbors)
+    _worker['lighting'] = LightingNormalizer()
+    _worker['min_face_size'] = min_face_size
+    _worker['template_sizes'] = config.template_sizes
+    _worker['templates_per_student'] = config.templates_per_student
+
+
+def detect_face(gray):
+    """Largest face in a grayscale photo, located on a downscaled copy"""
+    scale = min(1.0, MAX_DETECT_WIDTH / gray.shape[1])
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+    faces = _worker['detectors'].detect(small, _worker['min_face_size'])
+    if not len(faces):
+        return None
+    x, y, w, h = max(faces, key=lambda box: box[2] * box[3])
+    x, y, w, h = (int(round(value / scale)) for value in (x, y, w, h))
+    return gray[y:y+h, x:x+w]
+
+
+def enroll_one(row):
+    """Templates for one manifest row (runs in a worker process)
+
+    Faces are stored like interactive registration does: at the configured
+    template sizes, until templates_per_student are collected. Returns
+    (student_id, name, templates, errors, started, finished); the wall-clock
+    times let the caller measure detection without pool startup.
+    """
+    started = time.time()
+    student_id, name, images = row
+    lighting = _worker['lighting']
+    templates = []
+    errors = []
+    for image_path in images:
+        if len(templates) >= _worker['templates_per_student']:
+            break
+        image = cv2.imread(image_path)
+        if image is None:
+            errors.append(f"unreadable image {image_path}")
+            continue
+        gray = lighting.normalize(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+        face = detect_face(gray)
+        if face is None:
+            errors.append(f"no face in {image_path}")
+            continue
+        templates.extend(build_templates(lighting.normalize_face(face), _worker['template_sizes']))
+    return student_id, name, templates, errors, started, time.time()
+
+
+def create_students_table(conn):
+    """Students table as the GUI creates it, for a fresh database (writer thread)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS students (
+            student_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            registration_date TEXT
+        )
+    ''')
+
+
+def insert_students(conn, rows):
+    """Insert all enrolled students in one transaction (writer thread)"""
+    conn.executemany('''
+        INSERT INTO students (student_id, name, registration_date)
+        VALUES (?, ?, ?)
+    ''', rows)
+
+
+def bulk_enroll(manifest, db_path='smart_attendance.db', face_data_path=FACE_DATA_PATH,
+                workers=None, min_face_size=None, config=None):
+    """Enroll every manifest row; returns (enrolled count, failures, stats)
+
+    Detection and template settings come from `config` (default: load_config(),
+    as the GUI does), so bulk and interactive enrollments store the same templates.
+    """
+    config = config or load_config()
+    min_face_size = min_face_size or config.min_face_size
+    start = time.perf_counter()
+    rows = read_manifest(manifest)
+    registered = set(load_face_data(face_data_path)['students'])
+
+    db = DatabaseManager(db_path)
+    try:
+        db.write(create_students_table)
+        registered.update(row[0] for row in db.connection().execute('SELECT student_id FROM students'))
+
+        failures = []
+        pending = []
+        seen = set()
+        for row in rows:
+            student_id, name, images = row
+            if not student_id or not name:
+                failures.append((student_id, name, "missing student_id or name"))
+            elif student_id in registered or student_id in seen:
+                failures.append((student_id, name, "student ID already registered"))
+            elif not images:
+                failures.append((student_id, name, "no images listed"))
+            else:
+                seen.add(student_id)
+                pending.append(row)
+
+        images = sum(len(row[2]) for row in pending)
+        enrolled = []
+        first_started = last_finished = None
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(config, min_face_size)) as pool:
+            for student_id, name, templates, errors, started, finished in pool.map(enroll_one, pending,
+                                                                                   chunksize=8):
+                first_started = started if first_started is None else min(first_started, started)
+                last_finished = finished if last_finished is None else max(last_finished, finished)
+                if templates:
+                    enrolled.append((student_id, name, templates))
+                else:
+                    failures.append((student_id, name, "; ".join(errors)))
+        # From the first row picked up to the last one done; excludes pool and detector startup
+        detect_seconds = last_finished - first_started if pending else 0.0
+
+        if enrolled:
+            registration_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            db.write(insert_students, [(student_id, name, registration_date)
+                                       for student_id, name, _ in enrolled])
+
+            # Merged into the file as it is now, keeping anything saved during the run
+            def add_enrolled(data):
+                for student_id, name, templates in enrolled:
+                    data['face_data'][student_id] = templates
+                    data['students'][student_id] = {'name': name, 'id': student_id}
+
+            update_face_data(add_enrolled, face_data_path)
+    finally:
+        db.close()
+
+    seconds = time.perf_counter() - start
+    stats = {
+        'rows': len(rows),
+        'images': images,
+        'seconds': seconds,
+        'images_per_sec': images / detect_seconds if detect_seconds else 0.0,
+        'students_per_sec': len(enrolled) / seconds if seconds else 0.0,
+    }
+    return len(enrolled), failures, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enroll students from a CSV manifest of photos")
+    parser.add_argument('manifest', help="CSV with student_id, name, images (';'-separated paths)")
+    parser.add_argument('--db', default='smart_attendance.db', help="Attendance database")
+    parser.add_argument('--face-data', default=FACE_DATA_PATH, help="Face data file")
+    parser.add_argument('--workers', type=int, help="Detection processes (default: CPU count)")
+    parser.add_argument('--min-face', type=int, help="Detector minimum face size (px, default: from the config)")
+    parser.add_argument('--config', metavar='FILE', help="TOML or INI settings file, as for the GUI")
+    parser.add_argument('--performance-profile', choices=list(PERFORMANCE_PROFILES),
+                        help="Performance profile whose detector and template settings to use")
+    parser.add_argument('--failures', metavar='CSV', help="Also write failed rows to this CSV")
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config, args.performance_profile)
+    except ConfigError as e:
+        parser.error(str(e))
+    enrolled, failures, stats = bulk_enroll(args.manifest, args.db, args.face_data,
+                                            args.workers, args.min_face, config)
+
+    print(f"✅ Enrolled {enrolled} of {stats['rows']} students in {stats['seconds']:.1f}s")
+    print(f"⚡ {stats['images_per_sec']:.1f} images/s detected, {stats['students_per_sec']:.1f} students/s overall")
+    if failures:
+        print(f"❌ {len(failures)} failed:")
+        for student_id, name, reason in failures:
+            print(f"  {student_id or '?':>10}  {name or '?':<25} {reason}")
+        if args.failures:
+            with open(args.failures, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(['student_id', 'name', 'reason'])
+                writer.writerows(failures)
+            print(f"📝 Failures written to {args.failures}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Correlation Engine for the Smart Attendance System
+# Equal-size scoring as one normalized matrix product, or small-shift scoring via batched FFTs
+
+import cv2
+import numpy as np
+
+
+FFT_CHUNK_BYTES = 64 << 20  # Probe x template spectrum products held at a time
+
+
+def correlator(compact, shift=0, previous=None):
+    """Scoring path for a CompactGallery: the plain product, or FFT shift search when shift > 0
+
+    Both paths expose probes(face_rois) and best_scores_range(probes, start, end).
+    `previous` is the correlator of the gallery `compact` was derived from.
+    """
+    return ShiftCorrelator(compact, shift, previous=previous) if shift > 0 else compact
+
+
+def window_sums(image, height, width):
+    """Sums of every height x width window of the (faces, H, W) images, via integral images"""
+    integral = np.zeros((image.shape[0], image.shape[1] + 1, image.shape[2] + 1), dtype=np.float64)
+    np.cumsum(np.cumsum(image, axis=1), axis=2, out=integral[:, 1:, 1:])
+    return (integral[:, height:, width:] - integral[:, :-height, width:]
+            - integral[:, height:, :-width] + integral[:, :-height, :-width])
+
+
+class ShiftCorrelator:
+    """Best TM_CCOEFF_NORMED of each template over +-shift pixels of misalignment
+
+    A probe is resized to the template size and reflect-padded by `shift`, so
+    the zero-shift score equals the equal-size score and the others compare
+    the template with the crop moved by up to `shift` pixels. This is what
+    cv2.matchTemplate returns for the padded probe, computed for the whole
+    gallery at once: template spectra are precomputed, each probe is
+    transformed once, and the shifted correlations of all probe/template
+    pairs come from batched products in the frequency domain. Templates are
+    zero-mean, so only the probe windows need normalizing (integral images).
+    Spectra of rows the gallery reused from `previous` are copied, not recomputed.
+    """
+
+    def __init__(self, compact, shift, chunk_bytes=FFT_CHUNK_BYTES, previous=None):
+        self.compact = compact
+        self.shift = shift
+        self.chunk_bytes = chunk_bytes
+        self.blocks = compact.blocks
+        self.spectra = {}
+        self.inverse_bases = {}
+        if previous is not None and (previous.shift != shift or compact.reused is None):
+            previous = None
+        for (height, width), block in self.blocks.items():
+            size = (height, width)
+            padded = (height + 2 * shift, width + 2 * shift)
+            self.inverse_bases[size] = self._inverse_bases(*padded)
+            spectra = np.empty((len(block.scoring), padded[0], padded[1] // 2 + 1), dtype=np.complex64)
+            fresh = np.arange(len(block.scoring))
+            if previous is not None and size in previous.spectra:
+                reused = compact.reused[size]
+                kept = np.flatnonzero(reused >= 0)
+                spectra[kept] = previous.spectra[size][reused[kept]]
+                fresh = np.flatnonzero(reused < 0)
+            for start in range(0, len(fresh), 1024):
+                indices = fresh[start:start + 1024]
+                rows = block.scoring[indices].astype(np.float32)
+                if block.scales is not None:
+                    rows *= block.scales[indices, None]
+                spectra[indices] = np.conj(np.fft.rfft2(rows.reshape(-1, height, width), s=padded))
+            self.spectra[size] = spectra
+
+    def _inverse_bases(self, rows, columns):
+        """Inverse-DFT rows for just the (2*shift+1)^2 needed outputs of an irfft2
+
+        Full inverse FFTs would compute every cyclic offset of the padded probe;
+        only the small valid corner is ever used, so it is evaluated directly as
+        two small matrix products instead.
+        """
+        shifts = np.arange(2 * self.shift + 1)
+        vertical = np.exp(2j * np.pi * np.outer(shifts, np.arange(rows)) / rows).astype(np.complex64)
+        frequencies = np.arange(columns // 2 + 1)
+        # Real-FFT half spectrum: every bin but DC (and Nyquist, for even widths) stands for two
+        weights = np.full(len(frequencies), 2.0)
+        weights[0] = 1.0
+        if columns % 2 == 0:
+            weights[-1] = 1.0
+        horizontal = (weights[:, None] * np.exp(2j * np.pi * np.outer(frequencies, shifts) / columns)
+                      / (rows * columns)).astype(np.complex64)
+        return vertical, horizontal
+
+    def probes(self, face_rois):
+        """Per block size: probe spectra and the inverse norms of every shifted window"""
+        shift = self.shift
+        prepared = {}
+        for height, width in self.blocks:
+            padded = np.stack([
+                cv2.copyMakeBorder(cv2.resize(face_roi, (width, height)), shift, shift, shift, shift,
+                                   cv2.BORDER_REFLECT_101)
+                for face_roi in face_rois
+            ]).astype(np.float32)
+            # Standardizing doesn't change the scores but keeps the float32 FFT well conditioned
+            padded -= padded.mean(axis=(1, 2), keepdims=True)
+            scale = padded.std(axis=(1, 2), keepdims=True)
+            np.divide(padded, scale, out=padded, where=scale > 0)
+
+            count = height * width
+            sums = window_sums(padded, height, width)
+            squares = window_sums(padded * padded, height, width)
+            norms = np.sqrt(np.maximum(squares - sums * sums / count, 0))
+            inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 1e-6).astype(np.float32)
+            prepared[(height, width)] = (np.fft.rfft2(padded), inverse)
+        return prepared
+
+    def score(self, size, probes, first, last):
+        """(faces, rows) best shifted correlation with template rows first..last"""
+        spectra, inverse = probes
+        vertical, horizontal = self.inverse_bases[size]
+        faces = len(spectra)
+        scores = np.empty((faces, last - first), dtype=np.float32)
+        chunk = max(1, self.chunk_bytes // (faces * spectra[0].nbytes))
+        for start in range(first, last, chunk):
+            end = min(start + chunk, last)
+            products = spectra[:, None] * self.spectra[size][None, start:end]
+            surfaces = (vertical @ products @ horizontal).real * inverse[:, None]
+            scores[:, start - first:end - first] = surfaces.reshape(faces, end - start, -1).max(axis=2)
+        return scores
+
+    def best_scores(self, face_rois):
+        """(faces, students) matrix of each student's best shifted template correlation"""
+        return self.best_scores_range(self.probes(face_rois), 0, self.compact.students)
+
+    def best_scores_range(self, probes, start, end):
+        """(faces, end - start) best shifted correlations for student positions start..end"""
+        faces = len(next(iter(probes.values()))[0])
+        best = np.full((faces, end - start), -np.inf, dtype=np.float32)
+        for size, block in self.blocks.items():
+            first, last = np.searchsorted(block.positions, (start, end))
+            if first == last:
+                continue
+            row_first, row_last = block.starts[first], block.offsets[end]
+            per_template = self.score(size, probes[size], row_first, row_last)
+            per_student = np.maximum.reduceat(per_template, block.starts[first:last] - row_first, axis=1)
+            columns = block.positions[first:last] - start
+            best[:, columns] = np.maximum(best[:, columns], per_student)
+        return best
+
+    def nbytes(self):
+        """Bytes of the precomputed template spectra"""
+        return sum(spectra.nbytes for spectra in self.spectra.values())
@@ -0,0 +1,143 @@
+# Courses, Enrollments and Sessions for the Smart Attendance System
+# A session's roster scopes recognition; marks are also recorded per session
+
+import argparse
+import sqlite3
+
+
+class CourseRoster:
+    """Course, enrollment, session and per-session attendance tables"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def ensure_schema(self):
+        """Create the course tables if they do not exist"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS courses (
+                course_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS enrollments (
+                course_id TEXT NOT NULL,
+                student_id TEXT NOT NULL,
+                PRIMARY KEY (course_id, student_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                course_id TEXT NOT NULL,
+                date TEXT NOT NULL,
+                start_time TEXT NOT NULL,
+                end_time TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS session_attendance (
+                session_id INTEGER NOT NULL,
+                student_id TEXT NOT NULL,
+                time TEXT NOT NULL,
+                enrolled INTEGER NOT NULL DEFAULT 1,
+                PRIMARY KEY (session_id, student_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_sessions_course
+            ON sessions (course_id, date)
+        ''')
+        self.conn.commit()
+
+    def courses(self):
+        """(course_id, name, enrolled count) for every course"""
+        cursor = self.conn.execute('''
+            SELECT c.course_id, c.name, COUNT(e.student_id)
+            FROM courses c LEFT JOIN enrollments e ON e.course_id = c.course_id
+            GROUP BY c.course_id ORDER BY c.course_id
+        ''')
+        return cursor.fetchall()
+
+    def add_course(self, course_id, name):
+        self.conn.execute('INSERT OR REPLACE INTO courses (course_id, name) VALUES (?, ?)', (course_id, name))
+
+    def enroll(self, course_id, student_ids):
+        self.conn.executemany('INSERT OR IGNORE INTO enrollments (course_id, student_id) VALUES (?, ?)',
+                              [(course_id, student_id) for student_id in student_ids])
+
+    def unenroll(self, course_id, student_ids):
+        self.conn.executemany('DELETE FROM enrollments WHERE course_id = ? AND student_id = ?',
+                              [(course_id, student_id) for student_id in student_ids])
+
+    def roster(self, course_id):
+        """Student IDs enrolled in a course"""
+        cursor = self.conn.execute('SELECT student_id FROM enrollments WHERE course_id = ?', (course_id,))
+        return [row[0] for row in cursor.fetchall()]
+
+    def start_session(self, course_id, date, start_time):
+        """Open a session and return its ID (caller commits)"""
+        cursor = self.conn.execute('INSERT INTO sessions (course_id, date, start_time) VALUES (?, ?, ?)',
+                                   (course_id, date, start_time))
+        return cursor.lastrowid
+
+    def end_session(self, session_id, end_time):
+        self.conn.execute('UPDATE sessions SET end_time = ? WHERE session_id = ?', (end_time, session_id))
+
+    def record_mark(self, cursor, session_id, student_id, time_str, enrolled=True):
+        """Insert a session mark; True if the student was not yet marked in this session"""
+        cursor.execute('''
+            INSERT OR IGNORE INTO session_attendance (session_id, student_id, time, enrolled)
+            VALUES (?, ?, ?, ?)
+        ''', (session_id, student_id, time_str, int(enrolled)))
+        return cursor.rowcount > 0
+
+    def session_marked(self, session_id):
+        """Student IDs already marked in a session"""
+        cursor = self.conn.execute('SELECT student_id FROM session_attendance WHERE session_id = ?', (session_id,))
+        return set(row[0] for row in cursor.fetchall())
+
+    def forget_student(self, cursor, student_id):
+        """Remove a student's enrollments and session marks"""
+        cursor.execute('DELETE FROM enrollments WHERE student_id = ?', (student_id,))
+        cursor.execute('DELETE FROM session_attendance WHERE student_id = ?', (student_id,))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage courses and enrollments")
+    parser.add_argument('--db', default='smart_attendance.db', help="Attendance database")
+    parser.add_argument('--add-course', nargs=2, metavar=('COURSE_ID', 'NAME'), help="Create or rename a course")
+    parser.add_argument('--enroll', nargs='+', metavar=('COURSE_ID', 'STUDENT_ID'),
+                        help="Enroll student IDs in a course")
+    parser.add_argument('--unenroll', nargs='+', metavar=('COURSE_ID', 'STUDENT_ID'),
+                        help="Remove student IDs from a course")
+    parser.add_argument('--roster', metavar='COURSE_ID', help="List a course's students")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        roster = CourseRoster(conn)
+        roster.ensure_schema()
+        if args.add_course:
+            roster.add_course(*args.add_course)
+        if args.enroll:
+            roster.enroll(args.enroll[0], args.enroll[1:])
+        if args.unenroll:
+            roster.unenroll(args.unenroll[0], args.unenroll[1:])
+        conn.commit()
+
+        if args.roster:
+            students = roster.roster(args.roster)
+            print(f"👥 {args.roster}: {len(students)} enrolled")
+            for student_id in students:
+                print(f"  {student_id}")
+        else:
+            for course_id, name, enrolled in roster.courses():
+                print(f"📚 {course_id:<10} {name:<30} {enrolled} enrolled")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,47 @@
 import sqlite3
-import pickle
 import os
 
+from attendance_analytics import AttendanceAnalytics
+from attendance_partitions import MAX_WRITE_PARTITIONS, AttendancePartitions
+from course_roster import CourseRoster
+from face_data_file import FACE_DATA_PATH, update_face_data
+
 student_id = "106"  # Change to the ID you want to delete
 
 # 1. Delete from database
-conn = sqlite3.connect("smart_attendance.db")
-cur = conn.cursor()
-cur.execute("DELETE FROM students WHERE student_id = ?", (student_id,))
-cur.execute("DELETE FROM attendance WHERE student_id = ?", (student_id,))
-conn.commit()
+conn = sqlite3.connect("smart_attendance.db", uri=True)
+partitions = AttendancePartitions(conn)
+analytics = AttendanceAnalytics(conn, partitions)
+roster = CourseRoster(conn)
+# Schema setup commits on its own, so it runs before the delete's transaction starts
+analytics.ensure_schema()
+roster.ensure_schema()
+
+# Partitions (archived terms included) are attached up front, so the rollup decrement and every
+# row delete commit together. Past SQLite's attach limit the oldest partitions go first, each batch
+# removing exactly the rows it decrements, and the last batch deletes the student itself.
+keys = partitions.student_keys(student_id, include_archived=True)
+batches = [keys[i:i + MAX_WRITE_PARTITIONS] for i in range(0, len(keys), MAX_WRITE_PARTITIONS)] or [[]]
+for batch, batch_keys in enumerate(batches, 1):
+    with partitions.writing_keys(batch_keys) as tables:
+        cur = conn.cursor()
+        analytics.forget_student(cur, student_id, tables.values())
+        for table in tables.values():
+            cur.execute(f"DELETE FROM {table} WHERE student_id = ?", (student_id,))
+        if batch == len(batches):
+            roster.forget_student(cur, student_id)
+            cur.execute("DELETE FROM students WHERE student_id = ?", (student_id,))
+            cur.execute("DELETE FROM attendance WHERE student_id = ?", (student_id,))
 conn.close()
 
 # 2. Remove from face_data.pkl for this ID
-face_data_path = "faces/smart_face_data.pkl"
-if os.path.exists(face_data_path):
-    with open(face_data_path, "rb") as f:
-        data = pickle.load(f)
-    if "face_data" in data:
+if os.path.exists(FACE_DATA_PATH):
+    # Under the file's lock, replaced in one step so a running kiosk never reloads a half-written file
+    def forget(data):
         data["face_data"].pop(student_id, None)
-    if "students" in data:
         data["students"].pop(student_id, None)
-    with open(face_data_path, "wb") as f:
-        pickle.dump(data, f)
+
+    update_face_data(forget)
     print(f"Deleted {student_id} info in DB and face_data.pkl")
 else:
     print("face_data.pkl not found, only DB records deleted.")
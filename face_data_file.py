@@ -0,0 +1,95 @@
+# Shared Face Data File for the Smart Attendance System
+# Locked read-modify-write of smart_face_data.pkl for the GUI, bulk enrollment, gallery pulls and deletions
+
+import os
+import pickle
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+FACE_DATA_PATH = os.path.join('faces', 'smart_face_data.pkl')
+
+
+@contextmanager
+def face_data_lock(path=FACE_DATA_PATH):
+    """Hold the exclusive lock on a face data file (a `.lock` file next to it)
+
+    Every writer takes it around its whole read-modify-write, so two
+    processes (or threads) updating different students never lose each
+    other's change. Readers need no lock: the file is replaced in one step.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.lock', 'a+b') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def file_state(path):
+    """(mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_face_data(path=FACE_DATA_PATH):
+    """{'face_data': {id: templates}, 'students': {id: info}, 'revisions': {id: int}}, empty if missing"""
+    if not os.path.exists(path):
+        return {'face_data': {}, 'students': {}, 'revisions': {}}
+    with open(path, 'rb') as f:
+        data = pickle.load(f)
+    data.setdefault('face_data', {})
+    data.setdefault('students', {})
+    data.setdefault('revisions', {})
+    return data
+
+
+def save_face_data(path, data):
+    """Replace the file in one step so readers never see a partial write (hold the lock)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = path + '.part'
+    with open(temp_path, 'wb') as f:
+        pickle.dump(data, f)
+    os.replace(temp_path, path)
+
+
+def update_face_data(update, path=FACE_DATA_PATH):
+    """Under the lock, load the file, apply update(data) in place and save it
+
+    Students whose template list update() replaced (or who had no revision
+    yet) get the file's next revision number in data['revisions'], so
+    readers can tell what changed without comparing templates. Returns
+    (data, file state before, file state after): a reader that had already
+    seen the state before knows the state after holds only this update.
+    """
+    with face_data_lock(path):
+        before = file_state(path)
+        data = load_face_data(path)
+        templates = dict(data['face_data'])
+        update(data)
+        revision = data['revision'] = data.get('revision', 0) + 1  # Never reused, even after a deletion
+        previous = data['revisions']
+        data['revisions'] = {
+            student_id: previous[student_id]
+            if student_id in previous and data['face_data'][student_id] is templates.get(student_id) else revision
+            for student_id in data['face_data']}
+        save_face_data(path, data)
+        after = file_state(path)
+    return data, before, after
@@ -0,0 +1,266 @@
+# Face Detector Registry for the Smart Attendance System
+# Haar / LBP / dlib HOG backends tried cheapest-first, escalating only on misses
+
+import os
+import threading
+import time
+
+import cv2
+
+# dlib is optional - its HOG backend is skipped when missing
+try:
+    import dlib
+except ImportError:
+    dlib = None
+
+
+LBP_CASCADE_DIR = os.path.join('data', 'lbpcascades')
+
+# Backend name -> factory returning a FaceDetectorBackend
+DETECTOR_BACKENDS = {}
+
+# Backends of a chain built without names: the frontal Haar cascade the system has always used
+DEFAULT_DETECTORS = ('haar_default',)
+
+
+def register_backend(name):
+    """Decorator adding a backend factory to the registry"""
+    def decorator(factory):
+        DETECTOR_BACKENDS[name] = factory
+        return factory
+    return decorator
+
+
+class FaceDetectorBackend:
+    """One detection method with a running latency estimate"""
+
+    def __init__(self, name, cost_hint):
+        self.name = name
+        self.cost_hint = cost_hint  # relative prior used until the backend is timed
+        self.latency = None  # EMA seconds per call
+        self.calls = 0
+        self.hits = 0
+
+    @property
+    def available(self):
+        return True
+
+    def detect(self, gray, min_size):
+        """Return a list of (x, y, w, h) boxes"""
+        raise NotImplementedError
+
+    def timed_detect(self, gray, min_size):
+        start = time.perf_counter()
+        faces = self.detect(gray, min_size)
+        elapsed = time.perf_counter() - start
+        self.latency = elapsed if self.latency is None else self.latency + 0.2 * (elapsed - self.latency)
+        self.calls += 1
+        if len(faces):
+            self.hits += 1
+        return faces, elapsed
+
+
+class CascadeBackend(FaceDetectorBackend):
+    """OpenCV Haar or LBP cascade"""
+
+    def __init__(self, name, path, cost_hint, scale_factor=1.3, min_neighbors=5, mirrored=False):
+        super().__init__(name, cost_hint)
+        self.path = path
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.mirrored = mirrored  # profile cascades only see one side; also scan the flipped frame
+        self.cascade = cv2.CascadeClassifier(path) if os.path.exists(path) else None
+
+    @property
+    def available(self):
+        return self.cascade is not None and not self.cascade.empty()
+
+    def detect(self, gray, min_size):
+        faces = list(self.cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors,
+                                                   minSize=(min_size, min_size)))
+        if self.mirrored:
+            width = gray.shape[1]
+            flipped = self.cascade.detectMultiScale(cv2.flip(gray, 1), self.scale_factor, self.min_neighbors,
+                                                    minSize=(min_size, min_size))
+            faces.extend((width - x - w, y, w, h) for (x, y, w, h) in flipped)
+        return faces
+
+
+class DlibHogBackend(FaceDetectorBackend):
+    """dlib's HOG + linear SVM frontal detector"""
+
+    def __init__(self, name, cost_hint, upsample=0):
+        super().__init__(name, cost_hint)
+        self.upsample = upsample
+        self.detector = dlib.get_frontal_face_detector() if dlib is not None else None
+
+    @property
+    def available(self):
+        return self.detector is not None
+
+    def detect(self, gray, min_size):
+        boxes = []
+        for rect in self.detector(gray, self.upsample):
+            x, y = max(rect.left(), 0), max(rect.top(), 0)
+            w, h = rect.right() - x, rect.bottom() - y
+            if w >= min_size and h >= min_size:
+                boxes.append((x, y, w, h))
+        return boxes
+
+
+def _haar_path(filename):
+    return os.path.join(cv2.data.haarcascades, filename)
+
+
+@register_backend('lbp_frontal')
+def _lbp_frontal():
+    return CascadeBackend('lbp_frontal', os.path.join(LBP_CASCADE_DIR, 'lbpcascade_frontalface_improved.xml'), 1.0)
+
+
+@register_backend('haar_default')
+def _haar_default():
+    return CascadeBackend('haar_default', _haar_path('haarcascade_frontalface_default.xml'), 2.0)
+
+
+@register_backend('haar_alt')
+def _haar_alt():
+    return CascadeBackend('haar_alt', _haar_path('haarcascade_frontalface_alt.xml'), 2.5)
+
+
+@register_backend('haar_alt2')
+def _haar_alt2():
+    return CascadeBackend('haar_alt2', _haar_path('haarcascade_frontalface_alt2.xml'), 2.5)
+
+
+@register_backend('haar_profile')
+def _haar_profile():
+    return CascadeBackend('haar_profile', _haar_path('haarcascade_profileface.xml'), 4.0, mirrored=True)
+
+
+@register_backend('dlib_hog')
+def _dlib_hog():
+    return DlibHogBackend('dlib_hog', 6.0)
+
+
+class DetectorChain:
+    """Runs the named backends cheapest-first and stops at the first one that finds faces
+
+    Only the named backends are built (DEFAULT_DETECTORS when none are
+    named). They are ordered by measured latency: the first frame starts a
+    background calibration that times a separate copy of every backend, so
+    the calling (UI) thread never waits for the slow ones; cost hints order
+    them until it finishes. While the scene stays empty the fallbacks only
+    run every `escalate_every` frames, so an empty room costs one cheap
+    detector per frame. scale_factor / min_neighbors, when given, replace
+    every cascade's own.
+    """
+
+    def __init__(self, names=None, escalate_every=5, scale_factor=None, min_neighbors=None):
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.backends = []
+        for name in names or DEFAULT_DETECTORS:
+            if name not in DETECTOR_BACKENDS:
+                raise ValueError(f"Unknown detector '{name}' (registered: {', '.join(DETECTOR_BACKENDS)})")
+            backend = self._build(name)
+            if backend.available:
+                self.backends.append(backend)
+            else:
+                print(f"⚠️ Detector '{name}' unavailable, skipping")
+        if not self.backends:
+            raise RuntimeError("No face detector backend could be loaded")
+
+        self.escalate_every = escalate_every
+        self.calibrated = len(self.backends) == 1  # Nothing to order
+        self.calibration = None  # Background calibration thread, once started
+        self.empty_frames = 0
+        self.last_backend = None
+        self.last_diagnostics = None
+
+    def _build(self, name):
+        backend = DETECTOR_BACKENDS[name]()
+        if isinstance(backend, CascadeBackend):
+            if self.scale_factor is not None:
+                backend.scale_factor = self.scale_factor
+            if self.min_neighbors is not None:
+                backend.min_neighbors = self.min_neighbors
+        return backend
+
+    def order(self):
+        """Backends sorted by measured cost (hint until measured)"""
+        return sorted(self.backends,
+                      key=lambda backend: backend.latency if backend.latency is not None else backend.cost_hint)
+
+    def calibrate(self, gray, min_size):
+        """Time every backend once so ordering reflects this machine (blocks; see start_calibration)"""
+        for backend in self.backends:
+            backend.timed_detect(gray, min_size)
+        self._calibrated()
+
+    def start_calibration(self, gray, min_size):
+        """Calibrate on a background thread; detect() keeps working meanwhile
+
+        The timing runs on separate instances of the backends, since a cascade
+        must not be used by two threads at once. Backends the chain has timed
+        itself by then keep their own measurement.
+        """
+        def run():
+            for backend in self.backends:
+                timed = self._build(backend.name)
+                timed.timed_detect(gray, min_size)
+                if backend.latency is None:
+                    backend.latency = timed.latency
+            self._calibrated()
+
+        self.calibration = threading.Thread(target=run, name="detector-calibration", daemon=True)
+        self.calibration.start()
+
+    def _calibrated(self):
+        self.calibrated = True
+        summary = ", ".join(f"{backend.name} {backend.latency * 1000:.1f} ms" for backend in self.order())
+        print(f"🔍 Detector order: {summary}")
+
+    def detect(self, gray, min_size=50):
+        """Detect faces; per-frame diagnostics are kept in last_diagnostics"""
+        if not self.calibrated and self.calibration is None:
+            self.start_calibration(gray.copy(), min_size)
+
+        ordered = self.order()
+        if self.empty_frames and self.empty_frames % self.escalate_every:
+            ordered = ordered[:1]
+
+        tried = []
+        faces = []
+        fired = None
+        for backend in ordered:
+            faces, elapsed = backend.timed_detect(gray, min_size)
+            tried.append((backend.name, elapsed * 1000, len(faces)))
+            if len(faces):
+                fired = backend.name
+                break
+
+        self.empty_frames = 0 if fired else self.empty_frames + 1
+        if fired and fired != self.last_backend:
+            print(f"🔍 Faces found by {fired} (tried {', '.join(name for name, _, _ in tried)})")
+        if fired:
+            self.last_backend = fired
+
+        self.last_diagnostics = {'backend': fired, 'tried': tried}
+        return faces
+
+    def overlay_text(self):
+        """Short description of the last frame's detection"""
+        if not self.last_diagnostics:
+            return "Detector: -"
+        tried = self.last_diagnostics['tried']
+        total_ms = sum(ms for _, ms, _ in tried)
+        return f"Detector: {self.last_diagnostics['backend'] or 'none'} ({len(tried)} tried, {total_ms:.1f} ms)"
+
+    def stats(self):
+        """Per-backend latency and hit counts"""
+        return [{
+            'backend': backend.name,
+            'latency_ms': (backend.latency or 0.0) * 1000,
+            'calls': backend.calls,
+            'hits': backend.hits,
+        } for backend in self.order()]
@@ -0,0 +1,198 @@
+# Compact Face Gallery for the Smart Attendance System
+# One aligned contiguous block per template size, with float32/float16/int8 scoring copies
+
+import cv2
+import numpy as np
+
+
+ALIGNMENT = 64  # Cache line; block starts are aligned to it
+BUILD_ROWS = 1024  # Rows normalized at a time while building a block
+STORAGE_DTYPES = {'float32': np.float32, 'float16': np.float16, 'int8': np.int8}
+TEMPLATE_SIZES = (50, 75, 100)  # Each captured face is stored at these sizes
+
+
+def aligned_empty(shape, dtype, alignment=ALIGNMENT):
+    """Uninitialized array whose data pointer is a multiple of `alignment`"""
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    buffer = np.empty(nbytes + alignment, dtype=np.uint8)
+    offset = -buffer.ctypes.data % alignment
+    return buffer[offset:offset + nbytes].view(dtype).reshape(shape)
+
+
+def normalize_rows(matrix):
+    """Zero-mean, unit-norm rows (float32); constant rows become all zeros"""
+    matrix = matrix.astype(np.float32)
+    matrix -= matrix.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    matrix[(norms == 0).ravel()] = 0
+    return matrix
+
+
+def build_templates(face_roi, sizes=TEMPLATE_SIZES):
+    """Square templates of one face crop, one per gallery size"""
+    return [cv2.resize(face_roi, (size, size)) for size in sizes]
+
+
+class GalleryBlock:
+    """All templates of one size: raw uint8 rows, the scoring copy and student offsets
+
+    Rows of student position p are templates[offsets[p]:offsets[p + 1]].
+    int8 scoring rows are quantized per row; `scales` turns their dot
+    products back into correlations. Rows whose `reused` entry is a row of
+    `previous` are copied from it instead of being normalized again.
+    """
+
+    __slots__ = ('size', 'templates', 'scoring', 'scales', 'offsets', 'positions', 'starts')
+
+    def __init__(self, size, rows, owners, students, dtype, previous=None, reused=None):
+        self.size = size
+        self.templates = aligned_empty((len(rows), size[0] * size[1]), np.uint8)
+        fresh = np.arange(len(rows)) if reused is None else np.flatnonzero(reused < 0)
+        for i in fresh:
+            self.templates[i] = rows[i].reshape(-1)
+
+        counts = np.bincount(owners, minlength=students)
+        self.offsets = np.zeros(students + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        # Students that own rows here, and where their contiguous segment starts
+        self.positions = np.flatnonzero(counts)
+        self.starts = self.offsets[self.positions]
+
+        self.scoring = aligned_empty(self.templates.shape, STORAGE_DTYPES[dtype])
+        self.scales = np.empty(len(rows), dtype=np.float32) if dtype == 'int8' else None
+        if previous is not None:
+            kept = np.flatnonzero(reused >= 0)
+            self.templates[kept] = previous.templates[reused[kept]]
+            self.scoring[kept] = previous.scoring[reused[kept]]
+            if self.scales is not None:
+                self.scales[kept] = previous.scales[reused[kept]]
+
+        # Normalized in slices so no full float32 copy of a large gallery is ever held
+        for start in range(0, len(fresh), BUILD_ROWS):
+            indices = fresh[start:start + BUILD_ROWS]
+            normalized = normalize_rows(self.templates[indices])
+            if self.scales is not None:
+                peaks = np.abs(normalized).max(axis=1)
+                peaks[peaks == 0] = 1
+                self.scoring[indices] = np.rint(normalized * (127 / peaks[:, None]))
+                self.scales[indices] = peaks / 127
+            else:
+                self.scoring[indices] = normalized
+
+    def rows_for(self, position):
+        """uint8 template rows of one student (a view)"""
+        return self.templates[self.offsets[position]:self.offsets[position + 1]]
+
+    def score(self, probes, chunk_bytes, first=0, last=None):
+        """(faces, rows) correlations of normalized float32 probes with rows first..last"""
+        scoring = self.scoring[first:last]
+        if scoring.dtype == np.float32:
+            return probes @ scoring.T
+
+        # Narrow storage is widened one cache-sized chunk at a time
+        dim = scoring.shape[1]
+        chunk = max(1, chunk_bytes // (dim * 4))
+        scores = np.empty((len(probes), len(scoring)), dtype=np.float32)
+        for start in range(0, len(scoring), chunk):
+            end = start + chunk
+            scores[:, start:end] = probes @ scoring[start:end].astype(np.float32).T
+        if self.scales is not None:
+            scores *= self.scales[first:last]
+        return scores
+
+    def nbytes(self):
+        index = self.offsets.nbytes + self.positions.nbytes + self.starts.nbytes
+        if self.scales is not None:
+            index += self.scales.nbytes
+        return {'templates': self.templates.nbytes, 'scoring': self.scoring.nbytes, 'index': index}
+
+
+class CompactGallery:
+    """Gallery of template lists (one per student position) packed by template size
+
+    With `previous` (a gallery of the same dtype) and `sources` (each
+    position's position in `previous`, or -1 for a new or changed student),
+    unchanged students' rows are copied from `previous` rather than
+    normalized again; `reused` then maps every block row to its source row
+    (-1 for fresh rows), for scoring paths that cache per-row data.
+    """
+
+    def __init__(self, gallery, dtype='float32', chunk_bytes=1 << 20, previous=None, sources=None):
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown gallery dtype '{dtype}' (use {', '.join(STORAGE_DTYPES)})")
+        self.students = len(gallery)
+        self.dtype = dtype
+        self.chunk_bytes = chunk_bytes  # Widening chunk for float16/int8 scoring
+        if previous is None or previous.dtype != dtype:
+            previous, sources = None, None
+
+        grouped = {}
+        for position, templates in enumerate(gallery):
+            source = -1 if sources is None else sources[position]
+            if source >= 0:
+                for size, block in previous.blocks.items():
+                    first, last = block.offsets[source], block.offsets[source + 1]
+                    if first < last:
+                        rows, owners, reused = grouped.setdefault(size, ([], [], []))
+                        rows.extend([None] * (last - first))
+                        owners.extend([position] * (last - first))
+                        reused.extend(range(first, last))
+                continue
+            for template in templates:
+                rows, owners, reused = grouped.setdefault(template.shape[:2], ([], [], []))
+                rows.append(template)
+                owners.append(position)
+                reused.append(-1)
+        self.reused = None if previous is None else {
+            size: np.asarray(reused, dtype=np.int64) for size, (_, _, reused) in grouped.items()}
+        self.blocks = {
+            size: GalleryBlock(size, rows, np.asarray(owners, dtype=np.int64), self.students, dtype,
+                               previous.blocks.get(size) if previous is not None else None,
+                               self.reused[size] if previous is not None else None)
+            for size, (rows, owners, _) in grouped.items()}
+
+    def __len__(self):
+        return self.students
+
+    def templates(self, position):
+        """A student's templates as 2-D uint8 views into the blocks"""
+        return [row.reshape(size) for size, block in self.blocks.items() for row in block.rows_for(position)]
+
+    def probes(self, face_rois):
+        """Normalized probe rows of the face crops for every block size"""
+        return {(height, width): normalize_rows(np.stack([
+            cv2.resize(face_roi, (width, height)).reshape(-1) for face_roi in face_rois
+        ])) for height, width in self.blocks}
+
+    def best_scores(self, face_rois):
+        """(faces, students) matrix of each student's best template correlation"""
+        return self.best_scores_range(self.probes(face_rois), 0, self.students)
+
+    def best_scores_range(self, probes, start, end):
+        """(faces, end - start) best correlations for student positions start..end
+
+        Each block's rows are ordered by student position, so a position range
+        is one contiguous row range; ranges can be scored on separate threads.
+        """
+        faces = len(next(iter(probes.values())))
+        best = np.full((faces, end - start), -np.inf, dtype=np.float32)
+        for size, block in self.blocks.items():
+            first, last = np.searchsorted(block.positions, (start, end))
+            if first == last:
+                continue
+            row_first, row_last = block.starts[first], block.offsets[end]
+            per_template = block.score(probes[size], self.chunk_bytes, row_first, row_last)
+            per_student = np.maximum.reduceat(per_template, block.starts[first:last] - row_first, axis=1)
+            columns = block.positions[first:last] - start
+            best[:, columns] = np.maximum(best[:, columns], per_student)
+        return best
+
+    def nbytes(self):
+        """Bytes held per component, summed over blocks"""
+        totals = {'templates': 0, 'scoring': 0, 'index': 0}
+        for block in self.blocks.values():
+            for key, value in block.nbytes().items():
+                totals[key] += value
+        return totals
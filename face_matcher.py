@@ -0,0 +1,166 @@
+# Face Template Matching for the Smart Attendance System
+# Scores all face crops of a frame against the gallery in one matrix product per template size
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from correlation_engine import correlator
+from face_gallery import CompactGallery
+
+
+MIN_SHARD_STUDENTS = 512  # Smaller shards cost more in thread hand-off than they save
+
+# Persistent scoring pools by size, shared by every matcher (galleries are rebuilt on reload)
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def scoring_pool(threads):
+    """The process-wide thread pool with this many scoring threads"""
+    with _pools_lock:
+        pool = _pools.get(threads)
+        if pool is None:
+            pool = _pools[threads] = ThreadPoolExecutor(threads, thread_name_prefix=f"gallery-score-{threads}")
+        return pool
+
+
+def resolve_threads(threads):
+    """Scoring thread count; 0 means one per CPU core"""
+    return threads if threads > 0 else (os.cpu_count() or 1)
+
+
+class TemplateMatcher:
+    """Best-matching student position for face crops (TM_CCOEFF_NORMED)
+
+    A crop resized to a template's size has a single TM_CCOEFF_NORMED value:
+    the correlation of the two mean-subtracted images. Templates are therefore
+    stored as normalized rows in a CompactGallery, one block per template
+    size, and a frame's probes are scored with one product per size.
+
+    With threads > 1 the student positions are split into contiguous shards
+    that a persistent thread pool scores in parallel (the products and
+    reductions release the GIL); each shard returns its best match per face
+    and the overall best is kept. Results are identical to one thread.
+
+    With shift > 0 each template is also compared with the crop moved by up
+    to `shift` pixels (batched FFT correlation, see correlation_engine), for
+    crops that are a little off-center.
+
+    Given the `previous` matcher of a reloaded gallery, students whose
+    template list is the very same object as before keep their normalized
+    rows and spectra; only added and changed students are prepared again.
+    """
+
+    def __init__(self, gallery, threshold=0.65, dtype='float32', threads=1, shift=0, previous=None):
+        self.gallery = gallery  # Template lists, one per student position
+        self.threshold = threshold
+        self.threads = threads
+        self.shift = shift
+        if previous is not None and previous.shift == shift and previous.compact.dtype == dtype:
+            old_positions = {id(templates): position for position, templates in enumerate(previous.gallery)}
+            sources = [old_positions.get(id(templates), -1) for templates in gallery]
+            self.compact = CompactGallery(gallery, dtype, previous=previous.compact, sources=sources)
+            self.correlator = correlator(self.compact, shift, previous.correlator)
+            self.compact.reused = None  # Only needed while deriving the correlator
+        else:
+            self.compact = CompactGallery(gallery, dtype)
+            self.correlator = correlator(self.compact, shift)
+        shards = max(1, min(resolve_threads(threads), len(gallery) // MIN_SHARD_STUDENTS))
+        bounds = np.linspace(0, len(gallery), shards + 1).astype(np.int64)
+        self.shards = list(zip(bounds[:-1], bounds[1:]))
+
+    def __len__(self):
+        return len(self.gallery)
+
+    def scores(self, face_rois):
+        """(faces, students) matrix of each student's best template score"""
+        return self.correlator.best_scores(face_rois)
+
+    def _shard_top(self, probes, start, end):
+        """Best position and score per face within one shard"""
+        best = self.correlator.best_scores_range(probes, start, end)
+        local = best.argmax(axis=1)
+        return local + start, best[np.arange(len(best)), local]
+
+    def top_matches(self, face_rois):
+        """(positions, scores) of the best-scoring student for every crop"""
+        probes = self.correlator.probes(face_rois)
+        if len(self.shards) == 1:
+            return self._shard_top(probes, 0, len(self.gallery))
+        pool = scoring_pool(resolve_threads(self.threads))
+        results = [future.result() for future in
+                   [pool.submit(self._shard_top, probes, start, end) for start, end in self.shards]]
+        positions = np.stack([result[0] for result in results])
+        scores = np.stack([result[1] for result in results])
+        winner = scores.argmax(axis=0)  # First shard wins ties, like a single argmax
+        faces = np.arange(len(face_rois))
+        return positions[winner, faces], scores[winner, faces]
+
+    def match_batch(self, face_rois):
+        """Student position (or -1) for every crop, in input order"""
+        if not face_rois or not self.compact.blocks:
+            return [-1] * len(face_rois)
+        positions, top = self.top_matches(face_rois)
+        return [int(position) if score > self.threshold else -1
+                for position, score in zip(positions, top)]
+
+    def match(self, face_roi):
+        """Student position of the best template above threshold, or -1"""
+        return self.match_batch([face_roi])[0]
+
+    def match_loop(self, face_roi):
+        """Per-template cv2.matchTemplate scan (reference for benchmarks)"""
+        best_match = -1
+        best_score = 0
+
+        for position, templates in enumerate(self.gallery):
+            for template in templates:
+                try:
+                    resized_face = cv2.resize(face_roi, (template.shape[1], template.shape[0]))
+                    result = cv2.matchTemplate(resized_face, template, cv2.TM_CCOEFF_NORMED)
+                    _, max_val, _, _ = cv2.minMaxLoc(result)
+
+                    if max_val > best_score and max_val > self.threshold:
+                        best_score = max_val
+                        best_match = position
+                except cv2.error:
+                    continue
+
+        return best_match
+
+
+class RosterMatcher:
+    """Matches against a session roster first; only faces it misses go to the full gallery
+
+    Positions returned are always full-gallery positions.
+    """
+
+    def __init__(self, full, roster_positions):
+        self.full = full
+        self.roster_positions = np.asarray(sorted(set(roster_positions)), dtype=np.int64)
+        self.roster = TemplateMatcher([full.gallery[position] for position in self.roster_positions],
+                                      full.threshold, full.compact.dtype, full.threads, full.shift)
+        self.enrolled = np.zeros(len(full), dtype=bool)
+        self.enrolled[self.roster_positions] = True
+        self.fallback_faces = 0
+
+    def __len__(self):
+        return len(self.roster)
+
+    def match_batch(self, face_rois):
+        """Full-gallery position (or -1) for every crop, in input order"""
+        positions = [int(self.roster_positions[position]) if position >= 0 else -1
+                     for position in self.roster.match_batch(face_rois)]
+        missed = [i for i, position in enumerate(positions) if position < 0]
+        if missed:
+            self.fallback_faces += len(missed)
+            for i, position in zip(missed, self.full.match_batch([face_rois[i] for i in missed])):
+                positions[i] = position
+        return positions
+
+    def match(self, face_roi):
+        return self.match_batch([face_roi])[0]
@@ -1,71 +1,182 @@
-```python
+import argparse
+import os
+import time
+
 import cv2
 import dlib
 import numpy as np
-import os
-from datetime import datetime
 
-# Load face detector and shape predictor
+from attendance_csv_writer import BufferedAttendanceWriter
+from lighting import LightingNormalizer
+from loop_profiler import LoopProfiler
+
+# Load face detector; the shape predictor is loaded on first use
 detector = dlib.get_frontal_face_detector()
-predictor = dlib.shape_predictor("data/data_dlib/shape_predictor_68_face_landmarks.dat")
+predictor_path = "data/data_dlib/shape_predictor_68_face_landmarks.dat"
+predictor = None
 
-# Attendance file
+# Attendance file (rotated daily: attendance_YYYY-MM-DD.csv)
 attendance_file = "attendance.csv"
+attendance_writer = BufferedAttendanceWriter(attendance_file)
+
+# Lighting correction for poor lighting (LUT on the grayscale frame only)
+lighting = LightingNormalizer()
 
-# Function to adjust brightness/contrast automatically
-def adjust_brightness(frame):
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    mean_val = np.mean(gray)
-
-    if mean_val < 80:  # too dark → brighten
-        alpha = 1.5
-        beta = 30
-    elif mean_val > 180:  # too bright → darken
-        alpha = 0.7
-        beta = -30
-    else:  # normal lighting
-        alpha = 1.0
-        beta = 0
-
-    adjusted = cv2.convertScaleAbs(frame, alpha=alpha, beta=beta)
-    return adjusted
-
-# Function to mark attendance
+def to_normalized_gray(frame):
+    return lighting.normalize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+
+# Function to mark attendance (deduplicated and buffered)
 def mark_attendance(name):
-    now = datetime.now()
-    dt_string = now.strftime("%Y-%m-%d %H:%M:%S")
-    with open(attendance_file, "a") as f:
-        f.write(f"{name},{dt_string}\n")
+    return attendance_writer.mark(name)
+
+# 68-point landmarks, only computed when a step actually needs them
+def get_landmarks(gray, face):
+    global predictor
+    if predictor is None:
+        predictor = dlib.shape_predictor(predictor_path)
+    return predictor(gray, face)
+
+# Performance mode: HOG searching last frame's faces first, optionally on a downscaled frame
+class FastDetector:
+    ROI_FACE_SIZE = 100  # faces in an ROI are scaled to about this size (HOG finds >= 80 px)
+
+    # scale < 1 speeds up full scans but misses faces under 80 / scale px, so it is opt-in
+    def __init__(self, scale=1.0, upsample=0, roi_margin=0.5, full_scan_every=10):
+        self.scale = scale
+        self.upsample = upsample
+        self.roi_margin = roi_margin
+        self.full_scan_every = full_scan_every  # also catches people who just walked in
+        self.previous = []
+        self.frame_count = 0
+
+    def __call__(self, gray):
+        self.frame_count += 1
+        faces = []
+        if self.previous and self.frame_count % self.full_scan_every:
+            faces = self._detect_rois(gray)
+        if not faces:
+            faces = self._detect_full(gray)
+        self.previous = faces
+        return faces
+
+    def _detect_scaled(self, image, scale, offset_x=0, offset_y=0):
+        if scale != 1.0:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            image = np.ascontiguousarray(image)  # dlib needs contiguous ROI slices
+        return [
+            dlib.rectangle(int(rect.left() / scale) + offset_x, int(rect.top() / scale) + offset_y,
+                           int(rect.right() / scale) + offset_x, int(rect.bottom() / scale) + offset_y)
+            for rect in detector(image, self.upsample)
+        ]
+
+    def _detect_full(self, gray):
+        return self._detect_scaled(gray, self.scale)
+
+    def _detect_rois(self, gray):
+        height, width = gray.shape[:2]
+        faces = []
+        for box in self.previous:
+            margin_x = int(box.width() * self.roi_margin)
+            margin_y = int(box.height() * self.roi_margin)
+            x0, y0 = max(box.left() - margin_x, 0), max(box.top() - margin_y, 0)
+            x1, y1 = min(box.right() + margin_x, width), min(box.bottom() + margin_y, height)
+            if x1 <= x0 or y1 <= y0:
+                continue
+            scale = min(1.0, self.ROI_FACE_SIZE / max(box.width(), box.height(), 1))
+            faces.extend(self._detect_scaled(gray[y0:y1, x0:x1], scale, x0, y0))
+        return faces
 
 # Example recognition function (placeholder)
-def recognize_face(frame):
-    faces = detector(frame)
+def recognize_face(gray, faces, need_landmarks=False):
     for face in faces:
-        landmarks = predictor(frame, face)
+        if need_landmarks:
+            get_landmarks(gray, face)
         # For now, we’ll just return a dummy name
         return "Student_1"
     return None
 
-def main():
-    cap = cv2.VideoCapture(0)
+# Original path: full-frame HOG and landmarks for every face
+def baseline_step(gray):
+    faces = detector(gray)
+    for face in faces:
+        get_landmarks(gray, face)
+    return faces
 
+def benchmark(args):
+    cap = cv2.VideoCapture(0)
+    frames = []
+    while len(frames) < args.benchmark:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(to_normalized_gray(frame))
+    cap.release()
+    if not frames:
+        print("❌ No frames captured for benchmark")
+        return
+
+    if not os.path.exists(predictor_path):
+        print(f"⚠️ {predictor_path} not found, baseline runs without landmarks")
+        def baseline(gray):
+            return detector(gray)
+    else:
+        baseline = baseline_step
+
+    fast = FastDetector(args.scale, args.upsample, full_scan_every=args.full_scan_every)
+
+    def fast_step(gray):
+        faces = fast(gray)
+        recognize_face(gray, faces, need_landmarks=args.landmarks)
+        return faces
+
+    # Same captured frames through both paths
+    results = {}
+    for label, step in (("baseline", baseline), ("performance", fast_step)):
+        found = 0
+        start = time.perf_counter()
+        for gray in frames:
+            found += len(step(gray))
+        elapsed = time.perf_counter() - start
+        results[label] = len(frames) / elapsed
+        print(f"{label:<12} {results[label]:6.1f} FPS  ({found} faces over {len(frames)} frames)")
+
+    print(f"⚡ Speedup: {results['performance'] / results['baseline']:.2f}x")
+
+def main(args):
+    cap = cv2.VideoCapture(0)
+    fast = FastDetector(args.scale, args.upsample, full_scan_every=args.full_scan_every) if args.performance else None
+    profiler = LoopProfiler('dlib_attendance') if args.profile else None
+    if profiler:
+        profiler.enable()
+
+    try:
+        run_loop(cap, fast, args, profiler)
+    finally:
+        if profiler:
+            profiler.finish()
+        cap.release()
+        cv2.destroyAllWindows()
+        attendance_writer.close()
+
+def run_loop(cap, fast, args, profiler=None):
     while True:
         ret, frame = cap.read()
         if not ret:
             break
 
-        # Adjust brightness for poor lighting
-        frame = adjust_brightness(frame)
-
-        # Convert to grayscale for detection
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # Grayscale for detection, corrected for poor lighting
+        gray = to_normalized_gray(frame)
 
-        # Face recognition
-        name = recognize_face(gray)
+        # Face detection and recognition
+        faces = fast(gray) if fast else detector(gray, args.upsample)
+        name = recognize_face(gray, faces, need_landmarks=args.landmarks)
         if name:
             mark_attendance(name)
             cv2.putText(frame, f"Recognized: {name}", (50, 50),
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+        # Write rows buffered before the last recognition even if nobody else shows up
+        attendance_writer.tick()
 
         cv2.imshow("Attendance System", frame)
 
@@ -73,14 +184,29 @@ def main():
         if cv2.waitKey(1) & 0xFF == ord("q"):
             break
 
-    cap.release()
-    cv2.destroyAllWindows()
+        if profiler:
+            profiler.tick()
 
 if __name__ == "__main__":
-    # Create attendance file if not exists
-    if not os.path.exists("attendance.csv"):
-        with open("attendance.csv", "w") as f:
-            f.write("Name,DateTime\n")
-
-    main()
-```
+    parser = argparse.ArgumentParser(description="dlib face recognition attendance")
+    parser.add_argument("--performance", action="store_true",
+                        help="HOG with ROI tracking (full scans only every --full-scan-every frames)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Frame scale for full scans in performance mode; 0.5 is ~4x faster "
+                             "but misses faces under ~160 px")
+    parser.add_argument("--upsample", type=int, default=0,
+                        help="HOG upsample count (each step finds ~2x smaller faces, ~4x cost)")
+    parser.add_argument("--full-scan-every", type=int, default=10,
+                        help="Full-frame detection interval while tracking ROIs")
+    parser.add_argument("--landmarks", action="store_true",
+                        help="Compute 68-point landmarks for each face")
+    parser.add_argument("--benchmark", type=int, metavar="FRAMES",
+                        help="Capture FRAMES frames and compare baseline vs performance FPS")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the capture/recognition loop; reports go to attendance_records/")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args)
+    else:
+        main(args)
@@ -0,0 +1,219 @@
+# Frame Recording and Replay for the Smart Attendance System
+# Timestamped frame files and a cv2.VideoCapture-compatible replay source
+
+import argparse
+import json
+import os
+import struct
+import time
+
+import cv2
+import numpy as np
+
+
+MAGIC = b'SAFRAMES1'
+RECORD_HEADER = struct.Struct('<dBHHBI')  # timestamp, encoding, height, width, channels, payload size
+ENCODINGS = {'raw': 0, 'jpeg': 1, 'png': 2}
+ENCODING_NAMES = {code: name for name, code in ENCODINGS.items()}
+
+
+class FrameRecorder:
+    """Appends timestamped frames (raw, JPEG or PNG) to a recording file"""
+
+    def __init__(self, path, encoding='jpeg', quality=90, metadata=None):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding '{encoding}' (use {', '.join(ENCODINGS)})")
+        self.path = path
+        self.encoding = encoding
+        self.quality = quality
+        self.frames = 0
+        self.start = None
+
+        self.file = open(path, 'wb')
+        header = json.dumps({'encoding': encoding, **(metadata or {})}).encode('utf-8')
+        self.file.write(MAGIC + struct.pack('<I', len(header)) + header)
+
+    def write(self, frame, timestamp=None):
+        """Record one frame; timestamps are stored relative to the first frame"""
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        if self.start is None:
+            self.start = timestamp
+
+        if self.encoding == 'raw':
+            payload = np.ascontiguousarray(frame).tobytes()
+        elif self.encoding == 'jpeg':
+            payload = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])[1].tobytes()
+        else:
+            payload = cv2.imencode('.png', frame)[1].tobytes()
+
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        self.file.write(RECORD_HEADER.pack(timestamp - self.start, ENCODINGS[self.encoding],
+                                           height, width, channels, len(payload)))
+        self.file.write(payload)
+        self.frames += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_recording_header(file):
+    """Validate the magic and return the JSON metadata"""
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a frame recording")
+    (length,) = struct.unpack('<I', file.read(4))
+    return json.loads(file.read(length).decode('utf-8'))
+
+
+class ReplayCapture:
+    """Plays a recording through the cv2.VideoCapture interface
+
+    speed='recorded' reproduces the original frame timing; speed='max'
+    returns frames as fast as they are read. Every run yields the same frames.
+    """
+
+    def __init__(self, path, speed='recorded', loop=False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.file = open(path, 'rb')
+        self.metadata = read_recording_header(self.file)
+        self.data_start = self.file.tell()
+
+        self.index = self._scan()
+        self.position = 0
+        self.clock_start = None
+        self.opened = True
+
+    def _scan(self):
+        """Offsets and timestamps of every complete frame, without decoding
+
+        A recording cut off mid-frame (recorder killed, disk full) keeps its
+        complete frames; the partial one at the end is dropped.
+        """
+        index = []
+        file_size = os.fstat(self.file.fileno()).st_size
+        while True:
+            offset = self.file.tell()
+            header = self.file.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+            timestamp, _, height, width, _, size = RECORD_HEADER.unpack(header)
+            if offset + RECORD_HEADER.size + size > file_size:
+                break
+            index.append((offset, timestamp, height, width))
+            self.file.seek(size, 1)
+        self.file.seek(self.data_start)
+        return index
+
+    def isOpened(self):
+        return self.opened and bool(self.index)
+
+    def read(self):
+        if not self.opened:
+            return False, None
+        if self.position >= len(self.index):
+            if not self.loop:
+                return False, None
+            self.position = 0
+            self.clock_start = None
+
+        offset, timestamp, _, _ = self.index[self.position]
+        if self.speed == 'recorded':
+            now = time.perf_counter()
+            if self.clock_start is None:
+                self.clock_start = now - timestamp
+            wait = self.clock_start + timestamp - now
+            if wait > 0:
+                time.sleep(wait)
+
+        self.file.seek(offset)
+        _, encoding, height, width, channels, size = RECORD_HEADER.unpack(self.file.read(RECORD_HEADER.size))
+        payload = self.file.read(size)
+        if ENCODING_NAMES[encoding] == 'raw':
+            shape = (height, width, channels) if channels > 1 else (height, width)
+            frame = np.frombuffer(payload, dtype=np.uint8).reshape(shape).copy()
+        else:
+            flags = cv2.IMREAD_COLOR if channels > 1 else cv2.IMREAD_GRAYSCALE
+            frame = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), flags)
+
+        self.position += 1
+        return True, frame
+
+    def get(self, prop):
+        if not self.index:
+            return 0
+        _, _, height, width = self.index[0]
+        duration = self.index[-1][1]
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: width,
+            cv2.CAP_PROP_FRAME_HEIGHT: height,
+            cv2.CAP_PROP_FRAME_COUNT: len(self.index),
+            cv2.CAP_PROP_POS_FRAMES: self.position,
+            cv2.CAP_PROP_FPS: (len(self.index) - 1) / duration if duration > 0 else 0,
+        }.get(prop, 0)
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.position = max(0, min(int(value), len(self.index)))
+            self.clock_start = None
+            return True
+        # Camera settings (FOURCC, resolution...) do not apply to a recording
+        return False
+
+    def release(self):
+        self.opened = False
+        self.file.close()
+
+
+def record(source, path, frames, encoding, quality):
+    """Record frames from a camera index"""
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        print(f"❌ Cannot open camera {source}")
+        return
+    metadata = {'source': source, 'recorded_at': time.strftime('%Y-%m-%d %H:%M:%S')}
+    with FrameRecorder(path, encoding, quality, metadata) as recorder:
+        while recorder.frames < frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            recorder.write(frame)
+    cap.release()
+    print(f"✅ Recorded {recorder.frames} frames to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or inspect frame recordings")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help="Record from a camera")
+    record_parser.add_argument('path')
+    record_parser.add_argument('--source', type=int, default=0)
+    record_parser.add_argument('--frames', type=int, default=300)
+    record_parser.add_argument('--encoding', default='jpeg', choices=list(ENCODINGS))
+    record_parser.add_argument('--quality', type=int, default=90)
+
+    info_parser = subparsers.add_parser('info', help="Describe a recording")
+    info_parser.add_argument('path')
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record(args.source, args.path, args.frames, args.encoding, args.quality)
+    else:
+        replay = ReplayCapture(args.path, speed='max')
+        print(f"📼 {args.path}: {len(replay.index)} frames, "
+              f"{int(replay.get(cv2.CAP_PROP_FRAME_WIDTH))}x{int(replay.get(cv2.CAP_PROP_FRAME_HEIGHT))}, "
+              f"{replay.get(cv2.CAP_PROP_FPS):.1f} FPS, metadata {replay.metadata}")
+        replay.release()
+
+
+if __name__ == "__main__":
+    main()
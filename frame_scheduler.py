@@ -0,0 +1,121 @@
+# Adaptive Frame Scheduler for the Smart Attendance System
+# Measures per-stage cost and decides how often detection/recognition runs
+
+import time
+from contextlib import contextmanager
+
+
+STRIDES = (1, 2, 4)          # run analysis on every frame, every 2nd, every 4th
+ANALYSIS_STAGES = ('detect', 'recognize')
+
+
+class AdaptiveFrameScheduler:
+    """Picks the smallest analysis stride that fits the FPS and latency budget
+
+    Display runs on every frame; detection and recognition run on every
+    `stride`-th frame and their results are redrawn on the frames in between.
+    """
+
+    def __init__(self, target_fps=15, max_latency=0.25, smoothing=0.2, review_every=15, margin=0.85):
+        self.target_fps = target_fps
+        self.max_latency = max_latency
+        self.smoothing = smoothing
+        self.review_every = review_every
+        self.margin = margin  # stepping down to a smaller stride needs this much headroom
+
+        self.stride = 1
+        self.frame_count = 0
+        self.stage_cost = {}
+        self.latency = None
+        self.fps = 0.0
+        self.window_start = None
+        self.decisions = []
+
+    def should_process(self):
+        """True when this frame should run detection and recognition"""
+        return self.frame_count % self.stride == 0
+
+    @contextmanager
+    def stage(self, name):
+        """Time one pipeline stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._smooth_stage(name, time.perf_counter() - start)
+
+    def _smooth(self, previous, value):
+        if previous is None:
+            return value
+        return previous + self.smoothing * (value - previous)
+
+    def _smooth_stage(self, name, value):
+        self.stage_cost[name] = self._smooth(self.stage_cost.get(name), value)
+
+    def frame_done(self, frame_start, processed):
+        """Record a finished frame (frame_start from time.perf_counter at capture)"""
+        now = time.perf_counter()
+        if self.window_start is None:
+            self.window_start = frame_start
+        if processed:
+            # Capture-to-display time of a frame whose results are shown
+            self.latency = self._smooth(self.latency, now - frame_start)
+
+        self.frame_count += 1
+        if self.frame_count % self.review_every == 0:
+            # Delivered frame rate over the last review window
+            self.fps = self.review_every / max(now - self.window_start, 1e-6)
+            self.window_start = now
+            self._review()
+
+    def _projected(self, stride):
+        """Estimated per-frame time and result latency for a stride"""
+        analysis = sum(self.stage_cost.get(name, 0.0) for name in ANALYSIS_STAGES)
+        other = sum(cost for name, cost in self.stage_cost.items() if name not in ANALYSIS_STAGES)
+        frame_time = other + analysis / stride
+        # Overlays can be up to stride-1 frames old, plus the analysis itself
+        latency = other + analysis + (stride - 1) * frame_time
+        return frame_time, latency
+
+    def _fits(self, stride, headroom=1.0):
+        frame_time, latency = self._projected(stride)
+        return (frame_time <= headroom / self.target_fps and
+                latency <= headroom * self.max_latency)
+
+    def _review(self):
+        """Re-evaluate the stride from the measured costs"""
+        if not self.stage_cost:
+            return
+
+        chosen = STRIDES[-1]
+        for stride in STRIDES:
+            # Be conservative when going back to heavier analysis
+            headroom = self.margin if stride < self.stride else 1.0
+            if self._fits(stride, headroom):
+                chosen = stride
+                break
+
+        if chosen != self.stride:
+            frame_time, latency = self._projected(chosen)
+            reason = (f"stride {self.stride} -> {chosen} "
+                      f"(projected {1 / max(frame_time, 1e-6):.1f} FPS, {latency * 1000:.0f} ms latency)")
+            self.decisions.append((time.time(), self.stride, chosen))
+            print(f"⚙️ Scheduler: {reason}")
+            self.stride = chosen
+
+    def stats(self):
+        """Current scheduler state and measurements"""
+        return {
+            'stride': self.stride,
+            'fps': self.fps,
+            'latency_ms': (self.latency or 0.0) * 1000,
+            'within_budget': self._fits(self.stride),
+            'stage_ms': {name: cost * 1000 for name, cost in self.stage_cost.items()},
+            'decisions': len(self.decisions),
+        }
+
+    def overlay_text(self):
+        """One-line summary for the video overlay"""
+        stats = self.stats()
+        return (f"Analyze 1/{stats['stride']} | {stats['fps']:.1f} FPS | "
+                f"{stats['latency_ms']:.0f} ms")
@@ -0,0 +1,272 @@
+# Face Gallery Distribution for the Smart Attendance System
+# Per-student content-addressed chunks plus a versioned manifest; kiosks fetch only what changed
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import time
+import zlib
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import urlopen
+
+import numpy as np
+
+from attendance_db import DatabaseManager
+from face_data_file import FACE_DATA_PATH, load_face_data, update_face_data
+
+
+LOCAL_MANIFEST_PATH = os.path.join('faces', 'gallery_manifest.json')
+MANIFEST_NAME = 'manifest.json'
+
+
+def encode_student(student_id, info, templates):
+    """Deterministic bytes for one student: JSON header + raw uint8 templates
+
+    Identical templates always give identical bytes, so the hash only changes
+    when the student's data does. No pickle is involved, so fetched chunks
+    cannot run code.
+    """
+    header = json.dumps({
+        'student_id': student_id,
+        'name': info.get('name', student_id),
+        'shapes': [list(template.shape) for template in templates],
+    }, sort_keys=True).encode('utf-8')
+    body = b''.join(np.ascontiguousarray(template, dtype=np.uint8).tobytes() for template in templates)
+    return struct.pack('<I', len(header)) + header + body
+
+
+def decode_student(data):
+    """(student_id, info, templates) from encode_student bytes"""
+    (length,) = struct.unpack_from('<I', data)
+    header = json.loads(data[4:4 + length].decode('utf-8'))
+    offset = 4 + length
+    templates = []
+    for shape in header['shapes']:
+        size = int(np.prod(shape))
+        templates.append(np.frombuffer(data, dtype=np.uint8, count=size, offset=offset).reshape(shape).copy())
+        offset += size
+    student_id = header['student_id']
+    return student_id, {'name': header['name'], 'id': student_id}, templates
+
+
+def chunk_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def chunk_path(store_dir, digest):
+    return os.path.join(store_dir, 'chunks', digest[:2], digest)
+
+
+def write_atomic(path, data):
+    """Replace a file in one step so readers never see a partial write"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = path + '.part'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def prune_chunks(store_dir, keep):
+    """Delete chunk files whose digest is not in `keep`; returns how many were removed"""
+    removed = 0
+    chunks_dir = os.path.join(store_dir, 'chunks')
+    if not os.path.isdir(chunks_dir):
+        return 0
+    for prefix in os.listdir(chunks_dir):
+        for name in os.listdir(os.path.join(chunks_dir, prefix)):
+            if name not in keep:
+                os.remove(os.path.join(chunks_dir, prefix, name))
+                removed += 1
+    return removed
+
+
+def publish(store_dir, face_data_path=FACE_DATA_PATH):
+    """Write chunks for new/changed students and a new manifest version (registrar side)
+
+    Once the new manifest is in place, chunks referenced by neither it nor
+    the previous version are deleted; the previous version's are kept so a
+    kiosk that read the old manifest just before can still finish its pull.
+    """
+    start = time.perf_counter()
+    data = load_face_data(face_data_path)
+    manifest_path = os.path.join(store_dir, MANIFEST_NAME)
+    previous = {'version': 0, 'students': {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous = json.load(f)
+
+    students = {}
+    written = 0
+    for student_id, templates in data['face_data'].items():
+        encoded = encode_student(student_id, data['students'].get(student_id, {}), templates)
+        digest = chunk_hash(encoded)
+        students[student_id] = digest
+        path = chunk_path(store_dir, digest)
+        if not os.path.exists(path):
+            write_atomic(path, zlib.compress(encoded))
+            written += 1
+
+    if students == previous['students']:
+        print(f"✅ Gallery unchanged (version {previous['version']})")
+        return previous['version']
+
+    version = previous['version'] + 1
+    manifest = {'version': version, 'published': time.strftime('%Y-%m-%d %H:%M:%S'), 'students': students}
+    write_atomic(manifest_path, json.dumps(manifest, sort_keys=True).encode('utf-8'))
+    pruned = prune_chunks(store_dir, set(students.values()) | set(previous['students'].values()))
+    print(f"📦 Published gallery version {version}: {len(students)} students, {written} new chunk(s), "
+          f"{pruned} pruned in {time.perf_counter() - start:.2f}s")
+    return version
+
+
+class GallerySource:
+    """Manifest and chunks from a shared directory or an HTTP server serving the store"""
+
+    def __init__(self, location, timeout=10.0):
+        self.location = location.rstrip('/')
+        self.is_http = location.startswith(('http://', 'https://'))
+        self.timeout = timeout
+        self.bytes_read = 0
+
+    def _read(self, relative_path):
+        if self.is_http:
+            with urlopen(f"{self.location}/{relative_path}", timeout=self.timeout) as response:
+                data = response.read()
+        else:
+            with open(os.path.join(self.location, *relative_path.split('/')), 'rb') as f:
+                data = f.read()
+        self.bytes_read += len(data)
+        return data
+
+    def manifest(self):
+        return json.loads(self._read(MANIFEST_NAME).decode('utf-8'))
+
+    def chunk(self, digest):
+        """Decompressed chunk, verified against its hash"""
+        data = zlib.decompress(self._read(f"chunks/{digest[:2]}/{digest}"))
+        if chunk_hash(data) != digest:
+            raise ValueError(f"Chunk {digest} failed verification")
+        return data
+
+
+def sync_students_table(conn, upserts, removed):
+    """Mirror gallery changes into the kiosk's students table (writer thread)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS students (
+            student_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            registration_date TEXT
+        )
+    ''')
+    conn.executemany('''
+        INSERT INTO students (student_id, name, registration_date) VALUES (?, ?, ?)
+        ON CONFLICT (student_id) DO UPDATE SET name = excluded.name
+    ''', upserts)
+    conn.executemany('DELETE FROM students WHERE student_id = ?', [(student_id,) for student_id in removed])
+
+
+def pull(location, face_data_path=FACE_DATA_PATH, manifest_path=LOCAL_MANIFEST_PATH, db_path=None):
+    """Bring the local gallery up to the source's manifest (kiosk side)
+
+    Every changed chunk is fetched and verified before anything is written.
+    The face data file is then re-read, updated and replaced in one os.replace
+    under its lock, so a registration saved meanwhile is kept and the running
+    app (or a crash) only ever sees the old or the new gallery.
+    Returns a stats dict.
+    """
+    start = time.perf_counter()
+    source = GallerySource(location)
+    remote = source.manifest()
+    local = {'version': 0, 'students': {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            local = json.load(f)
+
+    changed = [student_id for student_id, digest in remote['students'].items()
+               if local['students'].get(student_id) != digest]
+    removed = [student_id for student_id in local['students'] if student_id not in remote['students']]
+    stats = {'version': remote['version'], 'changed': len(changed), 'removed': len(removed),
+             'bytes': 0, 'seconds': 0.0}
+    if not changed and not removed:
+        stats['bytes'] = source.bytes_read
+        stats['seconds'] = time.perf_counter() - start
+        return stats
+
+    fetched = [decode_student(source.chunk(remote['students'][student_id])) for student_id in changed]
+
+    def apply(data):
+        for student_id in removed:
+            data['face_data'].pop(student_id, None)
+            data['students'].pop(student_id, None)
+        for student_id, info, templates in fetched:
+            data['face_data'][student_id] = templates
+            data['students'][student_id] = info
+
+    update_face_data(apply, face_data_path)
+    write_atomic(manifest_path, json.dumps(remote, sort_keys=True).encode('utf-8'))
+
+    if db_path:
+        db = DatabaseManager(db_path, log_retries=False)
+        try:
+            registration_date = time.strftime('%Y-%m-%d %H:%M:%S')
+            db.write(sync_students_table,
+                     [(student_id, info['name'], registration_date) for student_id, info, _ in fetched], removed)
+        finally:
+            db.close()
+
+    stats['bytes'] = source.bytes_read
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+def log_pull(stats):
+    if stats['changed'] or stats['removed']:
+        print(f"🔄 Gallery version {stats['version']}: {stats['changed']} changed, {stats['removed']} removed, "
+              f"{stats['bytes'] / 1024:.1f} KiB in {stats['seconds']:.2f}s")
+    else:
+        print(f"✅ Gallery up to date (version {stats['version']}, {stats['bytes']} bytes checked)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish and pull face gallery updates")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    publish_parser = subparsers.add_parser('publish', help="Publish the local gallery to a store directory")
+    publish_parser.add_argument('store', help="Store directory (shared folder or served over HTTP)")
+    publish_parser.add_argument('--face-data', default=FACE_DATA_PATH)
+
+    serve_parser = subparsers.add_parser('serve', help="Serve a store directory over HTTP")
+    serve_parser.add_argument('store')
+    serve_parser.add_argument('--host', default='0.0.0.0')
+    serve_parser.add_argument('--port', type=int, default=8766)
+
+    pull_parser = subparsers.add_parser('pull', help="Update this kiosk's gallery from a store")
+    pull_parser.add_argument('source', help="Store directory or http://host:port")
+    pull_parser.add_argument('--face-data', default=FACE_DATA_PATH)
+    pull_parser.add_argument('--db', default='smart_attendance.db', help="Kiosk database for the students table")
+    pull_parser.add_argument('--interval', type=float, help="Keep pulling every N seconds")
+
+    args = parser.parse_args()
+    if args.command == 'publish':
+        publish(args.store, args.face_data)
+    elif args.command == 'serve':
+        handler = partial(SimpleHTTPRequestHandler, directory=args.store)
+        httpd = ThreadingHTTPServer((args.host, args.port), handler)
+        print(f"🌐 Serving gallery store {args.store} on http://{args.host}:{args.port}")
+        httpd.serve_forever()
+    else:
+        while True:
+            try:
+                log_pull(pull(args.source, args.face_data, db_path=args.db))
+            except Exception as e:
+                print(f"❌ Gallery pull failed: {e}")
+            if not args.interval:
+                break
+            time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# Live Gallery Reload for the Smart Attendance System
+# Polls the face data file and the database for changes made by other processes
+
+import threading
+import time
+
+import numpy as np
+
+from face_data_file import file_state, load_face_data
+from face_matcher import RosterMatcher, TemplateMatcher
+from student_state import StudentIndex
+
+
+POLL_INTERVAL = 2.0  # seconds between checks
+
+
+class GallerySnapshot:
+    """Immutable gallery, index and matcher, swapped in as one object
+
+    The video loop reads the app's snapshot attribute once per frame, so a
+    match always uses an index and a matcher built from the same data. Built
+    from a `previous` snapshot, students whose template list is the same
+    object reuse its prepared rows, so a reload costs what changed.
+    """
+
+    def __init__(self, face_data, students, dtype='float32', threshold=0.65, threads=1, shift=0, previous=None):
+        self.face_data = dict(face_data)
+        self.students = dict(students)
+        self.index = StudentIndex(self.students, self.face_data)
+        self.gallery = [self.face_data[student_id] for student_id in self.index.ids]
+        self.matcher = TemplateMatcher(self.gallery, threshold, dtype, threads, shift,
+                                       previous.matcher if previous is not None else None)
+        self._roster = (None, None)
+
+    def roster_matcher(self, roster_ids):
+        """RosterMatcher for a course roster, built once per snapshot"""
+        key = tuple(sorted(roster_ids))
+        if self._roster[0] != key:
+            positions = [self.index.position(student_id) for student_id in key]
+            self._roster = (key, RosterMatcher(self.matcher, [position for position in positions if position >= 0]))
+        return self._roster[1]
+
+
+def same_templates(old, new):
+    return len(old) == len(new) and all(a.shape == b.shape and np.array_equal(a, b) for a, b in zip(old, new))
+
+
+class GalleryWatcher:
+    """Background thread that notices gallery changes from other processes
+
+    Two cheap checks run every interval: the face data file's mtime/size
+    (registrations, gallery_sync pulls) and the database's PRAGMA data_version
+    (any commit by another connection, e.g. deleteone.py). Only when one moves
+    is the file re-read and diffed against the current snapshot, by the
+    per-student revisions the file's writers stamp (templates are compared
+    only for a student without one). Unchanged students keep their existing
+    template arrays; students deleted from the students table are dropped
+    even if the file still lists them. The new snapshot is built on this
+    thread and handed to `apply`. Saves this process reports through
+    own_write() are not reloaded.
+    """
+
+    def __init__(self, face_data_path, db, current, apply, interval=POLL_INTERVAL, revisions=None):
+        self.face_data_path = face_data_path
+        self.db = db
+        self.current = current  # () -> the snapshot in use
+        self.apply = apply      # (face_data, students, changes) -> None, called on the watcher thread
+        self.interval = interval
+        self.reloads = 0
+        self._lock = threading.Lock()  # Guards the file state and revisions shared with own_write()
+        self._file_state = file_state(face_data_path)
+        self._revisions = dict(revisions or {})  # Student revisions of the file last applied
+        self._data_version = None
+        self._db_ids = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="gallery-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def own_write(self, before, after, revisions):
+        """Note a save of this process (update_face_data's result) that the app has already applied
+
+        Skipped only if nothing else changed the file since the last reload,
+        i.e. the file was still in the state this watcher had seen.
+        """
+        with self._lock:
+            if self._file_state != before:
+                return False
+            self._file_state = after
+            self._revisions = dict(revisions)
+            return True
+
+    def _read_db_state(self):
+        # data_version is per connection, so it is only ever read on the watcher thread
+        conn = self.db.connection()
+        version = conn.execute('PRAGMA data_version').fetchone()[0]
+        ids = {row[0] for row in conn.execute('SELECT student_id FROM students')}
+        return version, ids
+
+    def _run(self):
+        self._data_version, self._db_ids = self._read_db_state()
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    self.poll()
+                except Exception as e:
+                    print(f"⚠️ Gallery reload failed, will retry: {e}")
+        finally:
+            self.db.release()
+
+    def poll(self):
+        """Apply any change since the last poll; returns the changes dict or None"""
+        with self._lock:
+            state = file_state(self.face_data_path)
+            file_changed = state != self._file_state
+            known, known_state = self._revisions, self._file_state
+        removed_from_db = set()
+        version = self.db.connection().execute('PRAGMA data_version').fetchone()[0]
+        if version != self._data_version:
+            version, ids = self._read_db_state()
+            removed_from_db = self._db_ids - ids
+            self._data_version, self._db_ids = version, ids
+        if not file_changed and not removed_from_db:
+            return None
+
+        snapshot = self.current()
+        face_data = snapshot.face_data
+        students = snapshot.students
+        revisions = known
+        if file_changed:
+            data = load_face_data(self.face_data_path)
+            face_data, students, revisions = data['face_data'], data['students'], data['revisions']
+
+        def same(student_id):
+            if student_id in known and student_id in revisions:
+                return known[student_id] == revisions[student_id]
+            return same_templates(old[student_id], face_data[student_id])
+
+        old = snapshot.face_data
+        added = [student_id for student_id in face_data if student_id not in old and student_id not in removed_from_db]
+        removed = [student_id for student_id in old if student_id not in face_data or student_id in removed_from_db]
+        changed = [student_id for student_id in face_data
+                   if student_id in old and student_id not in removed and not same(student_id)]
+        renamed = [student_id for student_id in students
+                   if student_id in snapshot.students and student_id not in removed
+                   and student_id not in changed
+                   and students[student_id].get('name') != snapshot.students[student_id].get('name')]
+        with self._lock:
+            if file_changed and self._file_state == known_state:
+                self._file_state, self._revisions = state, revisions
+        if not (added or removed or changed or renamed):
+            return None
+
+        # Unchanged students keep the arrays already in memory
+        merged_faces = {student_id: old[student_id] if student_id in old and student_id not in changed else templates
+                        for student_id, templates in face_data.items() if student_id not in removed_from_db}
+        merged_students = {student_id: info for student_id, info in students.items()
+                           if student_id not in removed_from_db}
+        changes = {'added': added, 'removed': removed, 'changed': changed + renamed}
+        start = time.perf_counter()
+        self.apply(merged_faces, merged_students, changes)
+        self.reloads += 1
+        print(f"🔄 Gallery reloaded: +{len(added)} -{len(removed)} ~{len(changes['changed'])} "
+              f"({time.perf_counter() - start:.2f}s)")
+        return changes
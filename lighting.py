@@ -0,0 +1,65 @@
+# Lighting Normalization for the Smart Attendance System
+# Grid-sampled brightness estimate + precomputed 256-entry LUTs, grayscale only
+
+import cv2
+import numpy as np
+
+
+BRIGHTNESS_BINS = 32  # one LUT per 8 grey levels of estimated brightness
+
+
+class LightingNormalizer:
+    """Corrects under/over-exposed grayscale frames with cached lookup tables
+
+    Brightness is the mean of every `grid_step`-th pixel in both directions.
+    Frames whose brightness falls inside [dark, bright] pass through untouched;
+    others get a gamma curve that pulls their mean toward `target`, followed by
+    a linear contrast stretch. CLAHE, when enabled, runs on face crops only.
+    """
+
+    def __init__(self, grid_step=8, dark=80, bright=180, target=128, contrast=1.1,
+                 use_clahe=False, clahe_clip=2.0, clahe_grid=(4, 4)):
+        self.grid_step = grid_step
+        self.dark = dark
+        self.bright = bright
+        self.target = target
+        self.contrast = contrast
+        self.clahe = cv2.createCLAHE(clipLimit=clahe_clip, tileGridSize=clahe_grid) if use_clahe else None
+        self.luts = [self._build_lut(bin_index) for bin_index in range(BRIGHTNESS_BINS)]
+
+    def _build_lut(self, bin_index):
+        """LUT for one brightness bin, or None for the untouched mid range"""
+        step = 256 // BRIGHTNESS_BINS
+        mean = bin_index * step + step / 2
+        if self.dark <= mean <= self.bright:
+            return None
+
+        # gamma such that mean ** gamma lands on target (in 0..1 space)
+        gamma = np.log(self.target / 255.0) / np.log(mean / 255.0)
+        gamma = float(np.clip(gamma, 0.4, 2.5))
+        levels = np.arange(256, dtype=np.float32) / 255.0
+        curve = 255.0 * np.power(levels, gamma)
+        curve = (curve - self.target) * self.contrast + self.target
+        return np.clip(curve, 0, 255).astype(np.uint8)
+
+    def estimate_brightness(self, gray):
+        """Mean grey level from a sparse sampling grid"""
+        return float(gray[::self.grid_step, ::self.grid_step].mean())
+
+    def lut_for(self, gray):
+        """The LUT this frame needs (None when no correction applies)"""
+        brightness = self.estimate_brightness(gray)
+        return self.luts[min(int(brightness) * BRIGHTNESS_BINS // 256, BRIGHTNESS_BINS - 1)]
+
+    def normalize(self, gray):
+        """Lighting-corrected copy of a grayscale frame (or the frame itself)"""
+        lut = self.lut_for(gray)
+        if lut is None:
+            return gray
+        return cv2.LUT(gray, lut)
+
+    def normalize_face(self, face_roi):
+        """Local contrast equalization on a face crop when CLAHE is enabled"""
+        if self.clahe is None:
+            return face_roi
+        return self.clahe.apply(face_roi)
@@ -0,0 +1,152 @@
+# Field Profiling for the Smart Attendance System
+# cProfile around the capture/recognition loop plus periodic tracemalloc snapshots
+
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+
+
+PROFILE_DIR = 'attendance_records'
+SNAPSHOT_INTERVAL = 30.0  # seconds between tracemalloc snapshots
+TOP_N = 30                # rows in the hot-function and allocation reports
+TRACE_FRAMES = 10         # stack depth kept per allocation
+
+# Allocations made by the profilers themselves
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+class LoopProfiler:
+    """Collects CPU and memory profiles of a frame loop for offline diagnosis
+
+    Wrap each run of the loop in enable()/disable() and call tick() once per
+    frame; several runs (attendance sessions) add up. finish() writes three
+    files to attendance_records/: a .pstats file for pstats/snakeviz, a
+    hot-function report and an allocation-growth report. cProfile sees only
+    the loop's thread; tracemalloc sees allocations from every thread.
+    """
+
+    def __init__(self, name, out_dir=PROFILE_DIR, snapshot_interval=SNAPSHOT_INTERVAL, top=TOP_N):
+        self.name = name
+        self.out_dir = out_dir
+        self.snapshot_interval = snapshot_interval
+        self.top = top
+        self.profile = cProfile.Profile()
+        self.frames = 0
+        self.loop_seconds = 0.0
+        self.snapshot_seconds = 0.0  # Spent in tracemalloc snapshots, excluded from loop time
+        self.timeline = []  # (seconds since start, frames, traced bytes, peak bytes)
+        self.growth = []    # (seconds since start, top allocation growth since the previous snapshot)
+        self._started = None
+        self._enabled_at = None
+        self._counted_snapshots = 0.0
+        self._baseline = None
+        self._previous = None
+        self._next_snapshot = None
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+    def enable(self):
+        """Start (or resume) profiling the calling thread"""
+        if self._started is None:
+            self._started = time.perf_counter()
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACE_FRAMES)
+            self._baseline = self._previous = self._snapshot()
+            self._next_snapshot = self._started + self.snapshot_interval
+        self._enabled_at = time.perf_counter()
+        self.profile.enable()
+
+    def disable(self):
+        self.profile.disable()
+        if self._enabled_at is not None:
+            self.loop_seconds += time.perf_counter() - self._enabled_at
+            self._enabled_at = None
+            self.loop_seconds -= self.snapshot_seconds - self._counted_snapshots
+            self._counted_snapshots = self.snapshot_seconds
+
+    def tick(self):
+        """Count a frame and take a memory snapshot when one is due"""
+        self.frames += 1
+        now = time.perf_counter()
+        if now >= self._next_snapshot:
+            self.profile.disable()  # Keep snapshot cost out of the CPU profile
+            self._record_snapshot(now)
+            done = time.perf_counter()
+            self.snapshot_seconds += done - now
+            self._next_snapshot = done + self.snapshot_interval
+            self.profile.enable()
+
+    def _record_snapshot(self, now):
+        snapshot = self._snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        elapsed = now - self._started
+        self.timeline.append((elapsed, self.frames, current, peak))
+        self.growth.append((elapsed, snapshot.compare_to(self._previous, 'lineno')[:5]))
+        self._previous = snapshot
+
+    def finish(self):
+        """Write the reports; returns their paths (empty if the loop never ran)"""
+        if self._started is None:
+            return []
+        self.disable()
+        self._record_snapshot(time.perf_counter())
+        final = self._previous
+        tracemalloc.stop()
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d_%H%M%S')
+        base = os.path.join(self.out_dir, f"profile_{self.name}_{stamp}")
+        paths = [base + '.pstats', base + '_hotspots.txt', base + '_allocations.txt']
+
+        self.profile.dump_stats(paths[0])
+        with open(paths[1], 'w', encoding='utf-8') as f:
+            f.write(self.hotspot_report())
+        with open(paths[2], 'w', encoding='utf-8') as f:
+            f.write(self.allocation_report(final))
+
+        print(f"📊 Profile written: {', '.join(paths)}")
+        return paths
+
+    def hotspot_report(self):
+        fps = self.frames / self.loop_seconds if self.loop_seconds else 0.0
+        out = io.StringIO()
+        out.write(f"{self.name}: {self.frames} frames in {self.loop_seconds:.1f}s of loop time ({fps:.1f} FPS, "
+                  f"under tracing; {self.snapshot_seconds:.1f}s more in memory snapshots)\n\n")
+        for sort, title in (('tottime', "own time"), ('cumulative', "cumulative time")):
+            out.write(f"=== Top {self.top} functions by {title} ===\n")
+            stats = pstats.Stats(self.profile, stream=out)
+            stats.strip_dirs().sort_stats(sort).print_stats(self.top)
+        return out.getvalue()
+
+    def allocation_report(self, final):
+        out = io.StringIO()
+        out.write("=== Traced memory over time ===\n")
+        out.write(f"{'seconds':>9} {'frames':>8} {'current MiB':>12} {'peak MiB':>10}\n")
+        for elapsed, frames, current, peak in self.timeline:
+            out.write(f"{elapsed:9.1f} {frames:8d} {current / 2**20:12.2f} {peak / 2**20:10.2f}\n")
+
+        out.write(f"\n=== Top {self.top} allocation sites by growth since the loop started ===\n")
+        for stat in final.compare_to(self._baseline, 'lineno')[:self.top]:
+            out.write(f"{stat}\n")
+
+        out.write("\n=== Largest growth per snapshot interval ===\n")
+        for elapsed, stats in self.growth:
+            out.write(f"-- at {elapsed:.1f}s\n")
+            for stat in stats:
+                out.write(f"   {stat}\n")
+
+        out.write(f"\n=== Tracebacks of the {min(self.top, 5)} largest growing sites ===\n")
+        for stat in final.compare_to(self._baseline, 'traceback')[:min(self.top, 5)]:
+            out.write(f"{stat.size_diff / 1024:+.1f} KiB in {stat.count_diff:+d} blocks\n")
+            for line in stat.traceback.format():
+                out.write(f"   {line}\n")
+        return out.getvalue()
@@ -0,0 +1,209 @@
+# Multiprocess Recognition Stage for the Smart Attendance System
+# Frames go through a shared-memory ring; workers return only compact result tuples
+
+import multiprocessing
+import queue
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from face_matcher import RosterMatcher, TemplateMatcher
+from lighting import LightingNormalizer
+
+
+SLOTS_PER_WORKER = 2  # One frame being scored plus one waiting, per worker
+
+
+class FrameRing:
+    """Fixed-size frame slots in one shared memory segment
+
+    Slot ownership is tracked only in the owning (capture) process: a slot is
+    either in `free` or lent to exactly one in-flight task, and comes back
+    when that task's result arrives. acquire() returns None when every slot
+    is lent out, which is the backpressure signal.
+    """
+
+    def __init__(self, slots, shape, dtype=np.uint8):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * int(np.prod(shape)) * self.dtype.itemsize)
+        self.frames = np.ndarray((slots,) + self.shape, self.dtype, buffer=self.shm.buf)
+        self.free = deque(range(slots))
+
+    def acquire(self):
+        return self.free.popleft() if self.free else None
+
+    def release(self, slot):
+        self.free.append(slot)
+
+    def close(self):
+        del self.frames
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _attach_ring(shm_name, slots, shape, dtype):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    return shm, np.ndarray((slots,) + tuple(shape), np.dtype(dtype), buffer=shm.buf)
+
+
+def _worker_main(shm_name, slots, shape, dtype, use_clahe, tasks, results):
+    """Worker process: score face crops read straight from the frame ring"""
+    # Spawned workers share the capture process's resource tracker, so the segment
+    # is unlinked once, by the capture process, in FrameRing.close()
+    shm, frames = _attach_ring(shm_name, slots, shape, dtype)
+    lighting = LightingNormalizer(use_clahe=use_clahe)
+    matcher = None
+    version = -1
+    try:
+        while True:
+            message = tasks.get()
+            if message is None:
+                break
+            if message[0] == 'gallery':
+                _, version, gallery, threshold, gallery_dtype, threads, shift, roster_positions = message
+                matcher = TemplateMatcher(gallery, threshold, gallery_dtype, threads, shift)
+                if roster_positions is not None:
+                    matcher = RosterMatcher(matcher, roster_positions)
+                continue
+            if message[0] == 'ring':
+                # Frames changed shape; every task on the old ring has already been answered
+                del frames
+                shm.close()
+                shm, frames = _attach_ring(*message[1:])
+                continue
+
+            _, seq, slot, boxes = message
+            gray = frames[slot]
+            crops = [lighting.normalize_face(gray[y:y+h, x:x+w]) for (x, y, w, h) in boxes]
+            fallback = getattr(matcher, 'fallback_faces', 0)
+            positions = matcher.match_batch(crops) if matcher is not None else [-1] * len(crops)
+            results.put((seq, slot, version, tuple(positions), getattr(matcher, 'fallback_faces', 0) - fallback))
+    finally:
+        del frames
+        shm.close()
+
+
+class RecognitionWorkers:
+    """Pool of recognition processes fed through a FrameRing
+
+    submit() copies one grayscale frame into a free slot and sends only
+    (seq, slot, boxes) to the least busy worker; when no slot is free the
+    frame is dropped instead of stalling the video loop. poll() returns
+    finished (seq, version, positions, fallback_faces) tuples and recycles
+    their slots. Results carry the gallery version they were scored with,
+    so callers can discard results from before a reload. A frame of a new
+    shape (camera or profile change) replaces the ring once the tasks still
+    on the old one have finished; frames submitted until then are dropped.
+    """
+
+    def __init__(self, workers, frame_shape, slots=None, use_clahe=False):
+        context = multiprocessing.get_context('spawn')  # Never fork a process that runs Tk
+        self.ring = FrameRing(slots or workers * SLOTS_PER_WORKER, frame_shape)
+        self.results = context.Queue()
+        self.tasks = [context.Queue() for _ in range(workers)]
+        self.in_flight = [0] * workers
+        self.owner = {}  # seq -> worker holding its slot
+        self.carried = []  # Results collected while resizing the ring, returned by the next poll()
+        self.next_seq = 0
+        self.submitted = 0
+        self.dropped = 0
+        self.completed = 0
+        self.processes = [
+            context.Process(target=_worker_main, name=f"recognition-{i}", daemon=True,
+                            args=(self.ring.shm.name, self.ring.slots, self.ring.shape, self.ring.dtype.str,
+                                  use_clahe, tasks, self.results))
+            for i, tasks in enumerate(self.tasks)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def set_gallery(self, version, gallery, threshold=0.65, dtype='float32', threads=1, shift=0,
+                    roster_positions=None):
+        """Send a gallery to every worker; later tasks are scored against it"""
+        if roster_positions is not None:
+            roster_positions = [int(position) for position in roster_positions]
+        for tasks in self.tasks:
+            tasks.put(('gallery', version, gallery, threshold, dtype, threads, shift, roster_positions))
+
+    def submit(self, gray, boxes):
+        """Queue a frame's face boxes for recognition; returns its seq, or None if dropped"""
+        if gray.shape != self.ring.shape and not self.resize(gray.shape):
+            self.dropped += 1
+            return None
+        slot = self.ring.acquire()
+        if slot is None:
+            self.dropped += 1
+            return None
+        self.ring.frames[slot] = gray
+        worker = self.in_flight.index(min(self.in_flight))
+        seq = self.next_seq
+        self.next_seq += 1
+        self.in_flight[worker] += 1
+        self.owner[seq] = worker
+        self.submitted += 1
+        self.tasks[worker].put(('frame', seq, slot, [tuple(int(v) for v in box) for box in boxes]))
+        return seq
+
+    def resize(self, shape):
+        """Replace the ring with one for frames of `shape`; False while old tasks are still running
+
+        Never waits: results that have arrived are kept for the next poll(),
+        and the caller simply tries again with a later frame.
+        """
+        self.carried.extend(self._collect())
+        if self.owner:
+            return False
+        old = self.ring
+        self.ring = FrameRing(old.slots, shape, old.dtype)
+        for tasks in self.tasks:
+            tasks.put(('ring', self.ring.shm.name, self.ring.slots, self.ring.shape, self.ring.dtype.str))
+        old.close()
+        return True
+
+    def poll(self, timeout=None):
+        """Finished results in completion order; waits up to `timeout` for the first one"""
+        finished, self.carried = self.carried, []
+        finished.extend(self._collect(timeout if not finished else None))
+        if not finished and self.owner and not all(process.is_alive() for process in self.processes):
+            raise RuntimeError("A recognition worker exited unexpectedly")
+        return finished
+
+    def _collect(self, timeout=None):
+        finished = []
+        while True:
+            try:
+                seq, slot, version, positions, fallback = self.results.get(block=timeout is not None and not finished,
+                                                                          timeout=timeout)
+            except queue.Empty:
+                break
+            self.ring.release(slot)
+            self.in_flight[self.owner.pop(seq)] -= 1
+            self.completed += 1
+            finished.append((seq, version, positions, fallback))
+        return finished
+
+    def drain(self, timeout=5.0):
+        """Results of every task still in flight"""
+        finished = []
+        while self.owner:
+            batch = self.poll(timeout)
+            if not batch:
+                break
+            finished.extend(batch)
+        return finished
+
+    def close(self):
+        for tasks in self.tasks:
+            tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.ring.close()
+
+    def stats(self):
+        return {'submitted': self.submitted, 'completed': self.completed, 'dropped': self.dropped,
+                'in_flight': len(self.owner)}
@@ -2,7 +2,7 @@
 # Fixed version with duplicate prevention and clean interface
 
 import os
-import sqlite3
+import threading
 import cv2
 import numpy as np
 import tkinter as tk
@@ -11,29 +11,71 @@ from datetime import datetime
 import pandas as pd
 import pickle
 import time
+import argparse
+import json
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from attendance_analytics import AttendanceAnalytics
+from attendance_config import PERFORMANCE_PROFILES, PROFILE_SUMMARIES, ConfigError, load_config
+from attendance_db import DatabaseManager, is_lock_error
+from attendance_export import AttendanceExporter, available_formats
+from camera_profiles import PROFILES, auto_probe, open_capture
+from course_roster import CourseRoster
+from face_data_file import FACE_DATA_PATH, update_face_data
+from face_detectors import DetectorChain
+from face_gallery import build_templates
+from frame_replay import FrameRecorder, ReplayCapture
+from frame_scheduler import AdaptiveFrameScheduler
+from gallery_watcher import GallerySnapshot, GalleryWatcher
+from lighting import LightingNormalizer
+from recognition_workers import RecognitionWorkers
+from loop_profiler import LoopProfiler
+from student_state import StudentRuntimeState
+
+
+PENDING_MARKS_PATH = os.path.join('attendance_records', 'pending_marks.jsonl')
+MARK_WAIT = 0.05  # Seconds the video loop waits for a mark's result before leaving it queued
 
 
 class SmartAttendanceSystem:
-    def __init__(self):
+    def __init__(self, replay_path=None, replay_speed='recorded', record_path=None, profile=False, config=None):
         print("🚀 Initializing Smart Attendance System...")
         
         # Initialize all attributes first
         self.root = tk.Tk()
         self.root.title("Smart Face Recognition Attendance System")
-        self.root.geometry("1000x700")
+        self.root.geometry("1000x760")
         self.root.configure(bg="#2c3e50")
         
         self.is_capturing = False
-        self.face_data = {}
-        self.students = {}
-        self.last_recognition = {}  # Track last recognition time for each student
-        self.recognition_cooldown = 10  # 10 seconds cooldown between recognitions
+        # Gallery, index and matcher; never changed in place, only replaced as one reference
+        # (face_data, students and matcher read from it)
+        self.gallery_snapshot = None
+        self.gallery_lock = threading.Lock()  # One snapshot built from the current one at a time
+        self.gallery_watcher = None  # Picks up registrations/deletions made by other processes
+        self.runtime_state = None  # Per-position arrays for the live session
+        self.session_course = None  # Course whose roster scopes the next attendance session
+        self.session_roster = None  # Student IDs of the running course session's roster
+        self.pending_marks = []  # Marks not yet written, oldest first; the first may be in flight
+        self.mark_future = None  # Writer-thread result of pending_marks[0], once submitted
+        self.scheduler = None  # Frame scheduler of the running session
+        self.camera_source = 0
+        self.replay_path = replay_path  # Recorded frames to use instead of the camera
+        self.replay_speed = replay_speed  # 'recorded' timing or 'max'
+        self.record_path = record_path  # Save live session frames for later replay
+        self.profiler = LoopProfiler('smart_attendance') if profile else None  # Reports written on exit
+        self.capture_profile = None
+        self.lighting = LightingNormalizer()  # Same correction for registration and attendance
         
-        # Initialize face cascade
+        # Tunables (detection, matching, registration, scheduling) from the performance profile
+        self.config = config or load_config()
+        self.apply_settings(self.config)
+        self.install_gallery(self.build_snapshot({}, {}))
+        
+        # Initialize face detectors (cheapest first, fallbacks on misses)
         try:
-            cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            self.face_cascade = cv2.CascadeClassifier(cascade_path)
-            print("✅ Face detector loaded successfully")
+            self.detectors = self.build_detectors(self.config)
+            print(f"✅ Face detectors loaded: {', '.join(b.name for b in self.detectors.backends)}")
         except Exception as e:
             messagebox.showerror("Error", f"Could not load face detector: {e}")
             return
@@ -44,8 +86,16 @@ class SmartAttendanceSystem:
         # Create directories
         self.create_directories()
         
-        # Load existing data
-        self.load_face_data()
+        # Load existing data, then follow changes made by other processes
+        revisions = self.load_face_data()
+        self.gallery_watcher = GalleryWatcher(FACE_DATA_PATH, self.db, lambda: self.gallery_snapshot,
+                                              self.apply_gallery_update, revisions=revisions)
+        self.gallery_watcher.start()
+        
+        # Pick the camera mode in the background while the GUI comes up
+        self.camera_probe = threading.Thread(target=self.select_capture_profile,
+                                             name="camera-probe", daemon=True)
+        self.camera_probe.start()
         
         # Setup GUI
         self.setup_gui()
@@ -55,36 +105,66 @@ class SmartAttendanceSystem:
     def init_database(self):
         """Initialize SQLite database"""
         try:
-            self.conn = sqlite3.connect('smart_attendance.db', check_same_thread=False)
-            self.cursor = self.conn.cursor()
-            
-            # Students table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS students (
-                    student_id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    registration_date TEXT
-                )
-            ''')
-            
-            # Attendance table with UNIQUE constraint to prevent duplicates
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS attendance (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    student_id TEXT,
-                    name TEXT,
-                    date TEXT,
-                    time TEXT,
-                    status TEXT DEFAULT 'Present',
-                    UNIQUE(student_id, date)
-                )
-            ''')
-            
-            self.conn.commit()
+            # Per-thread readers, one writer thread for every INSERT/UPDATE
+            self.db = DatabaseManager('smart_attendance.db')
+            self.db.write(self.prepare_storage)
+            
+            # Rollups for analytics, built once from any existing history
+            self.analytics = AttendanceAnalytics(self.db.connection(), self.db.partitions())
+            if self.analytics.needs_rebuild():
+                self.db.write(self.rebuild_rollups)
+            
+            # Marks left over from a previous run that could not reach the database
+            self.load_pending_marks()
+            
             print("✅ Database initialized with duplicate prevention")
         except Exception as e:
             print(f"❌ Database error: {e}")
     
+    def prepare_storage(self, conn):
+        """Create tables, migrate legacy marks and open the active partition (writer thread)"""
+        # Students table
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS students (
+                student_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                registration_date TEXT
+            )
+        ''')
+        
+        # Legacy single attendance table - rows are migrated into partitions
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS attendance (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                student_id TEXT,
+                name TEXT,
+                date TEXT,
+                time TEXT,
+                status TEXT DEFAULT 'Present',
+                UNIQUE(student_id, date)
+            )
+        ''')
+        
+        # Date index for range filters and ordered exports
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_attendance_date
+            ON attendance (date, time)
+        ''')
+        
+        conn.commit()
+        
+        # Marks live in per-month partition files with UNIQUE(student_id, date)
+        partitions = self.db.partitions()
+        partitions.migrate_legacy()
+        partitions.active_table()
+        
+        AttendanceAnalytics(conn, partitions).ensure_schema()
+        CourseRoster(conn).ensure_schema()
+    
+    def rebuild_rollups(self, conn):
+        """Rebuild analytics rollups from all partitions (writer thread)"""
+        return AttendanceAnalytics(conn, self.db.partitions()).rebuild()
+    
     def create_directories(self):
         """Create necessary directories"""
         for directory in ['faces', 'attendance_records']:
@@ -125,6 +205,9 @@ class SmartAttendanceSystem:
             ("📊 Today's Records", self.view_today, "#e74c3c"),
             ("📈 All Records", self.view_all, "#f39c12"),
             ("👥 Students", self.view_students, "#9b59b6"),
+            ("📉 Analytics", self.view_analytics, "#8e44ad"),
+            ("💾 Export Records", self.export_records, "#16a085"),
+            ("⚙️ Performance", self.choose_performance_profile, "#7f8c8d"),
             ("❌ Exit", self.exit_app, "#e74c3c")
         ]
         
@@ -274,7 +357,7 @@ class SmartAttendanceSystem:
                                     "Ready?") != 'yes':
                 return
             
-            cap = cv2.VideoCapture(0)
+            cap = self.open_camera()
             if not cap.isOpened():
                 messagebox.showerror("Error", "Cannot access camera!")
                 return
@@ -287,19 +370,19 @@ class SmartAttendanceSystem:
                     break
                 
                 frame = cv2.flip(frame, 1)
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+                gray = self.lighting.normalize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+                faces = self.detectors.detect(gray, self.min_face_size)
                 
                 for (x, y, w, h) in faces:
                     cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
                     cv2.putText(frame, "Press SPACE to capture", 
                                (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-                    captured_face = gray[y:y+h, x:x+w]
+                    captured_face = self.lighting.normalize_face(gray[y:y+h, x:x+w])
                 
                 # Display info
                 cv2.putText(frame, f"{name} ({student_id})", (10, 30),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-                cv2.putText(frame, f"Templates: {len(face_templates)}/6", (10, 60),
+                cv2.putText(frame, f"Templates: {len(face_templates)}/{self.templates_per_student}", (10, 60),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
                 cv2.putText(frame, "SPACE=Capture, Q=Finish", (10, 90),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
@@ -309,14 +392,9 @@ class SmartAttendanceSystem:
                 key = cv2.waitKey(1) & 0xFF
                 if key == ord(' ') and len(faces) > 0:
                     # Capture templates at different sizes
-                    for size in [50, 75, 100]:
-                        try:
-                            resized = cv2.resize(captured_face, (size, size))
-                            face_templates.append(resized)
-                        except:
-                            continue
+                    face_templates.extend(build_templates(captured_face, self.template_sizes))
                     
-                    if len(face_templates) >= 6:
+                    if len(face_templates) >= self.templates_per_student:
                         break
                 
                 elif key == ord('q'):
@@ -326,21 +404,26 @@ class SmartAttendanceSystem:
             cv2.destroyAllWindows()
             
             if face_templates:
-                # Save student
-                self.face_data[student_id] = face_templates
-                self.students[student_id] = {'name': name, 'id': student_id}
-                
+                info = {'name': name, 'id': student_id}
                 try:
-                    self.cursor.execute('''
-                        INSERT INTO students (student_id, name, registration_date)
-                        VALUES (?, ?, ?)
-                    ''', (student_id, name, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
-                    self.conn.commit()
+                    self.db.write(self.insert_student, student_id, name,
+                                  datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
                     
-                    self.save_face_data()
+                    # Saved before the snapshot is installed, so the watcher never reloads an older file over it
+                    self.save_face_data({student_id: face_templates}, {student_id: info})
+                    thread = threading.Thread(target=self.add_to_gallery, args=(student_id, face_templates, info),
+                                              name="registration-gallery", daemon=True)
+                    thread.start()
                     messagebox.showinfo("Success", f"✅ {name} registered successfully!")
-                    self.update_status()
-                    self.load_recent_activity()
+                    
+                    def refresh():
+                        if thread.is_alive():
+                            self.root.after(100, refresh)
+                        else:
+                            self.update_status()
+                            self.load_recent_activity()
+                    
+                    refresh()
                     
                 except Exception as e:
                     messagebox.showerror("Error", f"Database error: {e}")
@@ -361,183 +444,447 @@ class SmartAttendanceSystem:
             self.stop_attendance()
             return
         
+        # Optionally scope the session to one course's roster
+        courses = CourseRoster(self.db.connection()).courses()
+        self.session_course = None
+        if courses:
+            listing = "\n".join(f"{course_id} - {name} ({enrolled} enrolled)"
+                                 for course_id, name, enrolled in courses)
+            course_id = tk.simpledialog.askstring(
+                "Attendance Session",
+                f"Start session for course (leave blank for all students):\n\n{listing}")
+            if course_id is None:
+                return
+            course_id = course_id.strip()
+            if course_id:
+                if course_id not in {course[0] for course in courses}:
+                    messagebox.showerror("Error", f"Unknown course '{course_id}'")
+                    return
+                self.session_course = course_id
+        
         self.is_capturing = True
         self.buttons["📸 Take Attendance"]["text"] = "🛑 Stop Attendance"
         self.live_status.config(text="🔴 LIVE: Taking attendance...", fg="#e74c3c")
         
-        # Reset recognition tracking
-        self.last_recognition = {}
-        
         self.attendance_process()
     
     def attendance_process(self):
         """Smart attendance process with duplicate prevention"""
+        workers = None
         try:
-            cap = cv2.VideoCapture(0)
+            cap = self.open_camera()
             if not cap.isOpened():
                 self.stop_attendance()
                 return
             
             today = datetime.now().strftime('%Y-%m-%d')
-            already_marked = self.get_today_marked()
-            current_session_marked = set()
+            
+            # Fresh per-position state for this session
+            snapshot = self.gallery_snapshot
+            index = snapshot.index
+            state = StudentRuntimeState(len(index), self.recognition_cooldown)
+            self.runtime_state = state
+            
+            # Course sessions match the roster first and record marks per session
+            session_id = None
+            matcher = snapshot.matcher
+            fallback_faces = 0  # Roster misses from matchers replaced by a reload
+            if self.session_course:
+                roster_ids = CourseRoster(self.db.connection()).roster(self.session_course)
+                self.session_roster = roster_ids
+                matcher = snapshot.roster_matcher(roster_ids)
+                session_id = self.db.write(self.open_session, self.session_course, today,
+                                           datetime.now().strftime('%H:%M:%S'))
+                print(f"📚 Session {session_id} for {self.session_course}: "
+                      f"{len(matcher)} of {len(roster_ids)} enrolled students have templates")
+                state.load_present_today(index, self.get_today_marked())
+                already_marked = "Already marked this session"
+            else:
+                state.load_marked_today(index, self.get_today_marked())
+                already_marked = "Already marked today"
+            names = index.names
+            student_ids = index.ids
+            
+            # Decides how often detection/recognition run on this hardware
+            scheduler = AdaptiveFrameScheduler(self.target_fps, self.max_latency)
+            self.scheduler = scheduler
+            detections = []  # (x, y, w, h, label, color) redrawn on skipped frames
+            recorder = FrameRecorder(self.record_path) if self.record_path and not self.replay_path else None
+            workers = None  # Recognition processes, started on the first analyzed frame
+            in_flight = {}  # seq -> (face boxes, capture time) of frames out at the workers
+            gallery_version = 0  # Bumped on every reload so stale worker results are dropped
+            if self.profiler:
+                self.profiler.enable()
             
             while self.is_capturing:
-                ret, frame = cap.read()
+                frame_start = time.perf_counter()
+                with scheduler.stage('capture'):
+                    ret, frame = cap.read()
                 if not ret:
+                    if self.replay_path:
+                        break  # End of the recording
                     continue
                 
+                if recorder:
+                    recorder.write(frame)
                 frame = cv2.flip(frame, 1)
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                faces = self.face_cascade.detectMultiScale(gray, 1.3, 5, minSize=(50, 50))
-                
-                current_time = time.time()
+                processed = scheduler.should_process()
                 
-                for (x, y, w, h) in faces:
-                    face_roi = gray[y:y+h, x:x+w]
-                    best_match = self.match_face(face_roi)
+                if processed:
+                    # A reloaded gallery is picked up between frames, never during a match
+                    if self.gallery_snapshot is not snapshot:
+                        previous, snapshot = snapshot, self.gallery_snapshot
+                        state = state.remap(previous.index, snapshot.index)
+                        self.runtime_state = state
+                        index = snapshot.index
+                        names = index.names
+                        student_ids = index.ids
+                        if session_id is not None:
+                            fallback_faces += matcher.fallback_faces
+                            matcher = snapshot.roster_matcher(roster_ids)
+                        else:
+                            matcher = snapshot.matcher
+                        gallery_version += 1
+                        if workers:
+                            self.send_gallery(workers, gallery_version, snapshot, matcher, session_id)
                     
-                    name = "Unknown"
-                    student_id = "Unknown"
-                    color = (0, 0, 255)
-                    status = ""
+                    with scheduler.stage('detect'):
+                        gray = self.lighting.normalize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+                        faces = self.detectors.detect(gray, self.min_face_size)
                     
-                    if best_match:
-                        student_id = best_match
-                        name = self.students[student_id]['name']
-                        
-                        # Check if already marked today
-                        if student_id in already_marked:
-                            color = (255, 165, 0)  # Orange
-                            status = "Already marked today"
-                        
-                        # Check cooldown period for this session
-                        elif student_id in self.last_recognition:
-                            time_since_last = current_time - self.last_recognition[student_id]
-                            if time_since_last < self.recognition_cooldown:
-                                color = (255, 255, 0)  # Yellow
-                                status = f"Wait {int(self.recognition_cooldown - time_since_last)}s"
-                            else:
-                                # Ready to mark
-                                if self.mark_attendance_smart(name, student_id):
-                                    already_marked.add(student_id)
-                                    current_session_marked.add(student_id)
-                                    self.last_recognition[student_id] = current_time
-                                    color = (0, 255, 0)  # Green
-                                    status = "✓ MARKED"
-                                    self.live_status.config(text=f"🎉 Marked: {name}", fg="#27ae60")
-                                    self.update_status()
-                                    self.load_recent_activity()
+                    current_time = time.time()
+                    
+                    # Marks that were still with the database writer land here, without waiting
+                    for mark, marked in self.pump_marks():
+                        self.report_mark(mark, marked)
+                    
+                    with scheduler.stage('recognize'):
+                        if self.recognition_workers:
+                            # Frames go to the worker processes; results arrive a frame or two later
+                            if workers is None:
+                                workers = RecognitionWorkers(self.recognition_workers, gray.shape,
+                                                             use_clahe=self.lighting.clahe is not None)
+                                self.send_gallery(workers, gallery_version, snapshot, matcher, session_id)
+                            recognized = []
+                            if len(faces):
+                                seq = workers.submit(gray, faces)
+                                if seq is not None:
+                                    in_flight[seq] = (faces, current_time)
+                            for seq, version, positions, fallback in workers.poll():
+                                boxes, seen_time = in_flight.pop(seq)
+                                fallback_faces += fallback
+                                if version == gallery_version:  # Positions of an older gallery are meaningless now
+                                    recognized.append((boxes, seen_time, positions))
+                            if not len(faces):
+                                # After older frames' results, so their boxes are not drawn over this empty frame
+                                recognized.append((faces, current_time, []))
                         else:
-                            # First recognition in this session
-                            if self.mark_attendance_smart(name, student_id):
-                                already_marked.add(student_id)
-                                current_session_marked.add(student_id)
-                                self.last_recognition[student_id] = current_time
-                                color = (0, 255, 0)  # Green
-                                status = "✓ MARKED"
-                                self.live_status.config(text=f"🎉 Marked: {name}", fg="#27ae60")
-                                self.update_status()
-                                self.load_recent_activity()
+                            # All faces of the frame are scored against the gallery together
+                            face_rois = [self.lighting.normalize_face(gray[y:y+h, x:x+w]) for (x, y, w, h) in faces]
+                            recognized = [(faces, current_time, self.match_faces(face_rois, matcher))]
+                        
+                        for boxes, current_time, positions in recognized:
+                            detections = []
+                            for (x, y, w, h), position in zip(boxes, positions):
+                                name = "Unknown"
+                                color = (0, 0, 255)
+                                status = ""
+                            
+                                if position >= 0:
+                                    name = names[position]
+                                    state.last_seen[position] = current_time
+                                    remaining = state.cooldown_remaining(position, current_time)
+                                
+                                    # Check if already marked today (or in this course session)
+                                    if state.marked_today[position]:
+                                        color = (255, 165, 0)  # Orange
+                                        status = already_marked
+                                
+                                    # Check cooldown period for this session
+                                    elif remaining > 0:
+                                        color = (255, 255, 0)  # Yellow
+                                        status = f"Wait {int(remaining)}s"
+                                
+                                    # Ready to mark
+                                    elif self.mark_attendance_smart(name, student_ids[position], session_id,
+                                                                    enrolled=session_id is None or matcher.enrolled[position]):
+                                        state.record_mark(position, current_time)
+                                        color = (0, 255, 0)  # Green
+                                        status = "✓ MARKED"
+                                        self.live_status.config(text=f"🎉 Marked: {name}", fg="#27ae60")
+                                        self.update_status()
+                                        self.load_recent_activity()
+                            
+                                # Create label
+                                label = f"{name}"
+                                if status:
+                                    label += f" - {status}"
+                                detections.append((x, y, w, h, label, color))
+                
+                with scheduler.stage('display'):
+                    # Draw latest detections (reused on frames that skip analysis)
+                    for (x, y, w, h, label, color) in detections:
+                        cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
+                        cv2.putText(frame, label, (x, y-10),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
                     
-                    # Draw face detection
-                    cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
+                    # Display session info
+                    cv2.putText(frame, f"Session: {state.session_total} marked", (10, 30),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+                    cv2.putText(frame, f"Today Total: {state.today_total}", (10, 60),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+                    cv2.putText(frame, "Press 'q' to stop", (10, 90),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+                    cv2.putText(frame, scheduler.overlay_text(), (10, 115),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+                    cv2.putText(frame, self.detectors.overlay_text(), (10, 135),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
                     
-                    # Create label
-                    label = f"{name}"
-                    if status:
-                        label += f" - {status}"
+                    cv2.imshow('Smart Attendance', frame)
                     
-                    cv2.putText(frame, label, (x, y-10),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-                
-                # Display session info
-                cv2.putText(frame, f"Session: {len(current_session_marked)} marked", (10, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-                cv2.putText(frame, f"Today Total: {len(already_marked)}", (10, 60),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-                cv2.putText(frame, "Press 'q' to stop", (10, 90),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
-                
-                cv2.imshow('Smart Attendance', frame)
-                
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('q'):
-                    break
+                    key = cv2.waitKey(1) & 0xFF
+                    if key == ord('q'):
+                        break
+                    
+                    # Update GUI
+                    self.root.update()
                 
-                # Update GUI
-                self.root.update()
+                scheduler.frame_done(frame_start, processed)
+                if self.profiler:
+                    self.profiler.tick()
             
             cap.release()
             cv2.destroyAllWindows()
+            worker_info = ""
+            if workers:
+                # Frames still at the workers are not marked; the faces were in later frames too
+                worker_stats = workers.stats()
+                worker_info = (f"🧠 Recognition workers: {worker_stats['completed']} frame(s) recognized, "
+                               f"{worker_stats['dropped']} skipped while all were busy\n")
+            if recorder:
+                recorder.close()
+                print(f"📼 Recorded {recorder.frames} frames to {self.record_path}")
+            
+            db_stats = self.db.stats()
+            session_info = ""
+            if session_id is not None:
+                self.db.write(self.close_session, session_id, datetime.now().strftime('%H:%M:%S'))
+                session_info = (f"📚 Course: {self.session_course} (session {session_id}), "
+                                f"{fallback_faces + matcher.fallback_faces} face(s) checked against all students\n")
             
             # Show completion message
             messagebox.showinfo("Session Complete", 
                               f"Attendance session completed!\n\n"
                               f"📅 Date: {today}\n"
-                              f"✅ New marks this session: {len(current_session_marked)}\n"
-                              f"📊 Total present today: {len(already_marked)}")
+                              f"{session_info}"
+                              f"{worker_info}"
+                              f"✅ New marks this session: {state.session_total}\n"
+                              f"📊 Total present today: {state.today_total}\n"
+                              f"⚙️ Analysis every {scheduler.stride} frame(s), "
+                              f"{len(scheduler.decisions)} scheduler change(s)\n"
+                              f"🗄️ Database retries: {db_stats['retries']}, "
+                              f"queued marks: {len(self.pending_marks)}")
         
         except Exception as e:
             messagebox.showerror("Error", f"Attendance failed: {e}")
         finally:
+            if self.profiler:
+                self.profiler.disable()
+            if workers:
+                workers.close()
+            self.session_roster = None
             self.stop_attendance()
     
-    def mark_attendance_smart(self, name, student_id):
-        """Smart attendance marking with duplicate prevention"""
-        try:
-            now = datetime.now()
-            date = now.strftime('%Y-%m-%d')
-            time_str = now.strftime('%H:%M:%S')
-            
-            # Use INSERT OR IGNORE to prevent duplicates
-            self.cursor.execute('''
-                INSERT OR IGNORE INTO attendance (student_id, name, date, time, status)
-                VALUES (?, ?, ?, ?, 'Present')
-            ''', (student_id, name, date, time_str))
-            
-            # Check if row was actually inserted
-            if self.cursor.rowcount > 0:
-                self.conn.commit()
-                print(f"✅ Marked: {name} ({student_id}) at {time_str}")
-                return True
-            else:
-                print(f"⚠️ {name} already marked today")
-                return False
+    def send_gallery(self, workers, version, snapshot, matcher, session_id):
+        """Give the recognition workers the session's gallery (and roster)"""
+        roster_positions = matcher.roster_positions if session_id is not None else None
+        workers.set_gallery(version, snapshot.gallery, self.match_threshold, self.gallery_dtype,
+                            self.scoring_threads, self.shift_tolerance, roster_positions)
+    
+    def mark_attendance_smart(self, name, student_id, session_id=None, enrolled=True):
+        """Smart attendance marking with duplicate prevention (per day, or per course session)
+
+        Never blocks the video loop on a locked database: the mark joins the
+        ordered queue and is waited on for at most MARK_WAIT. A mark still
+        unwritten by then counts as marked and is written in the background.
+        """
+        now = datetime.now()
+        mark = (session_id, student_id, name, now.strftime('%Y-%m-%d'), now.strftime('%H:%M:%S'), bool(enrolled))
+        self.pending_marks.append(mark)
+        for written, marked in self.pump_marks(MARK_WAIT):
+            self.report_mark(written, marked)
+            if written is mark:
+                return marked
+        if mark in self.pending_marks:
+            print(f"⏳ Database busy, queued mark for {name} ({len(self.pending_marks)} pending)")
+            return True
+        return False  # Dropped as unwritable
+    
+    def report_mark(self, mark, marked):
+        session_id, student_id, name, _, time_str, enrolled = mark
+        if marked:
+            print(f"✅ Marked: {name} ({student_id}) at {time_str}"
+                  + ("" if enrolled else " - not enrolled in this course"))
+        else:
+            print(f"⚠️ {name} already marked {'this session' if session_id is not None else 'today'}")
+    
+    def submit_mark(self, mark):
+        """Queue one (session_id, student_id, name, date, time, enrolled) mark on the writer; a Future of True if new"""
+        session_id, student_id, name, date, time_str, enrolled = mark
+        if session_id is not None:
+            return self.db.submit(self.insert_session_mark, session_id, student_id, name,
+                                  date, time_str, enrolled)
+        return self.db.submit(self.insert_mark, student_id, name, date, time_str)
+    
+    def pump_marks(self, wait=0.0):
+        """Advance the mark queue in order, waiting at most `wait` seconds (None = until done)
+
+        One mark is with the writer at a time, so marks reach the database in
+        order. A mark still locked out after the writer's retries stays first
+        in the queue and is resubmitted on a later call. Returns (mark, marked)
+        for every mark written during this call.
+        """
+        written = []
+        deadline = None if wait is None else time.perf_counter() + wait
+        while self.pending_marks:
+            if self.mark_future is None:
+                self.mark_future = self.submit_mark(self.pending_marks[0])
+            try:
+                timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                marked = self.mark_future.result(timeout)
+            except FutureTimeout:
+                break
+            except Exception as e:
+                self.mark_future = None
+                if is_lock_error(e):
+                    break
+                print(f"❌ Dropping unwritable mark {self.pending_marks[0]}: {e}")
+                self.pending_marks.pop(0)
+                continue
+            self.mark_future = None
+            written.append((self.pending_marks.pop(0), marked))
+        return written
+    
+    def flush_pending_marks(self):
+        """Write queued marks in order, waiting for each; stops at the first still locked out"""
+        had_marks = bool(self.pending_marks)
+        for mark, marked in self.pump_marks(wait=None):
+            self.report_mark(mark, marked)
+        if had_marks and not self.pending_marks:
+            print("✅ Queued marks written")
+    
+    def load_pending_marks(self):
+        """Queue marks saved by a previous run and try to write them"""
+        if not os.path.exists(PENDING_MARKS_PATH):
+            return
+        with open(PENDING_MARKS_PATH) as f:
+            self.pending_marks.extend(tuple(json.loads(line)) for line in f if line.strip())
+        os.remove(PENDING_MARKS_PATH)
+        print(f"⏳ {len(self.pending_marks)} marks from the last run pending")
+        self.flush_pending_marks()
+    
+    def save_pending_marks(self):
+        """Keep marks that never reached the database for the next start"""
+        if not self.pending_marks:
+            return
+        os.makedirs(os.path.dirname(PENDING_MARKS_PATH), exist_ok=True)
+        with open(PENDING_MARKS_PATH, 'a') as f:
+            for mark in self.pending_marks:
+                f.write(json.dumps(mark) + "\n")
+        print(f"⚠️ {len(self.pending_marks)} marks saved to {PENDING_MARKS_PATH}, written on next start")
+    
+    def insert_student(self, conn, student_id, name, registration_date):
+        """Insert a registered student (writer thread)"""
+        conn.execute('''
+            INSERT INTO students (student_id, name, registration_date)
+            VALUES (?, ?, ?)
+        ''', (student_id, name, registration_date))
+    
+    def insert_mark(self, conn, student_id, name, date, time_str):
+        """Insert one mark and fold it into the rollups (writer thread)"""
+        # Use INSERT OR IGNORE to prevent duplicates
+        table = self.db.partitions().active_table(date)
+        cursor = conn.execute(f'''
+            INSERT OR IGNORE INTO {table} (student_id, name, date, time, status)
+            VALUES (?, ?, ?, ?, 'Present')
+        ''', (student_id, name, date, time_str))
         
-        except Exception as e:
-            print(f"❌ Mark error: {e}")
-            return False
+        # Check if row was actually inserted
+        if cursor.rowcount > 0:
+            self.analytics.record_mark(cursor, student_id, date, time_str)
+            return True
+        return False
+    
+    def insert_session_mark(self, conn, session_id, student_id, name, date, time_str, enrolled):
+        """Insert a course-session mark plus the daily mark if it is the first today (writer thread)"""
+        self.insert_mark(conn, student_id, name, date, time_str)
+        return CourseRoster(conn).record_mark(conn.cursor(), session_id, student_id, time_str, enrolled)
+    
+    def open_session(self, conn, course_id, date, start_time):
+        """Create a course session row (writer thread)"""
+        return CourseRoster(conn).start_session(course_id, date, start_time)
+    
+    def close_session(self, conn, session_id, end_time):
+        """Stamp a course session's end time (writer thread)"""
+        CourseRoster(conn).end_session(session_id, end_time)
     
     def get_today_marked(self):
         """Get set of students marked today"""
         today = datetime.now().strftime('%Y-%m-%d')
-        self.cursor.execute('SELECT student_id FROM attendance WHERE date = ?', (today,))
-        return set(row[0] for row in self.cursor.fetchall())
+        table = self.db.partitions().active_table(today)
+        cursor = self.db.connection().execute(f'SELECT student_id FROM {table} WHERE date = ?', (today,))
+        return set(row[0] for row in cursor.fetchall())
     
-    def match_face(self, face_roi):
-        """Face matching with improved threshold"""
+    def match_faces(self, face_rois, matcher=None):
+        """Face matching with improved threshold - a student position or -1 per face"""
         try:
-            best_match = None
-            best_score = 0
-            threshold = 0.65  # Slightly higher threshold for better accuracy
-            
-            for student_id, templates in self.face_data.items():
-                for template in templates:
-                    try:
-                        resized_face = cv2.resize(face_roi, (template.shape[1], template.shape[0]))
-                        result = cv2.matchTemplate(resized_face, template, cv2.TM_CCOEFF_NORMED)
-                        _, max_val, _, _ = cv2.minMaxLoc(result)
-                        
-                        if max_val > best_score and max_val > threshold:
-                            best_score = max_val
-                            best_match = student_id
-                    except:
-                        continue
-            
-            return best_match
-        except:
-            return None
+            return (matcher if matcher is not None else self.matcher).match_batch(face_rois)
+        except Exception as e:
+            print(f"❌ Match error: {e}")
+            return [-1] * len(face_rois)
+    
+    def apply_settings(self, config):
+        """Copy a validated configuration's tunables onto the system"""
+        self.config = config
+        self.min_face_size = config.min_face_size  # Detector minSize in pixels
+        self.match_threshold = config.match_threshold
+        self.template_sizes = config.template_sizes  # Registration stores each capture at these sizes
+        self.templates_per_student = config.templates_per_student
+        self.recognition_cooldown = config.recognition_cooldown  # Seconds between recognitions of one student
+        self.target_fps = config.target_fps  # Display rate the frame scheduler protects
+        self.max_latency = config.max_latency  # Seconds from capture to on-screen result
+        self.gallery_dtype = config.gallery_dtype  # Scoring copy: float32, float16 (half memory) or int8 (quarter)
+        self.scoring_threads = config.scoring_threads  # Gallery shards scored in parallel; 0 = one per CPU core
+        self.recognition_workers = config.recognition_workers  # Recognition processes; 0 = score in the video loop
+        self.shift_tolerance = config.shift_tolerance  # Pixels of crop misalignment tolerated (FFT scoring when > 0)
+        self.capture_profile_name = config.capture_profile  # A PROFILES key, or 'auto' to benchmark at startup
+    
+    def build_detectors(self, config):
+        """Detector chain with a configuration's backends and cascade parameters"""
+        return DetectorChain(list(config.detectors) or None, scale_factor=config.scale_factor,
+                             min_neighbors=config.min_neighbors)
+    
+    def select_capture_profile(self):
+        """Resolve the configured capture profile, probing camera modes for 'auto'"""
+        try:
+            if self.replay_path:
+                self.capture_profile = None  # Recordings keep their own frame size
+            elif self.capture_profile_name == 'auto':
+                self.capture_profile, _ = auto_probe(self.camera_source, self.min_face_size)
+            else:
+                self.capture_profile = PROFILES[self.capture_profile_name]
+        except Exception as e:
+            print(f"⚠️ Camera probe failed, using driver defaults: {e}")
+            self.capture_profile = PROFILES['default']
+    
+    def open_camera(self):
+        """Open the camera with the selected capture profile"""
+        # The startup probe holds the camera until it finishes
+        self.camera_probe.join()
+        if self.replay_path:
+            print(f"📼 Replaying {self.replay_path} ({self.replay_speed} speed)")
+            return ReplayCapture(self.replay_path, speed=self.replay_speed)
+        return open_capture(self.camera_source, self.capture_profile)
     
     def stop_attendance(self):
         """Stop attendance capture"""
@@ -553,8 +900,9 @@ class SmartAttendanceSystem:
             total_students = len(self.students)
             today = datetime.now().strftime('%Y-%m-%d')
             
-            self.cursor.execute('SELECT COUNT(*) FROM attendance WHERE date = ?', (today,))
-            present_today = self.cursor.fetchone()[0]
+            table = self.db.partitions().active_table(today)
+            cursor = self.db.connection().execute(f'SELECT COUNT(*) FROM {table} WHERE date = ?', (today,))
+            present_today = cursor.fetchone()[0]
             
             # Calculate rate
             rate = (present_today / max(total_students, 1)) * 100
@@ -565,9 +913,11 @@ class SmartAttendanceSystem:
             self.attendance_rate_label.config(text=f"{rate:.1f}%")
             
             # Update left panel status
-            self.status_label.config(
-                text=f"Students: {total_students}\nPresent: {present_today}\nRate: {rate:.1f}%"
-            )
+            status = f"Students: {total_students}\nPresent: {present_today}\nRate: {rate:.1f}%"
+            status += f"\nProfile: {self.config.profile}"
+            if self.pending_marks:
+                status += f"\nQueued marks: {len(self.pending_marks)}"
+            self.status_label.config(text=status)
         
         except Exception as e:
             print(f"Status update error: {e}")
@@ -577,12 +927,7 @@ class SmartAttendanceSystem:
         try:
             self.activity_listbox.delete(0, tk.END)
             
-            self.cursor.execute('''
-                SELECT name, date, time FROM attendance 
-                ORDER BY date DESC, time DESC LIMIT 10
-            ''')
-            
-            records = self.cursor.fetchall()
+            records = self.db.partitions().recent(10, columns="name, date, time")
             
             if not records:
                 self.activity_listbox.insert(0, "No activity yet")
@@ -626,17 +971,15 @@ class SmartAttendanceSystem:
             
             if today_only:
                 today = datetime.now().strftime('%Y-%m-%d')
-                self.cursor.execute('''
+                table = self.db.partitions().active_table(today)
+                cursor = self.db.connection().execute(f'''
                     SELECT student_id, name, date, time, status 
-                    FROM attendance WHERE date = ? ORDER BY time
+                    FROM {table} WHERE date = ? ORDER BY time
                 ''', (today,))
+                records = cursor.fetchall()
             else:
-                self.cursor.execute('''
-                    SELECT student_id, name, date, time, status 
-                    FROM attendance ORDER BY date DESC, time DESC LIMIT 100
-                ''')
-            
-            records = self.cursor.fetchall()
+                # Newest rows across all live partitions
+                records = self.db.partitions().recent(100)
             for record in records:
                 tree.insert("", "end", values=record)
             
@@ -669,8 +1012,8 @@ class SmartAttendanceSystem:
             tree.pack(side="left", fill="both", expand=True, padx=10, pady=10)
             scrollbar.pack(side="right", fill="y", pady=10)
             
-            self.cursor.execute('SELECT * FROM students ORDER BY registration_date DESC')
-            students = self.cursor.fetchall()
+            cursor = self.db.connection().execute('SELECT * FROM students ORDER BY registration_date DESC')
+            students = cursor.fetchall()
             
             for student in students:
                 student_id, name, reg_date = student
@@ -683,39 +1026,359 @@ class SmartAttendanceSystem:
         except Exception as e:
             messagebox.showerror("Error", f"Could not display students: {e}")
     
-    def save_face_data(self):
-        """Save face data"""
+    def view_analytics(self):
+        """Show attendance rates and arrival histogram from the rollups"""
+        try:
+            window = tk.Toplevel(self.root)
+            window.title("Attendance Analytics")
+            window.geometry("800x600")
+            
+            tk.Label(window, text="Attendance Analytics", font=("Arial", 14, "bold")).pack(pady=10)
+            
+            # Date range controls
+            controls = tk.Frame(window)
+            controls.pack(pady=5)
+            
+            today = datetime.now()
+            tk.Label(controls, text="From").pack(side="left")
+            start_entry = tk.Entry(controls, width=12)
+            start_entry.insert(0, today.strftime('%Y-%m-01'))
+            start_entry.pack(side="left", padx=5)
+            
+            tk.Label(controls, text="To").pack(side="left")
+            end_entry = tk.Entry(controls, width=12)
+            end_entry.insert(0, today.strftime('%Y-%m-%d'))
+            end_entry.pack(side="left", padx=5)
+            
+            # Per-student rates
+            columns = ("Student ID", "Name", "Days Present", "Class Days", "Rate")
+            tree = ttk.Treeview(window, columns=columns, show="headings", height=12)
+            for col in columns:
+                tree.heading(col, text=col)
+                tree.column(col, width=140, anchor="center")
+            tree.pack(fill="both", expand=True, padx=10, pady=5)
+            
+            # Arrival-time histogram
+            tk.Label(window, text="🕒 Arrivals by Hour", font=("Arial", 11, "bold")).pack()
+            canvas = tk.Canvas(window, height=150, bg="white")
+            canvas.pack(fill="x", padx=10, pady=5)
+            
+            timing_label = tk.Label(window, text="", font=("Arial", 9), fg="#7f8c8d")
+            timing_label.pack(pady=5)
+            
+            def draw_histogram(histogram):
+                canvas.delete("all")
+                canvas.update_idletasks()
+                width = max(canvas.winfo_width(), 480)
+                bar_width = width / 24
+                peak = max(max(histogram), 1)
+                for hour, marks in enumerate(histogram):
+                    x0 = hour * bar_width + 2
+                    bar_height = (marks / peak) * 110
+                    canvas.create_rectangle(x0, 130 - bar_height, x0 + bar_width - 4, 130,
+                                            fill="#3498db", outline="")
+                    canvas.create_text(x0 + bar_width / 2 - 2, 140, text=f"{hour:02d}", font=("Arial", 7))
+                    if marks:
+                        canvas.create_text(x0 + bar_width / 2 - 2, 122 - bar_height, text=str(marks),
+                                           font=("Arial", 7))
+            
+            def refresh():
+                start_date = start_entry.get().strip()
+                end_date = end_entry.get().strip()
+                try:
+                    started = time.perf_counter()
+                    rates = self.analytics.student_rates(start_date, end_date)
+                    histogram = self.analytics.arrival_histogram(start_date, end_date)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                except ValueError as e:
+                    messagebox.showerror("Error", f"Invalid date range: {e}", parent=window)
+                    return
+                
+                tree.delete(*tree.get_children())
+                for row in rates:
+                    tree.insert("", "end", values=(row['student_id'], row['name'], row['days_present'],
+                                                   row['class_days'], f"{row['rate']:.1f}%"))
+                draw_histogram(histogram)
+                timing_label.config(text=f"Computed from rollups in {elapsed_ms:.1f} ms")
+            
+            def rebuild():
+                # Runs on the writer thread; poll so the GUI stays responsive
+                future = self.db.submit(self.rebuild_rollups)
+                timing_label.config(text="Rebuilding rollups...")
+                
+                def check():
+                    if not future.done():
+                        window.after(100, check)
+                    elif future.exception():
+                        messagebox.showerror("Error", f"Rebuild failed: {future.exception()}", parent=window)
+                    else:
+                        refresh()
+                        timing_label.config(text=f"Rollups rebuilt in {future.result():.2f}s")
+                
+                check()
+            
+            tk.Button(controls, text="🔍 Show", command=refresh).pack(side="left", padx=5)
+            tk.Button(controls, text="🔄 Rebuild Rollups", command=rebuild).pack(side="left", padx=5)
+            
+            refresh()
+        
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not display analytics: {e}")
+    
+    def export_records(self):
+        """Export attendance records to attendance_records/"""
+        window = tk.Toplevel(self.root)
+        window.title("Export Attendance")
+        window.geometry("400x280")
+        
+        tk.Label(window, text="Export Attendance", font=("Arial", 14, "bold")).pack(pady=10)
+        
+        form = tk.Frame(window)
+        form.pack(padx=15, pady=5)
+        
+        fields = [
+            ("Format", None),
+            ("From (YYYY-MM-DD)", ""),
+            ("To (YYYY-MM-DD)", ""),
+            ("Student IDs (comma separated)", ""),
+        ]
+        entries = {}
+        for row, (label, default) in enumerate(fields):
+            tk.Label(form, text=label, anchor="w").grid(row=row, column=0, sticky="w", pady=3)
+            if default is None:
+                widget = ttk.Combobox(form, values=available_formats(), state="readonly", width=22)
+                widget.current(0)
+            else:
+                widget = tk.Entry(form, width=25)
+            widget.grid(row=row, column=1, pady=3, padx=5)
+            entries[label] = widget
+        
+        def run_export():
+            fmt = entries["Format"].get()
+            start_date = entries["From (YYYY-MM-DD)"].get().strip() or None
+            end_date = entries["To (YYYY-MM-DD)"].get().strip() or None
+            ids = entries["Student IDs (comma separated)"].get()
+            student_ids = [sid.strip() for sid in ids.split(",") if sid.strip()] or None
+            
+            try:
+                for value in (start_date, end_date):
+                    if value:
+                        datetime.strptime(value, '%Y-%m-%d')
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid export options: {e}", parent=window)
+                return
+            
+            # Export on a background thread with its own read connection
+            outcome = {}
+            
+            def worker():
+                try:
+                    exporter = AttendanceExporter(self.db.connection(), partitions=self.db.partitions())
+                    outcome['stats'] = exporter.export(fmt, start_date, end_date, student_ids)
+                except Exception as e:
+                    outcome['error'] = e
+                finally:
+                    self.db.release()
+            
+            thread = threading.Thread(target=worker, name="attendance-export", daemon=True)
+            thread.start()
+            export_button.config(state="disabled", text="⏳ Exporting...")
+            
+            def check():
+                if thread.is_alive():
+                    window.after(100, check)
+                elif 'error' in outcome:
+                    export_button.config(state="normal", text="💾 Export")
+                    messagebox.showerror("Error", f"Export failed: {outcome['error']}", parent=window)
+                else:
+                    stats = outcome['stats']
+                    messagebox.showinfo("Export Complete",
+                                      f"✅ Exported {stats['rows']} records\n\n"
+                                      f"📁 {stats['path']}\n"
+                                      f"⏱️ {stats['seconds']:.2f}s ({stats['rows_per_sec']:.0f} rows/s)",
+                                      parent=window)
+                    window.destroy()
+            
+            check()
+        
+        export_button = tk.Button(window, text="💾 Export", command=run_export, width=15,
+                                  font=("Arial", 11, "bold"), bg="#16a085", fg="white")
+        export_button.pack(pady=15)
+    
+    def choose_performance_profile(self):
+        """Switch performance profile; detectors, gallery and camera mode are rebuilt"""
+        if self.is_capturing:
+            messagebox.showerror("Error", "Stop attendance before changing the performance profile")
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("Performance Profile")
+        window.geometry("460x250")
+        
+        tk.Label(window, text="Performance Profile", font=("Arial", 14, "bold")).pack(pady=10)
+        
+        choice = ttk.Combobox(window, values=list(PERFORMANCE_PROFILES), state="readonly", width=25)
+        choice.set(self.config.profile)
+        choice.pack(pady=5)
+        summary = tk.Label(window, wraplength=420, justify="center")
+        summary.pack(pady=5)
+        source = self.config.path or "no config file"
+        tk.Label(window, text=f"Overrides from {source} and ATTENDANCE_* variables still apply",
+                 font=("Arial", 9), fg="#7f8c8d").pack()
+        
+        def show_summary(event=None):
+            summary.config(text=PROFILE_SUMMARIES[choice.get()])
+        
+        choice.bind("<<ComboboxSelected>>", show_summary)
+        show_summary()
+        
+        def apply():
+            if self.is_capturing:
+                messagebox.showerror("Error", "Stop attendance before changing the performance profile",
+                                     parent=window)
+                return
+            try:
+                config = self.config.with_profile(choice.get())
+                detectors = self.build_detectors(config)
+            except (ConfigError, RuntimeError) as e:
+                messagebox.showerror("Error", str(e), parent=window)
+                return
+            
+            previous_capture = self.capture_profile_name
+            self.apply_settings(config)
+            self.detectors = detectors
+            if self.capture_profile_name != previous_capture:
+                self.camera_probe.join()
+                self.camera_probe = threading.Thread(target=self.select_capture_profile,
+                                                     name="camera-probe", daemon=True)
+                self.camera_probe.start()
+            
+            # Rebuild the gallery off the Tk thread (prepared rows are kept if dtype and shift are unchanged)
+            def rebuild():
+                with self.gallery_lock:
+                    base = self.gallery_snapshot
+                    self.install_gallery(self.build_snapshot(base.face_data, base.students, previous=base))
+            
+            thread = threading.Thread(target=rebuild, name="profile-rebuild", daemon=True)
+            thread.start()
+            apply_button.config(state="disabled", text="⏳ Rebuilding...")
+            
+            def check():
+                if thread.is_alive():
+                    window.after(100, check)
+                else:
+                    print(f"⚙️ Performance profile: {config.profile}")
+                    self.update_status()
+                    window.destroy()
+            
+            check()
+        
+        apply_button = tk.Button(window, text="✅ Apply", command=apply, width=15,
+                                 font=("Arial", 11, "bold"), bg="#7f8c8d", fg="white")
+        apply_button.pack(pady=15)
+    
+    def save_face_data(self, face_data=None, students=None):
+        """Save these students' templates and info (default: the whole gallery) into the face data file
+
+        Merged into the file's current contents under its lock, so a gallery
+        pull or another GUI saving at the same time keeps its changes. The
+        caller applies the same change to the gallery itself, so the watcher
+        is told not to reload this save.
+        """
+        if face_data is None:
+            face_data, students = self.face_data, self.students
+        
+        def merge(data):
+            data['face_data'].update(face_data)
+            data['students'].update(students)
+        
         try:
-            with open('faces/smart_face_data.pkl', 'wb') as f:
-                pickle.dump({
-                    'face_data': self.face_data,
-                    'students': self.students
-                }, f)
+            data, before, after = update_face_data(merge, FACE_DATA_PATH)
+            if self.gallery_watcher is not None:
+                self.gallery_watcher.own_write(before, after, data['revisions'])
         except Exception as e:
             print(f"Save error: {e}")
     
     def load_face_data(self):
-        """Load face data"""
+        """Load face data; returns the file's per-student revisions for the watcher"""
         try:
-            if os.path.exists('faces/smart_face_data.pkl'):
-                with open('faces/smart_face_data.pkl', 'rb') as f:
+            data = {}
+            legacy = False
+            if os.path.exists(FACE_DATA_PATH):
+                with open(FACE_DATA_PATH, 'rb') as f:
                     data = pickle.load(f)
-                    self.face_data = data.get('face_data', {})
-                    self.students = data.get('students', {})
             
             # Try to load from old files too
             elif os.path.exists('faces/face_data.pkl'):
                 with open('faces/face_data.pkl', 'rb') as f:
                     data = pickle.load(f)
-                    self.face_data = data.get('face_data', {})
-                    self.students = data.get('students', {})
-                
-                # Save in new format
-                self.save_face_data()
+                legacy = True
             
+            self.install_gallery(self.build_snapshot(data.get('face_data', {}), data.get('students', {})))
+            if legacy:
+                self.save_face_data()  # Save in new format
             print(f"✅ Loaded {len(self.students)} students")
+            return data.get('revisions', {})
         except Exception as e:
             print(f"Load error: {e}")
+            return {}
+    
+    @property
+    def face_data(self):
+        """Templates per student ID in the current snapshot (read-only)"""
+        return self.gallery_snapshot.face_data
+    
+    @property
+    def students(self):
+        """Student info per ID in the current snapshot (read-only)"""
+        return self.gallery_snapshot.students
+    
+    @property
+    def matcher(self):
+        return self.gallery_snapshot.matcher
+    
+    def build_snapshot(self, face_data, students, previous=None):
+        """Gallery snapshot scored with the current settings, reusing what it can of `previous`"""
+        return GallerySnapshot(face_data, students, self.gallery_dtype, self.match_threshold,
+                               self.scoring_threads, self.shift_tolerance, previous)
+    
+    def install_gallery(self, snapshot):
+        """Make a snapshot current in one reference swap; the video loop switches at its next frame"""
+        self.gallery_snapshot = snapshot
+    
+    def apply_gallery_update(self, face_data, students, changes):
+        """Apply a reload's added, removed and changed students to the current snapshot (watcher thread)
+
+        The changes are applied to whatever snapshot is current when the lock
+        is taken, so a registration installed meanwhile is kept. Only new
+        objects are built, and only changed students are prepared again;
+        nothing the Tk thread or the video loop holds is changed in place.
+        """
+        with self.gallery_lock:
+            base = self.gallery_snapshot
+            faces, infos = dict(base.face_data), dict(base.students)
+            for student_id in changes['removed']:
+                faces.pop(student_id, None)
+                infos.pop(student_id, None)
+            for student_id in changes['added'] + changes['changed']:
+                if student_id in face_data:
+                    faces[student_id] = face_data[student_id]
+                infos[student_id] = students.get(student_id, infos.get(student_id, {}))
+            self.install_gallery(self.prepared(self.build_snapshot(faces, infos, previous=base)))
+    
+    def add_to_gallery(self, student_id, templates, info):
+        """Install a snapshot with one student added or replaced (registration thread)"""
+        with self.gallery_lock:
+            base = self.gallery_snapshot
+            self.install_gallery(self.prepared(self.build_snapshot(
+                {**base.face_data, student_id: templates}, {**base.students, student_id: info}, previous=base)))
+    
+    def prepared(self, snapshot):
+        """The snapshot with the running course session's roster matcher built (not in the video loop)"""
+        roster_ids = self.session_roster
+        if roster_ids is not None:
+            snapshot.roster_matcher(roster_ids)
+        return snapshot
     
     def exit_app(self):
         """Exit application"""
@@ -723,8 +1386,12 @@ class SmartAttendanceSystem:
             try:
                 if self.is_capturing:
                     self.stop_attendance()
-                self.save_face_data()
-                self.conn.close()
+                self.gallery_watcher.stop()
+                if self.profiler:
+                    self.profiler.finish()
+                self.flush_pending_marks()
+                self.save_pending_marks()
+                self.db.close()
                 cv2.destroyAllWindows()
                 self.root.destroy()
             except:
@@ -740,16 +1407,43 @@ class SmartAttendanceSystem:
 import tkinter.simpledialog
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Smart Face Recognition Attendance System")
+    parser.add_argument('--replay', metavar='FILE', help="Take attendance from a frame recording instead of the camera")
+    parser.add_argument('--replay-speed', choices=['recorded', 'max'], default='recorded',
+                        help="Replay at the recorded frame timing or as fast as possible")
+    parser.add_argument('--record', metavar='FILE', help="Record attendance session frames to FILE")
+    parser.add_argument('--profile', action='store_true',
+                        help="Profile attendance sessions; reports go to attendance_records/ on exit")
+    parser.add_argument('--config', metavar='FILE',
+                        help="TOML or INI settings file (default: attendance.toml or attendance.ini if present)")
+    parser.add_argument('--performance-profile', choices=list(PERFORMANCE_PROFILES),
+                        help="Performance profile (default: from the config file, else balanced)")
+    parser.add_argument('--scoring-threads', type=int, metavar='N',
+                        help="Threads scoring gallery shards in parallel (0 = one per CPU core)")
+    parser.add_argument('--recognition-workers', type=int, metavar='N',
+                        help="Recognize faces in N worker processes fed through shared memory")
+    parser.add_argument('--shift-tolerance', type=int, metavar='PX',
+                        help="Also match face crops that are up to PX pixels off-center (slower)")
+    args = parser.parse_args()
+    
+    overrides = {name: getattr(args, name) for name in ('scoring_threads', 'recognition_workers', 'shift_tolerance')
+                 if getattr(args, name) is not None}
+    try:
+        config = load_config(args.config, args.performance_profile, overrides)
+    except ConfigError as e:
+        parser.error(str(e))
+    
     print("🎯 Smart Face Recognition Attendance System")
     print("=" * 50)
     print("✅ Duplicate prevention implemented")
     print("✅ Clean smart interface")
     print("✅ Real-time stats and activity")
-    print("✅ 10-second recognition cooldown")
+    print(f"✅ {config.recognition_cooldown:g}-second recognition cooldown")
+    print(f"⚙️ Performance profile: {config.profile}")
     print("=" * 50)
     
     try:
-        app = SmartAttendanceSystem()
+        app = SmartAttendanceSystem(args.replay, args.replay_speed, args.record, args.profile, config)
         app.run()
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -0,0 +1,84 @@
+# Per-Student Runtime State for the Smart Attendance System
+# Student IDs are mapped once to dense indices; the video loop only touches arrays
+
+import numpy as np
+
+
+class StudentIndex:
+    """Dense 0..N-1 positions for every student with face templates"""
+
+    __slots__ = ('ids', 'names', 'positions')
+
+    def __init__(self, students, face_data):
+        self.ids = sorted(face_data)
+        self.names = [students.get(student_id, {}).get('name', student_id) for student_id in self.ids]
+        self.positions = {student_id: i for i, student_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def position(self, student_id):
+        """Index of a student ID, or -1 if it has no templates"""
+        return self.positions.get(student_id, -1)
+
+
+class StudentRuntimeState:
+    """Attendance-session state kept in NumPy arrays indexed by student position
+
+    marked_today is the duplicate-prevention scope: today's marks, or only this
+    session's in a course session. present_today and today_total always cover
+    the whole day, whatever the scope.
+    """
+
+    __slots__ = ('cooldown', 'last_seen', 'last_marked', 'marked_today', 'session_marked',
+                 'present_today', 'today_total', 'session_total')
+
+    def __init__(self, size, cooldown):
+        self.cooldown = cooldown
+        self.last_seen = np.full(size, -np.inf)
+        self.last_marked = np.full(size, -np.inf)
+        self.marked_today = np.zeros(size, dtype=bool)
+        self.session_marked = np.zeros(size, dtype=bool)
+        self.present_today = np.zeros(size, dtype=bool)
+        self.today_total = 0
+        self.session_total = 0
+
+    def remap(self, old_index, new_index):
+        """Same state re-laid out for a reloaded gallery's positions"""
+        state = StudentRuntimeState(len(new_index), self.cooldown)
+        old_positions = np.array([old_index.position(student_id) for student_id in new_index.ids], dtype=np.int64)
+        kept = old_positions >= 0
+        for name in ('last_seen', 'last_marked', 'marked_today', 'session_marked', 'present_today'):
+            getattr(state, name)[kept] = getattr(self, name)[old_positions[kept]]
+        state.today_total = self.today_total
+        state.session_total = self.session_total
+        return state
+
+    def load_marked_today(self, index, student_ids):
+        """Seed the marked-today bitmap (and the day's total) from the database"""
+        self.load_present_today(index, student_ids)
+        self.marked_today |= self.present_today
+
+    def load_present_today(self, index, student_ids):
+        """Seed the day's total from the database without touching the duplicate scope"""
+        for student_id in student_ids:
+            position = index.position(student_id)
+            if position >= 0:
+                self.present_today[position] = True
+        # Includes marks for students without templates on this kiosk
+        self.today_total = len(student_ids)
+
+    def cooldown_remaining(self, position, now):
+        """Seconds until this student may be marked again (<= 0 when ready)"""
+        return self.last_marked[position] + self.cooldown - now
+
+    def record_mark(self, position, now):
+        """Flag a successful mark for this session and today"""
+        self.last_marked[position] = now
+        self.marked_today[position] = True
+        if not self.session_marked[position]:
+            self.session_marked[position] = True
+            self.session_total += 1
+        if not self.present_today[position]:
+            self.present_today[position] = True
+            self.today_total += 1
@@ -0,0 +1,74 @@
+# Shared fixtures for the Smart Attendance System tests
+# The modules live at the repository root, next to the scripts
+
+import os
+import sqlite3
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attendance_analytics import AttendanceAnalytics  # noqa: E402
+from attendance_partitions import AttendancePartitions  # noqa: E402
+
+
+@pytest.fixture
+def partitioned(tmp_path):
+    """(connection, partitions) over a fresh database with per-month partition files"""
+    conn = sqlite3.connect(str(tmp_path / 'attendance.db'), uri=True)
+    conn.execute('CREATE TABLE students (student_id TEXT PRIMARY KEY, name TEXT, registration_date TEXT)')
+    conn.commit()
+    partitions = AttendancePartitions(conn, str(tmp_path / 'partitions'), str(tmp_path / 'archive'))
+    yield conn, partitions
+    conn.close()
+
+
+def add_marks(conn, partitions, marks, analytics=None):
+    """Insert (student_id, date, time) marks the way the app does, one commit per mark"""
+    for student_id, date, time_str in marks:
+        table = partitions.active_table(date)
+        cursor = conn.execute(f'''
+            INSERT OR IGNORE INTO {table} (student_id, name, date, time, status)
+            VALUES (?, ?, ?, ?, 'Present')
+        ''', (student_id, student_id, date, time_str))
+        if analytics is not None and cursor.rowcount > 0:
+            analytics.record_mark(cursor, student_id, date, time_str)
+        conn.commit()
+
+
+@pytest.fixture
+def analytics(partitioned):
+    conn, partitions = partitioned
+    analytics = AttendanceAnalytics(conn, partitions)
+    analytics.ensure_schema()
+    return analytics
+
+
+def face_image(rng, size=100):
+    """Smooth random image standing in for a face crop"""
+    return cv2.GaussianBlur(rng.integers(0, 256, (size, size), dtype=np.uint8), (9, 9), 3)
+
+
+def make_gallery(students, seed=0):
+    """Template lists at the usual sizes; every fourth student has no 100 px template"""
+    rng = np.random.default_rng(seed)
+    gallery = []
+    for student in range(students):
+        sizes = (50, 75) if student % 4 == 3 else (50, 75, 100)
+        captures = [face_image(rng) for _ in range(1 + student % 3)]
+        gallery.append([cv2.resize(capture, (size, size)) for capture in captures for size in sizes])
+    return gallery
+
+
+def probes_of(gallery, students, seed=1):
+    """Off-size, noisy crops of the given students' faces, plus one stranger"""
+    rng = np.random.default_rng(seed)
+    crops = []
+    for student in students:
+        crop = cv2.resize(gallery[student][-1], (87, 93)).astype(np.int16)
+        crops.append(np.clip(crop + rng.integers(-12, 13, crop.shape), 0, 255).astype(np.uint8))
+    crops.append(face_image(rng, 80))
+    return crops
@@ -0,0 +1,42 @@
+import pytest
+
+from conftest import add_marks
+
+
+MARKS = [('s1', '2025-01-06', '08:55:00'), ('s2', '2025-01-06', '09:10:00'),
+         ('s1', '2025-02-03', '08:40:00'), ('s2', '2025-03-03', '10:05:00')]
+
+
+def rollups(conn):
+    return (sorted(conn.execute('SELECT * FROM rollup_student_month').fetchall()),
+            sorted(conn.execute('SELECT * FROM rollup_day_hour').fetchall()))
+
+
+def test_rebuild_matches_incremental_rollups(partitioned, analytics):
+    conn, partitions = partitioned
+    add_marks(conn, partitions, MARKS, analytics)
+    incremental = rollups(conn)
+
+    analytics.rebuild()
+
+    assert rollups(conn) == incremental
+    assert ('s1', '2025-01', 1) in incremental[0]
+
+
+def test_failed_rebuild_keeps_existing_rollups(partitioned, analytics, monkeypatch):
+    conn, partitions = partitioned
+    add_marks(conn, partitions, MARKS, analytics)
+    before = rollups(conn)
+
+    real_sources = analytics._sources
+
+    def failing_sources(*args, **kwargs):
+        yield from list(real_sources(*args, **kwargs))[:1]
+        yield 'missing_partition.attendance'
+
+    monkeypatch.setattr(analytics, '_sources', failing_sources)
+    with pytest.raises(Exception):
+        analytics.rebuild()
+
+    assert not conn.in_transaction
+    assert rollups(conn) == before
@@ -0,0 +1,81 @@
+import re
+
+import pytest
+
+from attendance_config import PERFORMANCE_PROFILES, ConfigError, load_config
+
+
+@pytest.fixture(autouse=True)
+def no_config_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # No attendance.toml/.ini is picked up from the repository
+
+
+def test_profiles_are_valid_and_complete():
+    for name in PERFORMANCE_PROFILES:
+        assert load_config(profile=name, environ={}).profile == name
+
+
+def test_environment_overrides_file_and_command_line_overrides_both(tmp_path):
+    path = tmp_path / 'attendance.toml'
+    path.write_text('[attendance]\nprofile = "low-power-kiosk"\nmin_neighbors = 7\nmatch_threshold = 0.7\n')
+    config = load_config(environ={'ATTENDANCE_MIN_NEIGHBORS': '9', 'ATTENDANCE_TEMPLATE_SIZES': '40, 60'},
+                         overrides={'match_threshold': 0.8})
+    assert config.profile == 'low-power-kiosk'
+    assert (config.min_neighbors, config.template_sizes, config.match_threshold) == (9, (40, 60), 0.8)
+    assert config.sources['min_neighbors'] == 'env'
+    assert config.sources['match_threshold'] == 'command line'
+    assert config.sources['scale_factor'] == 'profile low-power-kiosk'
+
+
+def test_ini_file_and_profile_switch_keep_overrides(tmp_path):
+    path = tmp_path / 'site.ini'
+    path.write_text('[attendance]\nmin_face_size = 70\n')
+    config = load_config(str(path), environ={})
+    assert config.min_face_size == 70
+    assert config.with_profile('high-accuracy-desk').min_face_size == 70
+
+
+@pytest.mark.parametrize('environ, message', [
+    ({'ATTENDANCE_MIN_NEIGHBORS': 'five'}, "min_neighbors: expected an integer, got 'five'"),
+    ({'ATTENDANCE_TEMPLATE_SIZES': '50, big'}, "template_sizes: expected integers, got 'big'"),
+    ({'ATTENDANCE_MATCH_THRESHOLD': '1.5'}, 'match_threshold: 1.5 is outside 0.0..1.0'),
+    ({'ATTENDANCE_GALLERY_DTYPE': 'float64'}, "'float64' is not one of"),
+    ({'ATTENDANCE_PROFILE': 'turbo'}, "Unknown performance profile 'turbo'"),
+    ({'ATTENDANCE_SHIFT_TOLERANCE': '30', 'ATTENDANCE_TEMPLATE_SIZES': '50'}, 'shift_tolerance'),
+])
+def test_bad_environment_values_are_reported(environ, message):
+    with pytest.raises(ConfigError, match=re.escape(message)):
+        load_config(environ=environ)
+
+
+def test_unknown_environment_variables_are_ignored(tmp_path, capsys):
+    config = load_config(environ={'ATTENDANCE_MIN_NEIGHBOURS': '9', 'ATTENDANCE_MIN_NEIGHBORS': '7'})
+    assert config.min_neighbors == 7
+    assert 'Ignoring ATTENDANCE_MIN_NEIGHBOURS' in capsys.readouterr().out
+    # A typo in the config file still stops startup
+    path = tmp_path / 'attendance.ini'
+    path.write_text('[attendance]\nmin_neighbours = 9\n')
+    with pytest.raises(ConfigError, match=re.escape('min_neighbours: unknown setting')):
+        load_config(environ={})
+
+
+def test_balanced_keeps_the_original_detection_and_capture():
+    config = load_config(profile='balanced', environ={})
+    assert (config.detectors, config.scale_factor, config.min_neighbors, config.min_face_size) == \
+        (('haar_default',), 1.3, 5, 50)
+    assert config.capture_profile == 'default'
+
+
+def test_every_problem_is_listed_at_once():
+    with pytest.raises(ConfigError) as error:
+        load_config(environ={'ATTENDANCE_MIN_NEIGHBORS': 'x', 'ATTENDANCE_TARGET_FPS': 'fast'})
+    assert 'min_neighbors' in str(error.value) and 'target_fps' in str(error.value)
+
+
+def test_missing_or_broken_config_file(tmp_path):
+    with pytest.raises(ConfigError, match='Config file not found'):
+        load_config(str(tmp_path / 'missing.toml'), environ={})
+    broken = tmp_path / 'broken.toml'
+    broken.write_text('[attendance\n')
+    with pytest.raises(ConfigError, match='broken.toml'):
+        load_config(str(broken), environ={})
@@ -0,0 +1,46 @@
+import attendance_csv_writer
+from attendance_csv_writer import BufferedAttendanceWriter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def rows(path):
+    with open(path) as f:
+        return f.read().splitlines()[1:]
+
+
+def test_tick_flushes_after_the_last_recognition(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(attendance_csv_writer.time, 'monotonic', clock)
+    writer = BufferedAttendanceWriter(str(tmp_path / 'attendance.csv'), flush_interval=5.0)
+    try:
+        writer.mark('alice')
+        writer.tick()
+        assert writer.rows_written == 0  # Not due yet
+
+        clock.now += 5.0
+        writer.tick()
+        assert writer.rows_written == 1
+        (path,) = tmp_path.iterdir()
+        assert rows(path)[0].startswith('alice,')
+    finally:
+        writer.close()
+
+
+def test_repeat_sightings_within_cooldown_are_one_row(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(attendance_csv_writer.time, 'monotonic', clock)
+    writer = BufferedAttendanceWriter(str(tmp_path / 'attendance.csv'), cooldown=30.0)
+    assert writer.mark('bob')
+    clock.now += 20
+    assert not writer.mark('bob')
+    clock.now += 31
+    assert writer.mark('bob')
+    writer.close()
+    assert writer.rows_written == 2
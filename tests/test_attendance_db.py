@@ -0,0 +1,193 @@
+import multiprocessing
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from attendance_db import DatabaseManager
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'attendance.db')
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('CREATE TABLE marks (student_id TEXT PRIMARY KEY)')
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def partition_dir(tmp_path):
+    # Keeps DatabaseManager from creating attendance_partitions/ in the working directory
+    return str(tmp_path / 'partitions')
+
+
+def hold_write_lock(path):
+    """Another process's connection in the middle of a write transaction"""
+    other = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    other.execute('BEGIN IMMEDIATE')
+    return other
+
+
+def insert(conn, student_id):
+    return conn.execute('INSERT INTO marks VALUES (?)', (student_id,)).rowcount
+
+
+def test_locked_write_is_retried_until_the_lock_is_released(db_path, partition_dir):
+    other = hold_write_lock(db_path)
+    threading.Timer(0.3, other.rollback).start()
+    db = DatabaseManager(db_path, busy_timeout=0.02, retries=12, log_retries=False, partition_dir=partition_dir)
+    try:
+        assert db.write(insert, 'S1') == 1
+        stats = db.stats()
+        assert stats['retried_writes'] == 1 and stats['retries'] >= 1 and stats['failed_writes'] == 0
+    finally:
+        db.close()
+        other.close()
+
+
+def test_write_gives_up_after_its_retries(db_path, partition_dir):
+    other = hold_write_lock(db_path)
+    db = DatabaseManager(db_path, busy_timeout=0.01, retries=2, log_retries=False, partition_dir=partition_dir)
+    try:
+        with pytest.raises(sqlite3.OperationalError, match='locked'):
+            db.write(insert, 'S1')
+        assert db.stats()['retries'] == 2 and db.stats()['failed_writes'] == 1
+    finally:
+        other.rollback()
+        other.close()
+        db.close()
+
+
+def test_other_errors_roll_back_without_retrying(db_path, partition_dir):
+    db = DatabaseManager(db_path, busy_timeout=0.01, log_retries=False, partition_dir=partition_dir)
+
+    def insert_twice(conn):
+        insert(conn, 'S2')
+        insert(conn, 'S2')
+
+    try:
+        with pytest.raises(sqlite3.IntegrityError):
+            db.write(insert_twice)
+        assert db.stats()['retries'] == 0
+        assert db.connection().execute('SELECT COUNT(*) FROM marks').fetchone()[0] == 0
+    finally:
+        db.close()
+
+
+def write_marks(path, partition_dir, writer, count, start, results):
+    """One kiosk process: `count` marks through its own manager, each holding the write lock briefly"""
+    db = DatabaseManager(path, busy_timeout=0.005, retries=60, log_retries=False, partition_dir=partition_dir)
+
+    def insert_slowly(conn, student_id):
+        insert(conn, student_id)
+        time.sleep(0.005)  # Still inside the transaction, so the other writers find the database locked
+
+    try:
+        start.wait()
+        for i in range(count):
+            db.write(insert_slowly, f"{writer}-{i}")
+        results.put(db.stats())
+    finally:
+        db.close()
+
+
+def test_concurrent_writer_processes_lose_no_marks(db_path, partition_dir):
+    context = multiprocessing.get_context('spawn')
+    start, results = context.Event(), context.Queue()
+    writers = [context.Process(target=write_marks, args=(db_path, partition_dir, writer, 15, start, results))
+               for writer in range(3)]
+    for process in writers:
+        process.start()
+    start.set()
+    stats = [results.get(timeout=60) for _ in writers]
+    for process in writers:
+        process.join(timeout=10)
+        assert process.exitcode == 0
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute('SELECT COUNT(*) FROM marks').fetchone()[0] == 3 * 15
+    finally:
+        conn.close()
+    assert sum(s['writes'] for s in stats) == 3 * 15
+    assert sum(s['failed_writes'] for s in stats) == 0
+    assert sum(s['retries'] for s in stats) > 0
+
+
+def test_each_thread_gets_its_own_connection(db_path, partition_dir):
+    db = DatabaseManager(db_path, log_retries=False, partition_dir=partition_dir)
+    try:
+        seen = {}
+
+        def worker():
+            seen['conn'] = db.connection()
+            seen['partitions'] = db.partitions()
+            seen['same'] = db.connection() is seen['conn']
+            db.release()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        assert seen['same'] and seen['conn'] is not db.connection()
+        assert seen['partitions'].conn is seen['conn'] and db.partitions().conn is db.connection()
+        assert seen['conn'] not in db._connections  # Released by its thread
+        assert db.connection().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    finally:
+        db.close()
+
+
+def test_writes_run_in_order_on_the_writer_thread(db_path, partition_dir):
+    db = DatabaseManager(db_path, log_retries=False, partition_dir=partition_dir)
+    threads = []
+
+    def insert_from_writer(conn, student_id):
+        threads.append(threading.current_thread().name)
+        return insert(conn, student_id)
+
+    try:
+        futures = [db.submit(insert_from_writer, f"S{i}") for i in range(20)]
+        assert [future.result() for future in futures] == [1] * 20
+        assert set(threads) == {'attendance-db-writer'}
+        rows = db.connection().execute('SELECT student_id FROM marks ORDER BY rowid').fetchall()
+        assert [row[0] for row in rows] == [f"S{i}" for i in range(20)]
+        assert db.stats()['writes'] == 20 and db.stats()['queued'] == 0
+    finally:
+        db.close()
+
+
+def test_readers_see_committed_rows_while_a_write_is_open(db_path, partition_dir):
+    db = DatabaseManager(db_path, log_retries=False, partition_dir=partition_dir)
+    db.write(insert, 'S1')
+    inside, finish = threading.Event(), threading.Event()
+
+    def slow_write(conn):
+        insert(conn, 'S2')
+        inside.set()
+        finish.wait(5)
+
+    try:
+        future = db.submit(slow_write)
+        assert inside.wait(5)
+        # WAL: the read neither blocks on the open write nor sees it
+        assert db.connection().execute('SELECT COUNT(*) FROM marks').fetchone()[0] == 1
+        finish.set()
+        future.result()
+        assert db.connection().execute('SELECT COUNT(*) FROM marks').fetchone()[0] == 2
+    finally:
+        finish.set()
+        db.close()
+
+
+def test_close_finishes_queued_writes(db_path, partition_dir):
+    db = DatabaseManager(db_path, log_retries=False, partition_dir=partition_dir)
+    futures = [db.submit(insert, f"S{i}") for i in range(5)]
+    db.close()
+    assert all(future.done() for future in futures)
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute('SELECT COUNT(*) FROM marks').fetchone()[0] == 5
+    finally:
+        conn.close()
@@ -0,0 +1,59 @@
+import csv
+import os
+import sys
+
+import pytest
+
+import attendance_export
+from attendance_export import AttendanceExporter
+from conftest import add_marks
+
+
+MARKS = [('s1', '2025-01-06', '08:55:00'), ('s2', '2025-01-06', '09:10:00'), ('s1', '2025-02-03', '08:40:00'),
+         ('s2', '2025-02-04', '10:05:00'), ('s1', '2025-03-03', '09:00:00')]
+
+
+def test_csv_export_streams_every_partition_in_chunks(partitioned, tmp_path):
+    conn, partitions = partitioned
+    add_marks(conn, partitions, MARKS)
+    exporter = AttendanceExporter(conn, str(tmp_path / 'out'), chunk_size=2, partitions=partitions)
+
+    stats = exporter.export('csv', start_date='2025-01-01', end_date='2025-02-28')
+
+    with open(stats['path'], newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == list(attendance_export.EXPORT_COLUMNS)
+    assert [(row[0], row[2]) for row in rows[1:]] == [(student_id, date) for student_id, date, _ in MARKS[:4]]
+    assert stats['rows'] == 4
+    assert os.listdir(tmp_path / 'out') == [os.path.basename(stats['path'])]
+
+
+def test_failed_export_leaves_no_file(partitioned, tmp_path, monkeypatch):
+    conn, partitions = partitioned
+    add_marks(conn, partitions, MARKS)
+    exporter = AttendanceExporter(conn, str(tmp_path / 'out'), chunk_size=2, partitions=partitions)
+    chunks = exporter.iter_chunks
+
+    def failing_chunks(*args):
+        iterator = chunks(*args)
+        yield next(iterator)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(exporter, 'iter_chunks', failing_chunks)
+    with pytest.raises(OSError, match='disk full'):
+        exporter.export('csv', path=str(tmp_path / 'out' / 'export.csv'))
+    # Neither the half-written .part file nor a final file is left behind
+    assert os.listdir(tmp_path / 'out') == []
+
+
+def test_cli_offers_columnar_formats_only_with_pyarrow(monkeypatch, capsys):
+    monkeypatch.setattr(attendance_export, 'pa', None)
+    monkeypatch.setattr(sys, 'argv', ['attendance_export.py', '--format', 'parquet'])
+    with pytest.raises(SystemExit):
+        attendance_export.main()
+    assert "invalid choice: 'parquet'" in capsys.readouterr().err
+
+    monkeypatch.setattr(sys, 'argv', ['attendance_export.py', '--help'])
+    with pytest.raises(SystemExit):
+        attendance_export.main()
+    assert 'parquet and feather need pyarrow' in capsys.readouterr().out
@@ -0,0 +1,64 @@
+import pytest
+
+from attendance_analytics import AttendanceAnalytics
+from conftest import add_marks
+
+
+def count(conn, partitions):
+    total = 0
+    for source in partitions.iter_sources(include_archived=True):
+        total += conn.execute(f'SELECT COUNT(*) FROM {source}').fetchone()[0]
+    return total
+
+
+def test_attaching_inside_a_transaction_raises(partitioned):
+    conn, partitions = partitioned
+    add_marks(conn, partitions, [('s1', '2024-12-02', '09:00:00')])
+    partitions.active_table('2025-01-10')
+    conn.execute("INSERT INTO students VALUES ('s1', 'One', '2025-01-01')")
+
+    with pytest.raises(RuntimeError):
+        partitions.active_table('2025-02-10')
+    with pytest.raises(RuntimeError):
+        list(partitions.iter_sources())
+    # The caller's transaction was neither committed nor lost
+    assert conn.in_transaction
+    conn.rollback()
+    assert conn.execute('SELECT COUNT(*) FROM students').fetchone()[0] == 0
+
+
+def test_writing_spans_partitions_in_one_transaction(partitioned):
+    conn, partitions = partitioned
+    dates = ['2025-01-31', '2025-02-01']
+    with pytest.raises(ZeroDivisionError):
+        with partitions.writing(dates) as tables:
+            for date in dates:
+                table = tables[date[:7]]
+                conn.execute(f"INSERT INTO {table} (student_id, name, date, time) VALUES ('s1', 'One', ?, '09:00')",
+                             (date,))
+            conn.execute("INSERT INTO students VALUES ('s1', 'One', '2025-01-01')")
+            1 / 0
+
+    assert count(conn, partitions) == 0
+    assert conn.execute('SELECT COUNT(*) FROM students').fetchone()[0] == 0
+
+    with partitions.writing(dates) as tables:
+        for date in dates:
+            conn.execute(f"INSERT INTO {tables[date[:7]]} (student_id, name, date, time) VALUES ('s1', 'One', ?, '09:00')",
+                         (date,))
+    assert count(conn, partitions) == 2
+    assert [key for key, _ in partitions.keys()] == ['2025-01', '2025-02']
+
+
+def test_partial_range_rates_include_archived_partitions(partitioned, analytics):
+    conn, partitions = partitioned
+    conn.execute("INSERT INTO students VALUES ('s1', 'One', '2025-01-01')")
+    conn.commit()
+    add_marks(conn, partitions, [('s1', '2025-01-06', '09:00:00'), ('s1', '2025-01-07', '09:00:00'),
+                                 ('s1', '2025-03-03', '09:00:00')], analytics)
+    partitions.active_table('2025-03-03')
+    partitions.archive('2025-01')
+
+    whole = analytics.student_rates('2025-01-01', '2025-01-31')[0]
+    partial = analytics.student_rates('2025-01-02', '2025-01-31')[0]
+    assert whole['days_present'] == partial['days_present'] == 2
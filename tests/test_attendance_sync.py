@@ -0,0 +1,142 @@
+import sqlite3
+import threading
+
+import pytest
+
+from attendance_db import DatabaseManager
+from attendance_sync import AggregationServer, SyncAgent
+
+
+def kiosk_marks(db, marks):
+    """Write (student_id, date) marks into a kiosk database"""
+    def insert(conn):
+        for student_id, date in marks:
+            table = db.partitions().active_table(date)
+            conn.execute(f'''
+                INSERT OR IGNORE INTO {table} (student_id, name, date, time, status)
+                VALUES (?, ?, ?, '09:00:00', 'Present')
+            ''', (student_id, student_id, date))
+            conn.commit()
+    db.write(insert)
+
+
+def server_marks(server):
+    conn = server.db.connection()
+    try:
+        return sorted(row for source in server.db.partitions().iter_sources(include_archived=True)
+                      for row in conn.execute(f'SELECT student_id, date FROM {source}'))
+    finally:
+        server.db.release()
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = AggregationServer(str(tmp_path / 'server.db'), str(tmp_path / 'server_partitions'))
+    yield server
+    server.db.close()
+
+
+@pytest.fixture
+def running(server):
+    httpd = server.make_http_server('127.0.0.1', 0)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def kiosk(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'kiosk.db'), partition_dir=str(tmp_path / 'kiosk_partitions'))
+    yield db
+    db.close()
+
+
+def make_agent(url, tmp_path, state='state.json'):
+    return SyncAgent(url, 'kiosk-a', str(tmp_path / 'kiosk.db'), str(tmp_path / state),
+                     batch_size=2, partition_dir=str(tmp_path / 'kiosk_partitions'))
+
+
+CROSS_MONTH = [[1, 'S1', 'S1', '2026-09-30', '09:00:00', 'Present'],
+               [2, 'S2', 'S2', '2026-10-01', '09:00:00', 'Present']]
+
+
+def test_cross_month_batch_is_all_or_nothing(server):
+    server.db.write(lambda conn: conn.execute('ALTER TABLE sync_high_water RENAME TO broken'))
+    with pytest.raises(sqlite3.OperationalError):
+        server.db.write(server.ingest, 'kiosk-a', 'b1', '2026-09', CROSS_MONTH)
+    assert server_marks(server) == []
+
+    server.db.write(lambda conn: conn.execute('ALTER TABLE broken RENAME TO sync_high_water'))
+    assert server.status()['batches'] == 0
+    result = server.db.write(server.ingest, 'kiosk-a', 'b1', '2026-09', CROSS_MONTH)
+    assert result == {'marks': 2, 'accepted': 2, 'replayed': False}
+    assert server_marks(server) == [('S1', '2026-09-30'), ('S2', '2026-10-01')]
+
+
+def test_resent_batch_is_answered_from_the_log(server):
+    first = server.db.write(server.ingest, 'kiosk-a', 'b1', '2026-09', CROSS_MONTH)
+    again = server.db.write(server.ingest, 'kiosk-a', 'b1', '2026-09', CROSS_MONTH)
+    assert again == {'marks': 2, 'accepted': first['accepted'], 'replayed': True}
+    # Same marks under a new batch ID: stored once
+    other = server.db.write(server.ingest, 'kiosk-b', 'b2', '2026-09', CROSS_MONTH)
+    assert other['accepted'] == 0
+    assert server.status()['marks_accepted'] == 2
+
+
+def test_request_threads_release_their_connections(server):
+    server.db.write(server.ingest, 'kiosk-a', 'b1', '2026-09', CROSS_MONTH)
+    before = len(server.db._connections)
+    threads = [threading.Thread(target=server.high_water, args=('kiosk-a',)) for _ in range(5)]
+    threads += [threading.Thread(target=server.status) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(server.db._connections) == before
+    assert server.high_water('kiosk-a') == {'partitions': {'2026-09': 2}}
+
+
+def test_late_write_to_an_older_partition_is_synced(server, running, kiosk, tmp_path):
+    kiosk_marks(kiosk, [('S1', '2026-09-29'), ('S2', '2026-09-30'), ('S1', '2026-10-01')])
+    agent = make_agent(running, tmp_path)
+    assert agent.sync_once()['marks'] == 3
+    assert agent.sync_once()['marks'] == 0
+
+    kiosk_marks(kiosk, [('S3', '2026-09-30')])  # Written after October's marks were sent
+    stats = make_agent(running, tmp_path).sync_once()
+    assert (stats['marks'], stats['accepted']) == (1, 1)
+    assert ('S3', '2026-09-30') in server_marks(server)
+
+
+def test_lost_state_resumes_from_the_server(server, running, kiosk, tmp_path):
+    kiosk_marks(kiosk, [('S1', '2026-09-30'), ('S2', '2026-09-30'), ('S1', '2026-10-01')])
+    make_agent(running, tmp_path).sync_once()
+    (tmp_path / 'state.json').unlink()
+
+    agent = make_agent(running, tmp_path)
+    assert agent.sync_once()['marks'] == 0
+    assert agent.state == {'partitions': {'2026-09': 2, '2026-10': 1}}
+
+
+def test_busy_kiosk_database_backs_off_instead_of_stopping(monkeypatch, tmp_path):
+    agent = make_agent('http://127.0.0.1:9', tmp_path)
+
+    def locked():
+        raise sqlite3.OperationalError('database is locked')
+
+    class Stop(Exception):
+        pass
+
+    delays = []
+
+    def sleep(seconds):
+        delays.append(seconds)
+        if len(delays) == 2:
+            raise Stop
+
+    monkeypatch.setattr(agent, 'sync_once', locked)
+    monkeypatch.setattr('attendance_sync.time.sleep', sleep)
+    with pytest.raises(Stop):
+        agent.run(interval=1.0)
+    assert len(delays) == 2 and delays[1] > 1.0  # Still running, backing off
@@ -0,0 +1,25 @@
+import cv2
+import numpy as np
+
+import bulk_enroll
+from attendance_config import AttendanceConfig
+
+
+def test_enrollment_follows_the_configured_templates(tmp_path, monkeypatch):
+    images = []
+    for i in range(4):
+        path = tmp_path / f"photo{i}.png"
+        cv2.imwrite(str(path), np.random.default_rng(i).integers(0, 256, (200, 200, 3), dtype=np.uint8))
+        images.append(str(path))
+    monkeypatch.setattr(bulk_enroll, 'detect_face', lambda gray: gray[20:140, 20:140])
+
+    for profile in ('low-power-kiosk', 'high-accuracy-desk'):
+        config = AttendanceConfig(profile)
+        bulk_enroll._init_worker(config, config.min_face_size)
+        student_id, _, templates, errors, started, finished = bulk_enroll.enroll_one(('s1', 'One', images))
+
+        assert student_id == 's1' and not errors
+        expected_captures = min(len(images), -(-config.templates_per_student // len(config.template_sizes)))
+        assert len(templates) == expected_captures * len(config.template_sizes)
+        assert sorted({t.shape[0] for t in templates}) == sorted(config.template_sizes)
+        assert finished >= started
@@ -0,0 +1,52 @@
+import pytest
+
+from camera_profiles import PROFILES, SyntheticCapture, auto_probe
+
+
+class SlowMjpgCapture(SyntheticCapture):
+    """A camera whose MJPG stream tops out at 15 FPS, so raw YUYV reads faster"""
+
+    MODES = {
+        (320, 240, 'MJPG'): 30,
+        (640, 480, 'MJPG'): 15,
+        (640, 480, 'YUYV'): 30,
+        (1280, 720, 'YUYV'): 10,
+    }
+
+
+class LowResCapture(SyntheticCapture):
+    """A camera that cannot deliver a frame tall enough for the detector"""
+
+    MODES = {
+        (320, 240, 'MJPG'): 30,
+        (320, 240, 'YUYV'): 30,
+    }
+
+
+def probe(camera, min_face_size=50, time_scale=0.5):
+    return auto_probe(min_face_size=min_face_size, frames=5,
+                      capture_factory=lambda source: camera(source, time_scale=time_scale))
+
+
+def test_picks_the_fastest_usable_profile():
+    best, results = probe(SyntheticCapture)
+    assert best is PROFILES['vga-mjpg']
+    by_name = {result['profile'].name: result for result in results}
+    assert not by_name['low-power']['usable']  # 240 lines leave a far face under 50 px
+    assert (by_name['hd-mjpg']['width'], by_name['hd-mjpg']['height']) == (1280, 720)
+
+
+def test_frame_rate_limits_change_the_choice():
+    best, results = probe(SlowMjpgCapture)
+    assert best is PROFILES['vga-yuyv']
+    by_name = {result['profile'].name: result for result in results}
+    # hd-mjpg falls back to the camera's 15 FPS VGA MJPG mode
+    assert (by_name['hd-mjpg']['width'], by_name['hd-mjpg']['height']) == (640, 480)
+    assert by_name['vga-mjpg']['latency_ms'] > by_name['vga-yuyv']['latency_ms']
+
+
+@pytest.mark.parametrize('camera, min_face_size', [(LowResCapture, 50), (SyntheticCapture, 200)])
+def test_keeps_driver_defaults_when_no_mode_is_usable(camera, min_face_size):
+    best, results = probe(camera, min_face_size, time_scale=0.05)
+    assert best is PROFILES['default']
+    assert len(results) == len(PROFILES) and not any(result['usable'] for result in results)
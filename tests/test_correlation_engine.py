@@ -0,0 +1,52 @@
+import cv2
+import numpy as np
+import pytest
+
+from conftest import face_image, make_gallery, probes_of
+from correlation_engine import ShiftCorrelator
+from face_gallery import CompactGallery
+
+
+def direct_search(gallery, crops, shift):
+    """Best cv2.matchTemplate score of each template over the crop moved by up to `shift` px"""
+    scores = np.full((len(crops), len(gallery)), -np.inf)
+    for i, crop in enumerate(crops):
+        for position, templates in enumerate(gallery):
+            for template in templates:
+                height, width = template.shape
+                padded = cv2.copyMakeBorder(cv2.resize(crop, (width, height)), shift, shift, shift, shift,
+                                            cv2.BORDER_REFLECT_101)
+                surface = cv2.matchTemplate(padded, template, cv2.TM_CCOEFF_NORMED)
+                assert surface.shape == (2 * shift + 1, 2 * shift + 1)
+                scores[i, position] = max(scores[i, position], surface.max())
+    return scores
+
+
+@pytest.mark.parametrize('shift', [1, 3])
+def test_fft_search_agrees_with_a_direct_search(shift):
+    gallery = make_gallery(6)
+    crops = probes_of(gallery, [0, 4])
+    # A tiny chunk budget scores one template per product
+    correlator = ShiftCorrelator(CompactGallery(gallery), shift, chunk_bytes=1)
+
+    np.testing.assert_allclose(correlator.best_scores(crops), direct_search(gallery, crops, shift), atol=1e-3)
+
+
+def test_int8_gallery_spectra_use_the_row_scales():
+    gallery = make_gallery(6)
+    crops = probes_of(gallery, [2, 5])
+    exact = ShiftCorrelator(CompactGallery(gallery), 2).best_scores(crops)
+    np.testing.assert_allclose(ShiftCorrelator(CompactGallery(gallery, 'int8'), 2).best_scores(crops), exact,
+                               atol=5e-3)
+
+
+def test_shift_recovers_a_misaligned_crop():
+    image = face_image(np.random.default_rng(7), 120)
+    template, moved = image[10:110, 10:110], image[12:112, 8:108]  # Same face, box 2 px off
+    gallery = make_gallery(5) + [[template]]
+    compact = CompactGallery(gallery)
+
+    aligned_score = compact.best_scores([moved])[0, 5]
+    shifted = ShiftCorrelator(compact, 2).best_scores([moved])[0]
+    assert shifted[5] > 0.95 > aligned_score
+    assert shifted.argmax() == 5
@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+from course_roster import CourseRoster
+
+
+@pytest.fixture
+def roster(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'attendance.db'))
+    roster = CourseRoster(conn)
+    roster.ensure_schema()
+    roster.ensure_schema()  # Idempotent, as every startup runs it
+    yield roster
+    conn.close()
+
+
+def test_enrolment_is_idempotent_and_counted_per_course(roster):
+    roster.add_course('CS101', 'Intro')
+    roster.add_course('MA201', 'Calculus')
+    roster.enroll('CS101', ['S1', 'S2', 'S1'])
+    roster.enroll('CS101', ['S2', 'S3'])
+    roster.enroll('MA201', ['S1'])
+    roster.add_course('CS101', 'Intro to Programming')  # Renaming keeps the enrolments
+    roster.conn.commit()
+
+    assert sorted(roster.roster('CS101')) == ['S1', 'S2', 'S3']
+    assert roster.courses() == [('CS101', 'Intro to Programming', 3), ('MA201', 'Calculus', 1)]
+
+    roster.unenroll('CS101', ['S2', 'S9'])
+    assert sorted(roster.roster('CS101')) == ['S1', 'S3']
+
+
+def test_session_marks_count_once_and_record_enrolment(roster):
+    roster.add_course('CS101', 'Intro')
+    roster.enroll('CS101', ['S1'])
+    session_id = roster.start_session('CS101', '2025-03-03', '09:00:00')
+    cursor = roster.conn.cursor()
+
+    assert roster.record_mark(cursor, session_id, 'S1', '09:01:00')
+    assert not roster.record_mark(cursor, session_id, 'S1', '09:05:00')
+    assert roster.record_mark(cursor, session_id, 'S7', '09:02:00', enrolled=False)
+    roster.end_session(session_id, '10:00:00')
+    roster.conn.commit()
+
+    assert roster.session_marked(session_id) == {'S1', 'S7'}
+    assert roster.conn.execute('SELECT student_id, time, enrolled FROM session_attendance ORDER BY student_id'
+                               ).fetchall() == [('S1', '09:01:00', 1), ('S7', '09:02:00', 0)]
+    assert roster.conn.execute('SELECT end_time FROM sessions').fetchone() == ('10:00:00',)
+
+
+def test_forget_student_removes_enrolments_and_session_marks_in_the_callers_transaction(roster):
+    roster.add_course('CS101', 'Intro')
+    roster.enroll('CS101', ['S1', 'S2'])
+    session_id = roster.start_session('CS101', '2025-03-03', '09:00:00')
+    cursor = roster.conn.cursor()
+    roster.record_mark(cursor, session_id, 'S1', '09:01:00')
+    roster.record_mark(cursor, session_id, 'S2', '09:02:00')
+    roster.conn.commit()
+
+    roster.forget_student(cursor, 'S1')
+    roster.conn.rollback()
+    assert sorted(roster.roster('CS101')) == ['S1', 'S2']  # Nothing committed on the caller's behalf
+
+    roster.forget_student(cursor, 'S1')
+    roster.conn.commit()
+    assert roster.roster('CS101') == ['S2']
+    assert roster.session_marked(session_id) == {'S2'}
+    assert roster.courses() == [('CS101', 'Intro', 1)]
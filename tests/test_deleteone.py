@@ -0,0 +1,91 @@
+import os
+import runpy
+import sqlite3
+
+import pytest
+
+from attendance_analytics import AttendanceAnalytics
+from attendance_partitions import AttendancePartitions
+from conftest import add_marks
+from course_roster import CourseRoster
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'deleteone.py')
+
+
+@pytest.fixture
+def kiosk(tmp_path, monkeypatch):
+    """A kiosk database where student 106 (deleteone.py's ID) has marks in twelve partitions, one archived"""
+    monkeypatch.chdir(tmp_path)
+    conn = sqlite3.connect('smart_attendance.db', uri=True)
+    conn.execute('CREATE TABLE students (student_id TEXT PRIMARY KEY, name TEXT, registration_date TEXT)')
+    conn.execute('CREATE TABLE attendance (student_id TEXT, name TEXT, date TEXT, time TEXT, status TEXT)')
+    conn.executemany('INSERT INTO students VALUES (?, ?, ?)', [('106', 'Gone', '2024-01-01'),
+                                                               ('107', 'Kept', '2024-01-01')])
+    conn.commit()
+    partitions = AttendancePartitions(conn)
+    analytics = AttendanceAnalytics(conn, partitions)
+    analytics.ensure_schema()
+    roster = CourseRoster(conn)
+    roster.ensure_schema()
+    roster.add_course('C1', 'Course')
+    roster.enroll('C1', ['106', '107'])
+    conn.commit()
+    marks = [(student_id, f"2024-{month:02d}-10", '09:00:00') for month in range(1, 13) for student_id in ('106', '107')]
+    add_marks(conn, partitions, marks, analytics)
+    partitions.active_table('2024-12-10')
+    partitions.archive('2024-01')
+    conn.close()
+    return tmp_path
+
+
+def rows(student_id):
+    conn = sqlite3.connect('smart_attendance.db', uri=True)
+    partitions = AttendancePartitions(conn)
+    try:
+        found = sum(conn.execute(f'SELECT COUNT(*) FROM {source} WHERE student_id = ?', (student_id,)).fetchone()[0]
+                    for source in partitions.iter_sources(include_archived=True))
+        found += conn.execute('SELECT COUNT(*) FROM students WHERE student_id = ?', (student_id,)).fetchone()[0]
+        found += conn.execute('SELECT COUNT(*) FROM enrollments WHERE student_id = ?', (student_id,)).fetchone()[0]
+        return found
+    finally:
+        conn.close()
+
+
+def rollups():
+    conn = sqlite3.connect('smart_attendance.db', uri=True)
+    try:
+        return (sorted(conn.execute('SELECT * FROM rollup_student_month').fetchall()),
+                sorted(conn.execute('SELECT * FROM rollup_day_hour').fetchall()))
+    finally:
+        conn.close()
+
+
+def test_deletes_every_partition_and_keeps_rollups_exact(kiosk):
+    runpy.run_path(SCRIPT)
+
+    assert rows('106') == 0
+    assert rows('107') == 12 + 1 + 1
+    deleted = rollups()
+    conn = sqlite3.connect('smart_attendance.db', uri=True)
+    AttendanceAnalytics(conn, AttendancePartitions(conn)).rebuild()
+    conn.close()
+    assert rollups() == deleted
+    assert ('2024-03-10', 9, 1) in deleted[1]
+
+
+def test_failed_delete_changes_nothing(kiosk, monkeypatch):
+    # Up to the attach limit, the rollups and every row go in one transaction
+    for key in ('2024-01', '2024-02', '2024-03', '2024-04', '2024-05'):
+        os.remove(os.path.join('attendance_archive' if key == '2024-01' else 'attendance_partitions',
+                               f"attendance_{key}.db"))
+    before = rows('106'), rollups()
+
+    def failing(self, cursor, student_id):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(CourseRoster, 'forget_student', failing)
+    with pytest.raises(sqlite3.OperationalError):
+        runpy.run_path(SCRIPT)
+
+    assert (rows('106'), rollups()) == before
+    assert before[0] == 7 + 1 + 1
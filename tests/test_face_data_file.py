@@ -0,0 +1,53 @@
+import threading
+import time
+
+import numpy as np
+
+from face_data_file import load_face_data, update_face_data
+
+
+def test_concurrent_updates_keep_every_change(tmp_path):
+    path = str(tmp_path / 'faces' / 'smart_face_data.pkl')
+
+    def register(writer):
+        for i in range(5):
+            student_id = f"{writer}-{i}"
+
+            def add(data):
+                time.sleep(0.002)  # Widen the read-modify-write window
+                data['face_data'][student_id] = [np.zeros((2, 2), np.uint8)]
+                data['students'][student_id] = {'name': student_id, 'id': student_id}
+
+            update_face_data(add, path)
+
+    threads = [threading.Thread(target=register, args=(writer,)) for writer in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    data = load_face_data(path)
+    assert len(data['face_data']) == len(data['students']) == 30
+
+
+def test_missing_file_loads_empty(tmp_path):
+    assert load_face_data(str(tmp_path / 'missing.pkl')) == {'face_data': {}, 'students': {}, 'revisions': {}}
+
+
+def test_revisions_mark_only_replaced_students(tmp_path):
+    path = str(tmp_path / 'smart_face_data.pkl')
+
+    def put(*student_ids):
+        def update(data):
+            for student_id in student_ids:
+                data['face_data'][student_id] = [np.zeros((2, 2), np.uint8)]
+        return update
+
+    data, before, after = update_face_data(put('S1', 'S2'), path)
+    assert before is None and after is not None
+    assert data['revisions'] == {'S1': 1, 'S2': 1}
+    assert update_face_data(put('S2'), path)[0]['revisions'] == {'S1': 1, 'S2': 2}
+    update_face_data(lambda data: data['face_data'].pop('S2'), path)
+    # A student re-added after a deletion never gets a number a reader has already seen
+    assert update_face_data(put('S2'), path)[0]['revisions'] == {'S1': 1, 'S2': 4}
+    assert load_face_data(path)['revisions'] == {'S1': 1, 'S2': 4}
@@ -0,0 +1,96 @@
+import time
+
+import numpy as np
+import pytest
+
+import face_detectors
+from face_detectors import DEFAULT_DETECTORS, DetectorChain, FaceDetectorBackend, register_backend
+
+FRAME = np.zeros((120, 160), dtype=np.uint8)
+
+
+class FakeBackend(FaceDetectorBackend):
+    def __init__(self, name, cost_hint, finds=False, seconds=0.0, available=True):
+        super().__init__(name, cost_hint)
+        self.finds = finds
+        self.seconds = seconds
+        self.is_available = available
+
+    @property
+    def available(self):
+        return self.is_available
+
+    def detect(self, gray, min_size):
+        time.sleep(self.seconds)
+        return [(0, 0, min_size, min_size)] if self.finds else []
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """An empty backend registry; register(name, ...) adds a FakeBackend and counts its builds"""
+    monkeypatch.setattr(face_detectors, 'DETECTOR_BACKENDS', {})
+    built = {}
+
+    def register(name, cost_hint, **kwargs):
+        @register_backend(name)
+        def factory():
+            built[name] = built.get(name, 0) + 1
+            return FakeBackend(name, cost_hint, **kwargs)
+        return factory
+
+    register.built = built
+    return register
+
+
+def test_only_named_backends_are_built(registry):
+    registry('cheap', 1.0)
+    registry('slow', 6.0)
+    registry('broken', 2.0, available=False)
+
+    chain = DetectorChain(['broken', 'cheap'])
+    assert [backend.name for backend in chain.backends] == ['cheap']
+    assert registry.built == {'broken': 1, 'cheap': 1}
+    with pytest.raises(ValueError, match='missing'):
+        DetectorChain(['cheap', 'missing'])
+    with pytest.raises(RuntimeError):
+        DetectorChain(['broken'])
+
+
+def test_default_chain_is_the_frontal_haar_cascade():
+    chain = DetectorChain()
+    assert [backend.name for backend in chain.backends] == list(DEFAULT_DETECTORS) == ['haar_default']
+    assert chain.calibrated  # A single backend needs no calibration
+    assert chain.detect(FRAME) == [] and chain.calibration is None
+
+
+def test_fallbacks_run_in_cost_order_and_only_every_few_empty_frames(registry):
+    registry('profile', 4.0, finds=True)
+    registry('frontal', 1.0)
+    registry('alt', 2.0)
+    chain = DetectorChain(['profile', 'frontal', 'alt'], escalate_every=3)
+    chain.calibrated = True  # Order by the cost hints
+
+    assert len(chain.detect(FRAME)) == 1
+    assert [name for name, _, _ in chain.last_diagnostics['tried']] == ['frontal', 'alt', 'profile']
+    assert chain.last_diagnostics['backend'] == 'profile'
+
+    next(backend for backend in chain.backends if backend.name == 'profile').finds = False
+    tried = []
+    for _ in range(6):
+        chain.detect(FRAME)
+        tried.append(len(chain.last_diagnostics['tried']))
+    # An empty scene escalates to the fallbacks only on every third empty frame
+    assert tried == [3, 1, 1, 3, 1, 1]
+
+
+def test_calibration_runs_in_the_background_on_separate_backends(registry):
+    registry('hinted_cheap', 1.0, seconds=0.03)
+    registry('hinted_slow', 5.0, finds=True)
+    chain = DetectorChain(['hinted_cheap', 'hinted_slow'])
+
+    assert len(chain.detect(FRAME)) == 1  # Cost hints order the first frame
+    chain.calibration.join(timeout=5)
+    assert chain.calibrated
+    assert [backend.name for backend in chain.order()] == ['hinted_slow', 'hinted_cheap']
+    assert registry.built == {'hinted_cheap': 2, 'hinted_slow': 2}
+    assert [backend.calls for backend in chain.backends] == [1, 1]  # The chain's own were not used to time
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from conftest import make_gallery, probes_of
+from face_gallery import ALIGNMENT, CompactGallery
+
+
+@pytest.mark.parametrize('dtype, tolerance', [('float16', 1e-3), ('int8', 5e-3)])
+def test_narrow_scoring_copies_stay_close_to_float32(dtype, tolerance):
+    gallery = make_gallery(60)
+    crops = probes_of(gallery, [1, 30, 58])
+    exact = CompactGallery(gallery).best_scores(crops)
+    # A small widening chunk scores each block in several pieces
+    narrow = CompactGallery(gallery, dtype, chunk_bytes=4096)
+
+    np.testing.assert_allclose(narrow.best_scores(crops), exact, atol=tolerance)
+    assert (narrow.best_scores(crops).argmax(axis=1) == exact.argmax(axis=1)).all()
+    assert narrow.nbytes()['scoring'] * {'float16': 2, 'int8': 4}[dtype] == CompactGallery(gallery).nbytes()['scoring']
+
+
+def test_blocks_keep_every_template_aligned_and_in_place():
+    gallery = make_gallery(9)
+    compact = CompactGallery(gallery, 'int8')
+
+    assert sorted(compact.blocks) == [(50, 50), (75, 75), (100, 100)]
+    for block in compact.blocks.values():
+        assert block.templates.ctypes.data % ALIGNMENT == 0 and block.scoring.ctypes.data % ALIGNMENT == 0
+    for position, templates in enumerate(gallery):
+        stored = compact.templates(position)
+        assert sorted(template.tobytes() for template in stored) == sorted(template.tobytes() for template in templates)
+
+
+def test_unknown_dtype_is_rejected():
+    with pytest.raises(ValueError, match='float64'):
+        CompactGallery(make_gallery(1), 'float64')
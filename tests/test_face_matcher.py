@@ -0,0 +1,51 @@
+import cv2
+import numpy as np
+
+from conftest import make_gallery, probes_of
+from face_matcher import TemplateMatcher
+
+
+def reference_scores(gallery, crops):
+    """Best cv2.matchTemplate TM_CCOEFF_NORMED score per crop and student"""
+    scores = np.full((len(crops), len(gallery)), -np.inf)
+    for i, crop in enumerate(crops):
+        for position, templates in enumerate(gallery):
+            for template in templates:
+                resized = cv2.resize(crop, (template.shape[1], template.shape[0]))
+                value = cv2.matchTemplate(resized, template, cv2.TM_CCOEFF_NORMED)[0, 0]
+                scores[i, position] = max(scores[i, position], value)
+    return scores
+
+
+def test_batched_scores_agree_with_match_template():
+    gallery = make_gallery(12)
+    crops = probes_of(gallery, [0, 5, 11])
+    matcher = TemplateMatcher(gallery)
+
+    np.testing.assert_allclose(matcher.scores(crops), reference_scores(gallery, crops), atol=1e-4)
+
+
+def test_match_batch_agrees_with_the_per_template_loop():
+    gallery = make_gallery(12)
+    crops = probes_of(gallery, [3, 7, 8])
+    matcher = TemplateMatcher(gallery, threshold=0.65)
+
+    assert matcher.match_batch(crops) == [matcher.match_loop(crop) for crop in crops] == [3, 7, 8, -1]
+    assert matcher.match_batch([]) == []
+    assert TemplateMatcher([]).match_batch(crops) == [-1] * len(crops)
+
+
+def test_sharded_scoring_matches_one_thread(monkeypatch):
+    monkeypatch.setattr('face_matcher.MIN_SHARD_STUDENTS', 4)
+    gallery = make_gallery(40)
+    gallery[33] = gallery[2]  # Same templates in the first and last shard: the lower position wins, as in argmax
+    crops = probes_of(gallery, [2, 17, 39])
+    single = TemplateMatcher(gallery, threads=1)
+    sharded = TemplateMatcher(gallery, threads=4)
+
+    assert len(sharded.shards) == 4 and len(single.shards) == 1
+    positions, scores = sharded.top_matches(crops)
+    expected_positions, expected_scores = single.top_matches(crops)
+    np.testing.assert_array_equal(positions, expected_positions)
+    np.testing.assert_array_equal(scores, expected_scores)
+    assert sharded.match_batch(crops) == single.match_batch(crops) == [2, 17, 39, -1]
@@ -0,0 +1,65 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from frame_replay import RECORD_HEADER, FrameRecorder, ReplayCapture
+
+
+def frames(count):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (24, 32, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def replay_all(path):
+    replay = ReplayCapture(path, speed='max')
+    played = []
+    try:
+        while True:
+            ret, frame = replay.read()
+            if not ret:
+                return replay, played
+            played.append(frame)
+    finally:
+        replay.release()
+
+
+@pytest.mark.parametrize('encoding', ['raw', 'png', 'jpeg'])
+def test_recording_round_trip(tmp_path, encoding):
+    path = str(tmp_path / 'frames.rec')
+    recorded = frames(4)
+    with FrameRecorder(path, encoding, metadata={'source': 'test'}) as recorder:
+        for i, frame in enumerate(recorded):
+            recorder.write(frame, timestamp=10 + i / 30)
+
+    replay, played = replay_all(path)
+    assert replay.metadata == {'encoding': encoding, 'source': 'test'}
+    assert replay.get(cv2.CAP_PROP_FRAME_COUNT) == 4
+    assert replay.get(cv2.CAP_PROP_FPS) == pytest.approx(30)
+    assert (replay.get(cv2.CAP_PROP_FRAME_WIDTH), replay.get(cv2.CAP_PROP_FRAME_HEIGHT)) == (32, 24)
+    for original, frame in zip(recorded, played, strict=True):
+        if encoding == 'jpeg':
+            assert frame.shape == original.shape
+        else:
+            np.testing.assert_array_equal(frame, original)
+
+
+@pytest.mark.parametrize('encoding', ['raw', 'png'])
+@pytest.mark.parametrize('kept', [5, RECORD_HEADER.size, -1])
+def test_truncated_tail_is_dropped(tmp_path, encoding, kept):
+    path = str(tmp_path / 'frames.rec')
+    recorded = frames(3)
+    with FrameRecorder(path, encoding) as recorder:
+        for frame in recorded[:2]:
+            recorder.write(frame)
+        complete = recorder.file.tell()
+        recorder.write(recorded[2])
+    # Keep part of the last frame's header, just its header, or all but its last byte
+    with open(path, 'rb+') as f:
+        f.truncate(complete + kept if kept > 0 else os.path.getsize(path) + kept)
+
+    _, played = replay_all(path)
+    assert len(played) == 2
+    for original, frame in zip(recorded, played):
+        np.testing.assert_array_equal(frame, original)
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import pytest
+
+import frame_scheduler
+from frame_scheduler import AdaptiveFrameScheduler
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Simulated time: stages take exactly as long as the test says"""
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(frame_scheduler, 'time', SimpleNamespace(perf_counter=lambda: clock.now,
+                                                                 time=lambda: clock.now))
+    return clock
+
+
+def run(scheduler, clock, frames, detect, display=0.01):
+    """Feed frames whose detection and display cost the given seconds; returns which were analyzed"""
+    processed = []
+    for _ in range(frames):
+        start = clock.now
+        analyze = scheduler.should_process()
+        if analyze:
+            with scheduler.stage('detect'):
+                clock.now += detect
+        with scheduler.stage('display'):
+            clock.now += display
+        scheduler.frame_done(start, analyze)
+        processed.append(analyze)
+    return processed
+
+
+def test_light_load_analyzes_every_frame(clock):
+    scheduler = AdaptiveFrameScheduler(target_fps=15, max_latency=0.25)
+    assert all(run(scheduler, clock, 45, detect=0.02))
+    assert scheduler.stride == 1 and scheduler.stats()['within_budget']
+    assert scheduler.stats()['fps'] == pytest.approx(1 / 0.03)
+
+
+def test_heavy_load_skips_frames_and_recovers(clock):
+    scheduler = AdaptiveFrameScheduler(target_fps=15, max_latency=0.25)
+    processed = run(scheduler, clock, 45, detect=0.1)
+    # 110 ms a frame misses 15 FPS; analyzing every 2nd frame costs 60 ms and stays under 250 ms latency
+    assert scheduler.stride == 2
+    assert all(processed[:15]) and processed[15:] == [False, True] * 15
+    assert scheduler.stats()['within_budget']
+
+    run(scheduler, clock, 60, detect=0.02)
+    assert scheduler.stride == 1
+    assert [(old, new) for _, old, new in scheduler.decisions] == [(1, 2), (2, 1)]
+
+
+def test_overload_falls_back_to_the_largest_stride(clock):
+    scheduler = AdaptiveFrameScheduler(target_fps=15, max_latency=0.25)
+    processed = run(scheduler, clock, 31, detect=0.3)
+    assert scheduler.stride == 4
+    assert processed[16:31] == [True, False, False, False] * 3 + [True, False, False]
+    assert not scheduler.stats()['within_budget']
+    assert scheduler.overlay_text().startswith("Analyze 1/4 |")
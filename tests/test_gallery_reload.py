@@ -0,0 +1,113 @@
+import threading
+
+import numpy as np
+import pytest
+
+import face_gallery
+from attendance_db import DatabaseManager
+from face_data_file import update_face_data
+from gallery_watcher import GalleryWatcher
+
+pytest.importorskip('tkinter')
+from smart_attendance_system import SmartAttendanceSystem  # noqa: E402
+
+
+def templates(seed):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (size, size), dtype=np.uint8) for size in (20, 30)]
+
+
+def info(student_id):
+    return {'name': student_id, 'id': student_id}
+
+
+def make_app(ids=('S1', 'S2', 'S3')):
+    app = object.__new__(SmartAttendanceSystem)
+    app.match_threshold = 0.65
+    app.gallery_dtype = 'float32'
+    app.scoring_threads = 1
+    app.shift_tolerance = 2
+    app.session_roster = None
+    app.gallery_lock = threading.Lock()
+    app.gallery_watcher = None
+    app.install_gallery(app.build_snapshot({student_id: templates(i) for i, student_id in enumerate(ids)},
+                                           {student_id: info(student_id) for student_id in ids}))
+    return app
+
+
+@pytest.fixture
+def normalized_rows(monkeypatch):
+    """Counts template rows normalized while building galleries"""
+    counted = []
+    original = face_gallery.normalize_rows
+
+    def counting(matrix):
+        counted.append(len(matrix))
+        return original(matrix)
+
+    monkeypatch.setattr(face_gallery, 'normalize_rows', counting)
+    return counted
+
+
+def test_reload_prepares_only_changed_students(normalized_rows):
+    app = make_app()
+    normalized_rows.clear()
+    before = app.gallery_snapshot
+    faces, students = dict(before.face_data), dict(before.students)
+
+    app.apply_gallery_update({**faces, 'S2': templates(20), 'S4': templates(4)},
+                             {**students, 'S4': info('S4')},
+                             {'added': ['S4'], 'removed': ['S3'], 'changed': ['S2']})
+
+    assert sorted(app.face_data) == ['S1', 'S2', 'S4']
+    assert sum(normalized_rows) == 4  # Two sizes for each of S2 and S4; S1 is copied
+    fresh = app.build_snapshot(app.face_data, app.students)
+    crops = [templates(20)[0], templates(4)[1], templates(0)[0]]
+    np.testing.assert_allclose(app.matcher.scores(crops), fresh.matcher.scores(crops), atol=1e-6)
+    assert app.matcher.match_batch(crops) == [1, 2, 0]
+    # Whoever still holds the old snapshot sees it exactly as it was
+    assert before.face_data == faces and before.students == students and before.index.ids == ['S1', 'S2', 'S3']
+
+
+def test_reload_keeps_a_registration_installed_meanwhile():
+    app = make_app()
+    faces, students = dict(app.face_data), dict(app.students)
+    app.add_to_gallery('S9', templates(9), info('S9'))  # Installed after the watcher read the file
+    app.apply_gallery_update({**faces, 'S4': templates(4)}, {**students, 'S4': info('S4')},
+                             {'added': ['S4'], 'removed': [], 'changed': []})
+    assert sorted(app.face_data) == ['S1', 'S2', 'S3', 'S4', 'S9']
+
+
+def test_watcher_diffs_by_revision_and_skips_own_writes(tmp_path, monkeypatch):
+    path = str(tmp_path / 'smart_face_data.pkl')
+    monkeypatch.setattr('smart_attendance_system.FACE_DATA_PATH', path)
+    db = DatabaseManager(str(tmp_path / 'kiosk.db'), log_retries=False, partition_dir=str(tmp_path / 'partitions'))
+    db.write(lambda conn: conn.execute('CREATE TABLE students (student_id TEXT PRIMARY KEY)'))
+    app = make_app(())
+
+    def register(data):
+        for i in range(3):
+            data['face_data'][f"S{i}"] = templates(i)
+            data['students'][f"S{i}"] = info(f"S{i}")
+
+    data, _, _ = update_face_data(register, path)
+    app.install_gallery(app.build_snapshot(data['face_data'], data['students']))
+    watcher = GalleryWatcher(path, db, lambda: app.gallery_snapshot, app.apply_gallery_update,
+                             revisions=data['revisions'])
+    app.gallery_watcher = watcher
+    try:
+        watcher._data_version, watcher._db_ids = watcher._read_db_state()
+        monkeypatch.setattr('gallery_watcher.same_templates', lambda old, new: pytest.fail("compared templates"))
+
+        # Another process replaces S1's templates
+        update_face_data(lambda data: data['face_data'].update(S1=templates(11)), path)
+        assert watcher.poll() == {'added': [], 'removed': [], 'changed': ['S1']}
+
+        # This kiosk's own save is already in its gallery
+        app.save_face_data({'S7': templates(7)}, {'S7': info('S7')})
+        assert watcher.poll() is None
+        update_face_data(lambda data: data['students'].update(S0={'name': 'Renamed', 'id': 'S0'}), path)
+        assert watcher.poll() == {'added': ['S7'], 'removed': [], 'changed': ['S0']}
+        assert app.students['S0']['name'] == 'Renamed'
+    finally:
+        db.close()
@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+
+from face_data_file import load_face_data, save_face_data, update_face_data
+from gallery_sync import publish, pull
+
+
+def student(seed, sizes=(4, 6)):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (size, size), dtype=np.uint8) for size in sizes]
+
+
+def chunk_files(store):
+    return {name for _, _, names in os.walk(store / 'chunks') for name in names}
+
+
+def gallery(ids):
+    return {'face_data': {student_id: student(int(student_id[1:])) for student_id in ids},
+            'students': {student_id: {'name': student_id, 'id': student_id} for student_id in ids}}
+
+
+def test_pull_round_trip_and_incremental_update(tmp_path):
+    registrar = str(tmp_path / 'registrar.pkl')
+    kiosk = str(tmp_path / 'kiosk' / 'smart_face_data.pkl')
+    manifest = str(tmp_path / 'kiosk' / 'gallery_manifest.json')
+    store = str(tmp_path / 'store')
+
+    save_face_data(registrar, gallery(['S1', 'S2', 'S3']))
+    assert publish(store, registrar) == 1
+    stats = pull(store, kiosk, manifest)
+    assert (stats['version'], stats['changed'], stats['removed']) == (1, 3, 0)
+    pulled = load_face_data(kiosk)
+    assert all(np.array_equal(a, b) for a, b in zip(pulled['face_data']['S2'], student(2)))
+
+    update_face_data(lambda data: (data['face_data'].pop('S3'), data['students'].pop('S3')), registrar)
+    update_face_data(lambda data: data['face_data'].update(S1=student(99)), registrar)
+    assert publish(store, registrar) == 2
+    stats = pull(store, kiosk, manifest)
+    assert (stats['changed'], stats['removed']) == (1, 1)
+    assert sorted(load_face_data(kiosk)['face_data']) == ['S1', 'S2']
+    assert pull(store, kiosk, manifest)['changed'] == 0
+
+
+def test_pull_keeps_students_saved_locally(tmp_path):
+    registrar = str(tmp_path / 'registrar.pkl')
+    kiosk = str(tmp_path / 'kiosk.pkl')
+    manifest = str(tmp_path / 'manifest.json')
+    store = str(tmp_path / 'store')
+    save_face_data(registrar, gallery(['S1']))
+    publish(store, registrar)
+    pull(store, kiosk, manifest)
+
+    # Registered at the kiosk after its last pull
+    update_face_data(lambda data: data['face_data'].update(S7=student(7)), kiosk)
+    update_face_data(lambda data: data['face_data'].update(S2=student(2)), registrar)
+    publish(store, registrar)
+    pull(store, kiosk, manifest)
+    assert sorted(load_face_data(kiosk)['face_data']) == ['S1', 'S2', 'S7']
+
+
+def test_publish_prunes_chunks_two_versions_old(tmp_path):
+    registrar = str(tmp_path / 'registrar.pkl')
+    store = tmp_path / 'store'
+    save_face_data(registrar, gallery(['S1', 'S2']))
+    publish(str(store), registrar)
+    first = chunk_files(store)
+
+    update_face_data(lambda data: data['face_data'].update(S1=student(11)), registrar)
+    publish(str(store), registrar)
+    second = chunk_files(store)
+    assert first < second  # The previous version's chunks survive one publish
+
+    update_face_data(lambda data: data['face_data'].update(S1=student(12)), registrar)
+    publish(str(store), registrar)
+    third = chunk_files(store)
+    assert len(third) == 3 and first - third  # ...and are pruned by the next
@@ -0,0 +1,55 @@
+import cv2
+import numpy as np
+import pytest
+
+from lighting import LightingNormalizer
+
+
+def scene(mean, seed=0):
+    """Textured frame whose grey levels centre on `mean`"""
+    rng = np.random.default_rng(seed)
+    return np.clip(rng.normal(mean, 12, (240, 320)), 0, 255).astype(np.uint8)
+
+
+def test_mid_range_frames_pass_through_untouched():
+    normalizer = LightingNormalizer()
+    frame = scene(128)
+    assert normalizer.normalize(frame) is frame
+
+
+@pytest.mark.parametrize('mean', [30, 55, 205, 230])
+def test_dark_and_bright_frames_move_toward_the_target(mean):
+    normalizer = LightingNormalizer()
+    frame = scene(mean)
+    corrected = normalizer.normalize(frame)
+    assert corrected.dtype == np.uint8 and corrected.shape == frame.shape
+    assert abs(corrected.mean() - 128) < abs(frame.mean() - 128) - 20
+
+
+def test_lut_matches_the_gamma_curve_and_is_monotonic():
+    normalizer = LightingNormalizer(contrast=1.0)
+    frame = scene(44)
+    lut = normalizer.lut_for(frame)
+    assert int(normalizer.estimate_brightness(frame)) // 8 == 5
+    assert lut is normalizer.luts[5]  # Cached per brightness bin, not rebuilt per frame
+    assert (np.diff(lut.astype(np.int16)) >= 0).all()
+
+    mean = 5 * 8 + 4  # Centre of the bin
+    gamma = np.log(128 / 255) / np.log(mean / 255)
+    np.testing.assert_allclose(lut[mean], 128, atol=2)
+    np.testing.assert_allclose(lut[200], 255 * (200 / 255) ** gamma, atol=2)
+    np.testing.assert_array_equal(normalizer.normalize(frame), cv2.LUT(frame, lut))
+
+
+def test_brightness_uses_the_sampling_grid():
+    normalizer = LightingNormalizer(grid_step=8)
+    frame = np.full((64, 64), 200, dtype=np.uint8)
+    frame[::8, ::8] = 20  # Only the sampled pixels are dark
+    assert normalizer.estimate_brightness(frame) == 20
+
+
+def test_clahe_applies_to_face_crops_only_when_enabled():
+    face = scene(90)[:80, :80]
+    assert LightingNormalizer().normalize_face(face) is face
+    equalized = LightingNormalizer(use_clahe=True).normalize_face(face)
+    assert equalized.shape == face.shape and equalized.std() > face.std()
@@ -0,0 +1,48 @@
+import os
+import pstats
+
+from loop_profiler import LoopProfiler
+
+
+retained = []
+
+
+def analyze_frame():
+    """Stand-in frame work that keeps some memory alive, like a leak would"""
+    retained.append(bytearray(64 * 1024))
+    return sum(i * i for i in range(2000))
+
+
+def test_runs_add_up_into_three_reports(tmp_path):
+    profiler = LoopProfiler('unit', out_dir=str(tmp_path), snapshot_interval=0, top=5)
+    for frames in (4, 3):  # Two attendance sessions
+        profiler.enable()
+        for _ in range(frames):
+            analyze_frame()
+            profiler.tick()
+        profiler.disable()
+    retained.clear()
+
+    paths = profiler.finish()
+
+    assert [os.path.basename(path).split('_', 2)[:2] for path in paths] == [['profile', 'unit']] * 3
+    assert paths[0].endswith('.pstats') and all(os.path.exists(path) for path in paths)
+    functions = {name for _, _, name in pstats.Stats(paths[0]).stats}
+    assert 'analyze_frame' in functions
+
+    with open(paths[1], encoding='utf-8') as f:
+        hotspots = f.read()
+    assert hotspots.startswith("unit: 7 frames in ")
+    assert "=== Top 5 functions by own time ===" in hotspots and 'analyze_frame' in hotspots
+
+    with open(paths[2], encoding='utf-8') as f:
+        allocations = f.read()
+    # A snapshot per frame (interval 0) plus the final one, and the growing site traced to this file
+    assert len(profiler.timeline) == 8 and profiler.timeline[-1][1] == 7
+    assert "=== Traced memory over time ===" in allocations
+    assert 'test_loop_profiler.py' in allocations.split("=== Largest growth per snapshot interval ===")[1]
+
+
+def test_finish_without_a_run_writes_nothing(tmp_path):
+    assert LoopProfiler('unit', out_dir=str(tmp_path / 'reports')).finish() == []
+    assert not os.path.exists(tmp_path / 'reports')
@@ -0,0 +1,67 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+pytest.importorskip('tkinter')
+import smart_attendance_system  # noqa: E402
+from smart_attendance_system import SmartAttendanceSystem  # noqa: E402
+
+
+class StalledWriter:
+    """Stands in for DatabaseManager: write results are set by the test"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.submitted.append((args, future))
+        return future
+
+
+def make_app():
+    app = object.__new__(SmartAttendanceSystem)
+    app.db = StalledWriter()
+    app.pending_marks = []
+    app.mark_future = None
+    return app
+
+
+def test_locked_database_never_blocks_the_video_loop():
+    app = make_app()
+    start = time.perf_counter()
+    assert app.mark_attendance_smart('Ada', '101') is True
+    assert app.mark_attendance_smart('Alan', '102') is True
+    assert time.perf_counter() - start < 1.0
+    # One mark at the writer at a time, oldest first
+    assert len(app.db.submitted) == 1 and app.db.submitted[0][0][0] == '101'
+    assert [mark[1] for mark in app.pending_marks] == ['101', '102']
+
+    # The writer gives up on a lock: the mark stays first and is resubmitted
+    app.db.submitted[0][1].set_exception(sqlite3.OperationalError('database is locked'))
+    assert app.pump_marks() == []
+    assert [mark[1] for mark in app.pending_marks] == ['101', '102']
+    assert app.pump_marks() == []
+    assert app.db.submitted[1][0][0] == '101'
+
+    app.db.submitted[1][1].set_result(True)
+    threading.Timer(0.05, lambda: app.db.submitted[2][1].set_result(False)).start()
+    written = app.pump_marks(wait=2.0)
+    assert [(mark[1], marked) for mark, marked in written] == [('101', True), ('102', False)]
+    assert app.pending_marks == [] and app.mark_future is None
+
+
+def test_fast_writes_report_the_real_result(monkeypatch):
+    app = make_app()
+
+    def submit(fn, *args):
+        future = Future()
+        future.set_result(False)  # Another kiosk marked this student already
+        return future
+
+    monkeypatch.setattr(app.db, 'submit', submit)
+    assert app.mark_attendance_smart('Ada', '101') is False
+    assert app.pending_marks == []
@@ -0,0 +1,55 @@
+import time
+
+import numpy as np
+
+from recognition_workers import FrameRing, RecognitionWorkers
+
+
+def frame(shape, seed):
+    return np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+
+
+def wait_for(workers, seqs, timeout=60.0):
+    """Poll until every seq has a result; returns {seq: positions}"""
+    results = {}
+    deadline = time.monotonic() + timeout
+    while not seqs <= results.keys():
+        assert time.monotonic() < deadline, "recognition workers did not answer"
+        for seq, _, positions, _ in workers.poll(timeout=0.5):
+            results[seq] = positions
+    return results
+
+
+def test_ring_lends_each_slot_once():
+    ring = FrameRing(2, (4, 4))
+    try:
+        assert {ring.acquire(), ring.acquire()} == {0, 1}
+        assert ring.acquire() is None
+        ring.release(1)
+        assert ring.acquire() == 1
+    finally:
+        ring.close()
+
+
+def test_frame_shape_change_replaces_the_ring():
+    gallery = [[frame((50, 50), student)] for student in range(3)]
+    workers = RecognitionWorkers(1, (120, 160))
+    try:
+        workers.set_gallery(0, gallery)
+        first = workers.submit(frame((120, 160), 10), [(10, 10, 50, 50), (60, 20, 50, 50)])
+        assert first is not None
+
+        # A new camera resolution: dropped until the old frame is answered, then accepted
+        seq = None
+        deadline = time.monotonic() + 60
+        while seq is None:
+            assert time.monotonic() < deadline
+            seq = workers.submit(frame((240, 320), 11), [(100, 100, 60, 60)])
+            time.sleep(0.01)
+        assert workers.ring.shape == (240, 320)
+
+        results = wait_for(workers, {first, seq})
+        assert len(results[first]) == 2 and len(results[seq]) == 1
+        assert workers.stats()['in_flight'] == 0
+    finally:
+        workers.close()
@@ -0,0 +1,42 @@
+import numpy as np
+
+from student_state import StudentIndex, StudentRuntimeState
+
+
+def make_index():
+    face_data = {'a': [], 'b': [], 'c': []}
+    return StudentIndex({sid: {'name': sid.upper()} for sid in face_data}, face_data)
+
+
+def test_session_mode_counts_the_whole_day():
+    index = make_index()
+    state = StudentRuntimeState(len(index), cooldown=10)
+    # 'a' was marked earlier today in another course; 'z' has no templates here
+    state.load_present_today(index, {'a', 'z'})
+    assert state.today_total == 2
+    assert not state.marked_today.any()  # Still markable in this session
+
+    state.record_mark(index.position('a'), now=0.0)
+    state.record_mark(index.position('b'), now=0.0)
+    assert state.session_total == 2
+    assert state.today_total == 3
+
+
+def test_day_mode_seeds_duplicate_scope_and_total():
+    index = make_index()
+    state = StudentRuntimeState(len(index), cooldown=10)
+    state.load_marked_today(index, {'b'})
+    assert state.marked_today.tolist() == [False, True, False]
+    state.record_mark(index.position('c'), now=0.0)
+    assert state.today_total == 2
+
+
+def test_remap_keeps_state_by_student_id():
+    index = make_index()
+    state = StudentRuntimeState(len(index), cooldown=10)
+    state.record_mark(index.position('c'), now=5.0)
+    bigger = StudentIndex({}, {'0': [], 'a': [], 'c': []})
+    remapped = state.remap(index, bigger)
+    assert remapped.present_today.tolist() == [False, False, True]
+    assert np.isinf(remapped.last_marked[bigger.position('a')])
+    assert remapped.today_total == 1